@@ -0,0 +1,64 @@
+"""
+LinkedIn post parsing benchmark
+Times the linkedin_service parse path over the Voyager JSON fixtures in
+fixtures/ (profileUpdatesV2 elements and linkedin-api parsed feed posts).
+
+Usage (from scraper/):
+    python benchmarks/bench_parsing.py [--posts 20000] [--rounds 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SESSION_STORE", "memory")
+
+import linkedin_service as svc  # noqa: E402
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "voyager_posts.json")
+HASHTAGS = ["ai", "#MachineLearning", "python", "dataengineering", "llm"]
+
+
+def _scale(items: list, count: int) -> list:
+    return [items[i % len(items)] for i in range(count)]
+
+
+def _time(label: str, rounds: int, count: int, fn):
+    best = float("inf")
+    parsed = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        parsed = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {parsed:>7} posts  {best * 1000:8.1f} ms  {best / count * 1e6:6.2f} us/post")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        fixture = json.load(f)
+    updates = _scale(fixture["profile_updates"], args.posts)
+    feed = _scale(fixture["feed"], args.posts)
+
+    def profile_posts():
+        posts, _ = svc._parse_profile_posts(updates)
+        return len(posts)
+
+    def feed_posts(hashtags):
+        pattern = svc._hashtag_pattern(hashtags)
+        return sum(1 for post in feed if svc._parse_feed_post(post, False, pattern))
+
+    _time("profile posts", args.rounds, args.posts, profile_posts)
+    _time("feed posts", args.rounds, args.posts, lambda: feed_posts(None))
+    _time("feed posts + hashtags", args.rounds, args.posts, lambda: feed_posts(HASHTAGS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Browser Manager
+One bounded set of pre-launched Chromium processes (one Playwright driver)
+serving every browser-based path: LinkedIn login, public profile scraping and
+crawl4ai. Callers get isolated contexts by profile:
+- stealth: realistic fingerprint + stealth init script (LinkedIn login)
+- blocked_resources: stealth, without images/media/fonts (HTML-only scraping)
+- plain: default context settings (crawl4ai renders its pages in these and
+  only processes the resulting HTML)
+Browsers don't expose a remote-debugging port, so no other process (or another
+uvicorn worker's pool) can attach to them and bypass slot accounting.
+Browsers are recycled after serving a number of contexts or reaching a max age,
+and replaced when they crash.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import NamedTuple, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, Route, async_playwright
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Config
+# =============================================================================
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_CONTEXTS_PER_BROWSER", "10"))
+RECYCLE_AFTER_CONTEXTS = 100
+RECYCLE_AFTER_SECONDS = 1800
+
+STEALTH_SCRIPT = """
+Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+Object.defineProperty(navigator, 'languages', { get: () => ['pl-PL', 'pl', 'en-US', 'en'] });
+Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
+window.chrome = { runtime: {}, loadTimes: function(){}, csi: function(){} };
+Object.defineProperty(navigator, 'maxTouchPoints', { get: () => 0 });
+delete navigator.__proto__.webdriver;
+"""
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/131.0.0.0 Safari/537.36"
+)
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled"]
+
+
+class BrowserProfile(NamedTuple):
+    context_options: dict
+    init_script: Optional[str] = None
+    blocked_resource_types: frozenset = frozenset()
+
+
+_STEALTH_OPTIONS = {
+    "user_agent": USER_AGENT,
+    "viewport": VIEWPORT,
+    "locale": "en-US",
+    "timezone_id": "Europe/Warsaw",
+}
+
+PROFILES = {
+    "stealth": BrowserProfile(_STEALTH_OPTIONS, STEALTH_SCRIPT),
+    "blocked_resources": BrowserProfile(
+        _STEALTH_OPTIONS, STEALTH_SCRIPT, frozenset({"image", "media", "font"})
+    ),
+    "plain": BrowserProfile({"user_agent": USER_AGENT, "viewport": VIEWPORT}),
+}
+
+
+# =============================================================================
+# Manager
+# =============================================================================
+
+class _PooledBrowser:
+    __slots__ = ("browser", "launched_at", "active", "served", "retiring")
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.launched_at = time.monotonic()
+        self.active = 0  # open contexts
+        self.served = 0  # contexts handed out over the browser's lifetime
+        self.retiring = False
+
+
+class BrowserManager:
+    """
+    Fixed number of warm browsers, each serving up to max_contexts isolated
+    contexts. acquire() waits when every browser is at capacity.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_contexts: int = CONTEXTS_PER_BROWSER,
+        recycle_after_contexts: int = RECYCLE_AFTER_CONTEXTS,
+        recycle_after_seconds: float = RECYCLE_AFTER_SECONDS,
+    ):
+        self.size = size
+        self.max_contexts = max_contexts
+        self.recycle_after_contexts = recycle_after_contexts
+        self.recycle_after_seconds = recycle_after_seconds
+        self._playwright: Optional[Playwright] = None
+        self._browsers: list[_PooledBrowser] = []
+        self._owners: dict[BrowserContext, _PooledBrowser] = {}
+        self._condition = asyncio.Condition()
+        self._start_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()  # keeps relaunch tasks alive until done
+        self._launched = 0
+        self._recycled = 0
+        self._crashed = 0
+        self._acquired: dict[str, int] = {}
+        self._wait_total = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.size * self.max_contexts
+
+    async def start(self):
+        """Start the driver and pre-launch `size` browsers (idempotent)."""
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            while len([b for b in self._browsers if not b.retiring]) < self.size:
+                self._browsers.append(await self._launch())
+        logger.info(f"[BROWSER MANAGER] {len(self._browsers)} browsers ready")
+
+    async def stop(self):
+        async with self._start_lock:
+            # Detach first so the disconnect handler doesn't relaunch them
+            browsers, self._browsers = self._browsers, []
+            self._owners.clear()
+            for pooled in browsers:
+                try:
+                    await pooled.browser.close()
+                except Exception:
+                    pass
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        pooled = _PooledBrowser(browser)
+        browser.on("disconnected", lambda _: self._on_disconnected(pooled))
+        self._launched += 1
+        return pooled
+
+    def _on_disconnected(self, pooled: _PooledBrowser):
+        if pooled in self._browsers:
+            logger.warning("[BROWSER MANAGER] Browser disconnected, replacing it")
+            self._crashed += 1
+            self._browsers.remove(pooled)
+            for context, owner in list(self._owners.items()):
+                if owner is pooled:
+                    del self._owners[context]
+            task = asyncio.ensure_future(self._replenish())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _replenish(self):
+        try:
+            await self.start()
+        except Exception as e:
+            logger.error(f"[BROWSER MANAGER] Relaunch failed: {e}")
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _pick(self) -> Optional[_PooledBrowser]:
+        candidates = [b for b in self._browsers if not b.retiring and b.active < self.max_contexts]
+        return min(candidates, key=lambda b: b.active) if candidates else None
+
+    async def _reserve(self, kind: str) -> _PooledBrowser:
+        """Take a slot on the least loaded browser."""
+        if self._playwright is None or len(self._browsers) < self.size:
+            await self.start()
+
+        started = time.monotonic()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._pick() is not None)
+            pooled = self._pick()
+            pooled.active += 1
+            pooled.served += 1
+        self._acquired[kind] = self._acquired.get(kind, 0) + 1
+        self._wait_total += time.monotonic() - started
+        return pooled
+
+    async def acquire(self, profile: str = "plain", **context_options) -> BrowserContext:
+        """New isolated context set up for `profile` (overrides via context_options)."""
+        settings = PROFILES[profile]
+        pooled = await self._reserve(profile)
+        try:
+            context = await pooled.browser.new_context(**{**settings.context_options, **context_options})
+            if settings.init_script:
+                await context.add_init_script(settings.init_script)
+            if settings.blocked_resource_types:
+                await context.route("**/*", _resource_blocker(settings.blocked_resource_types))
+        except Exception:
+            await self._release_slot(pooled)
+            raise
+
+        self._owners[context] = pooled
+        return context
+
+    async def release(self, context: BrowserContext):
+        """Close the context and recycle its browser when it is due."""
+        try:
+            await context.close()
+        except Exception:
+            pass
+        pooled = self._owners.pop(context, None)
+        if pooled is not None:
+            await self._release_slot(pooled)
+
+    async def _release_slot(self, pooled: _PooledBrowser):
+        pooled.active -= 1
+        if not pooled.retiring and (
+            pooled.served >= self.recycle_after_contexts
+            or time.monotonic() - pooled.launched_at > self.recycle_after_seconds
+        ):
+            pooled.retiring = True
+            # Warm a replacement right away; the old browser drains its open contexts
+            await self.start()
+        if pooled.retiring and pooled.active <= 0 and pooled in self._browsers:
+            self._browsers.remove(pooled)
+            self._recycled += 1
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        async with self._condition:
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        active = sum(b.active for b in self._browsers)
+        acquired = sum(self._acquired.values())
+        return {
+            "browsers": len(self._browsers),
+            "size": self.size,
+            "active_contexts": active,
+            "capacity": self.capacity,
+            "utilization": round(active / self.capacity, 3) if self.capacity else 0.0,
+            "launched": self._launched,
+            "recycled": self._recycled,
+            "crashed": self._crashed,
+            "acquired": dict(self._acquired),
+            "avg_acquire_seconds": round(self._wait_total / acquired, 3) if acquired else 0.0,
+        }
+
+
+def _resource_blocker(resource_types: frozenset):
+    async def handle(route: Route):
+        if route.request.resource_type in resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+    return handle
+
+
+# Shared by every module; started and stopped in the app lifespan
+browser_manager = BrowserManager()
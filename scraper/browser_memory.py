@@ -0,0 +1,211 @@
+"""
+Browser Memory Budget
+Samples the RSS of every Chromium process spawned by this service (login pool,
+linkedin_public, crawl4ai) and keeps the total under a global budget.
+Connectors register their idle browser contexts (e.g. login sessions waiting for
+a 2FA code); when the budget is exceeded the oldest idle ones are closed first,
+and new browser work is refused while usage stays above the budget.
+The reaper task started in the app lifespan expires abandoned sessions and
+enforces the budget on a timer.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+BROWSER_MEMORY_BUDGET_MB = int(os.getenv("BROWSER_MEMORY_BUDGET_MB", "1536"))  # 0 disables the budget
+REAPER_INTERVAL_SECONDS = float(os.getenv("BROWSER_REAPER_INTERVAL", "15"))
+SAMPLE_MAX_AGE_SECONDS = 2.0
+RECLAIM_SETTLE_SECONDS = 0.5  # renderer processes exit shortly after their context closes
+
+# Process names of Chromium builds Playwright/crawl4ai launch
+_BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+class IdleContext(NamedTuple):
+    idle_seconds: float
+    label: str
+    close: Callable[[], Awaitable]
+
+
+class _Source(NamedTuple):
+    idle: Callable[[], list[IdleContext]]
+    expire: Optional[Callable[[], int]]
+
+
+_sources: dict[str, _Source] = {}
+_lock = asyncio.Lock()
+
+_last_sample: list[dict] = []
+_last_sampled_at = 0.0
+_peak_rss_mb = 0.0
+_over_budget_events = 0
+_reclaimed = 0
+_refused = 0
+_reaped = 0
+_settle_until = 0.0  # monotonic time the last reclaim's renderers should have exited by
+
+
+def register_source(name: str, idle: Callable[[], list[IdleContext]], expire: Optional[Callable[[], int]] = None):
+    """
+    Register a connector's idle contexts as reclaimable.
+    `expire` (optional) closes its expired sessions and returns how many it closed.
+    """
+    _sources[name] = _Source(idle, expire)
+
+
+# =============================================================================
+# Sampling
+# =============================================================================
+
+def _is_browser(proc: psutil.Process) -> bool:
+    try:
+        name = proc.name().lower()
+    except psutil.Error:
+        return False
+    return any(browser in name for browser in _BROWSER_PROCESS_NAMES)
+
+
+def _sample_browsers() -> list[dict]:
+    """RSS per browser: each top-level Chromium process plus its renderer/GPU/utility children."""
+    procs = {proc.pid: proc for proc in psutil.Process().children(recursive=True) if _is_browser(proc)}
+    browsers: dict[int, dict] = {}
+    for pid, proc in procs.items():
+        try:
+            rss = proc.memory_info().rss
+            root = pid
+            parent = proc.ppid()
+            while parent in procs:
+                root, parent = parent, procs[parent].ppid()
+        except psutil.Error:
+            continue  # exited while sampling
+        entry = browsers.setdefault(root, {"pid": root, "processes": 0, "rss_mb": 0.0})
+        entry["processes"] += 1
+        entry["rss_mb"] += rss / (1024 * 1024)
+    return sorted(browsers.values(), key=lambda b: b["rss_mb"], reverse=True)
+
+
+def sample(max_age: float = SAMPLE_MAX_AGE_SECONDS) -> float:
+    """Total browser RSS in MB (reuses a sample younger than max_age)."""
+    global _last_sample, _last_sampled_at, _peak_rss_mb
+    now = time.monotonic()
+    if now - _last_sampled_at > max_age:
+        _last_sample = _sample_browsers()
+        _last_sampled_at = now
+    total = sum(b["rss_mb"] for b in _last_sample)
+    _peak_rss_mb = max(_peak_rss_mb, total)
+    return total
+
+
+# =============================================================================
+# Budget Enforcement
+# =============================================================================
+
+def _within_budget(usage: float) -> bool:
+    return not BROWSER_MEMORY_BUDGET_MB or usage <= BROWSER_MEMORY_BUDGET_MB
+
+
+def _idle_contexts() -> list[IdleContext]:
+    contexts = []
+    for name, source in _sources.items():
+        try:
+            contexts.extend(source.idle())
+        except Exception as e:
+            logger.warning(f"[BROWSER MEMORY] {name}: listing idle contexts failed: {e}")
+    return sorted(contexts, key=lambda c: c.idle_seconds, reverse=True)
+
+
+def _reclaim_count(usage: float, idle: int) -> int:
+    """How many idle contexts to close: the overage's share of the idle set, at least one."""
+    overage = (usage - BROWSER_MEMORY_BUDGET_MB) / usage
+    return min(idle, max(1, math.ceil(idle * overage)))
+
+
+async def _close_context(context: IdleContext) -> bool:
+    try:
+        await context.close()
+    except Exception as e:
+        logger.warning(f"[BROWSER MEMORY] Closing {context.label} failed: {e}")
+        return False
+    logger.info(f"[BROWSER MEMORY] Closed {context.label} (idle {context.idle_seconds:.0f}s)")
+    return True
+
+
+async def enforce_budget() -> bool:
+    """Close idle contexts, oldest first, until usage fits the budget. Returns True when it fits."""
+    global _over_budget_events, _reclaimed, _settle_until
+    async with _lock:
+        usage = sample(max_age=0)
+        if _within_budget(usage):
+            return True
+
+        # A reclaim that is still settling has not shown up in RSS yet - wait for it
+        # instead of closing more contexts on a stale reading
+        if time.monotonic() >= _settle_until:
+            _over_budget_events += 1
+            logger.warning(
+                f"[BROWSER MEMORY] Browsers use {usage:.0f} MB of a {BROWSER_MEMORY_BUDGET_MB} MB budget, reclaiming idle contexts"
+            )
+            idle = _idle_contexts()
+            if not idle:
+                return False
+            chosen = idle[:_reclaim_count(usage, len(idle))]
+            closed = await asyncio.gather(*(_close_context(context) for context in chosen))
+            _reclaimed += sum(closed)
+            if not any(closed):
+                return False
+            _settle_until = time.monotonic() + RECLAIM_SETTLE_SECONDS
+
+    # Settle and re-sample once, outside the lock
+    await asyncio.sleep(max(0.0, _settle_until - time.monotonic()))
+    return _within_budget(sample(max_age=0))
+
+
+async def ensure_headroom() -> bool:
+    """Admission check before launching browser work; False means refuse the request."""
+    global _refused
+    if _within_budget(sample()) or await enforce_budget():
+        return True
+    _refused += 1
+    return False
+
+
+async def run_reaper(interval: float = REAPER_INTERVAL_SECONDS):
+    """Background task: expire abandoned sessions and enforce the memory budget."""
+    global _reaped
+    while True:
+        await asyncio.sleep(interval)
+        for name, source in _sources.items():
+            if source.expire is None:
+                continue
+            try:
+                _reaped += source.expire()
+            except Exception as e:
+                logger.error(f"[BROWSER MEMORY] {name}: reaping expired sessions failed: {e}")
+        try:
+            await enforce_budget()
+        except Exception as e:
+            logger.error(f"[BROWSER MEMORY] Budget enforcement failed: {e}")
+
+
+def get_stats() -> dict:
+    usage = sample()
+    return {
+        "budget_mb": BROWSER_MEMORY_BUDGET_MB,
+        "rss_mb": round(usage, 1),
+        "peak_rss_mb": round(_peak_rss_mb, 1),
+        "utilization": round(usage / BROWSER_MEMORY_BUDGET_MB, 3) if BROWSER_MEMORY_BUDGET_MB else 0.0,
+        "browsers": [{**b, "rss_mb": round(b["rss_mb"], 1)} for b in _last_sample],
+        "idle_contexts": len(_idle_contexts()),
+        "over_budget_events": _over_budget_events,
+        "reclaimed_contexts": _reclaimed,
+        "reaped_sessions": _reaped,
+        "refused": _refused,
+    }
@@ -0,0 +1,116 @@
+"""
+Browser Storage State
+Per-domain cookies and localStorage captured after a successful page load and
+replayed into later loads of the same domain, so cookie-consent walls and
+overlays dismissed once stay dismissed. Stored in the session store (encrypted,
+shared by workers) under the "browser_state" namespace with an expiry.
+State is only ever applied to a context owned by a single page load (closed
+afterwards), so one domain's cookies never leak into another crawl.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+from urllib.parse import urlparse
+
+from session_store import session_store
+
+logger = logging.getLogger(__name__)
+
+STATE_NAMESPACE = "browser_state"
+STATE_TTL_SECONDS = int(os.getenv("BROWSER_STATE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_COOKIES_PER_DOMAIN = 100
+
+# Fills localStorage of the matching origin before any page script runs;
+# keys the page has already set win over the saved ones
+RESTORE_LOCAL_STORAGE_SCRIPT = """
+(origins) => {
+    const saved = origins.find(o => o.origin === location.origin);
+    if (!saved) return;
+    for (const { name, value } of saved.localStorage) {
+        if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+}
+"""
+
+_stats = {"warm": 0, "cold": 0, "saved": 0, "save_errors": 0}
+
+
+def domain_key(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _belongs_to(host: str, domain: str) -> bool:
+    host = host.lstrip(".").lower()
+    return host == domain or host.endswith("." + domain) or domain.endswith("." + host)
+
+
+class DomainState:
+    """Storage state round-trip for one page load of `url` (create with `await DomainState.load(url)`)."""
+
+    def __init__(self, domain: str, state: Optional[dict] = None):
+        self.domain = domain
+        self.state = state
+        self._captured: Optional[dict] = None
+        _stats["warm" if self.warm else "cold"] += 1
+
+    @classmethod
+    async def load(cls, url: str) -> "DomainState":
+        """Read the domain's saved state off the event loop (SQLite read + decrypt)."""
+        domain = domain_key(url)
+        state = await asyncio.to_thread(session_store.load, STATE_NAMESPACE, domain) if domain else None
+        return cls(domain, state)
+
+    @property
+    def warm(self) -> bool:
+        """Saved state exists, so consent/overlays were already handled for this domain."""
+        return bool(self.state and (self.state.get("cookies") or self.state.get("origins")))
+
+    async def apply(self, page, context):
+        """Replay saved cookies into the (per-load) context and localStorage into the page."""
+        if not self.warm:
+            return
+        try:
+            if self.state.get("cookies"):
+                await context.add_cookies(self.state["cookies"])
+            if self.state.get("origins"):
+                await page.add_init_script(f"({RESTORE_LOCAL_STORAGE_SCRIPT})({json.dumps(self.state['origins'])})")
+        except Exception as e:
+            logger.warning(f"[BROWSER STATE] Restoring state for {self.domain} failed: {e}")
+
+    async def capture(self, context):
+        """Snapshot the domain's cookies and localStorage (saved later if the load succeeded)."""
+        try:
+            state = await context.storage_state()
+        except Exception as e:
+            logger.warning(f"[BROWSER STATE] Capturing state for {self.domain} failed: {e}")
+            return
+        self._captured = {
+            "cookies": [c for c in state.get("cookies", []) if _belongs_to(c.get("domain", ""), self.domain)][
+                :MAX_COOKIES_PER_DOMAIN
+            ],
+            "origins": [
+                o for o in state.get("origins", [])
+                if o.get("localStorage") and _belongs_to(urlparse(o.get("origin", "")).hostname or "", self.domain)
+            ],
+        }
+
+    async def save(self):
+        """Persist the captured state (call only after a successful load)."""
+        if not self._captured or not (self._captured["cookies"] or self._captured["origins"]):
+            return
+        try:
+            await asyncio.to_thread(
+                session_store.save, STATE_NAMESPACE, self.domain, self._captured, STATE_TTL_SECONDS
+            )
+            _stats["saved"] += 1
+        except Exception as e:
+            _stats["save_errors"] += 1
+            logger.warning(f"[BROWSER STATE] Saving state for {self.domain} failed: {e}")
+
+
+def get_stats() -> dict:
+    return {**_stats, "ttl_seconds": STATE_TTL_SECONDS}
@@ -0,0 +1,461 @@
+"""
+Scrape Jobs
+Async job API for long-running scrapes: POST /jobs enqueues a scrape and
+returns its id, GET /jobs/{id} reports status and result, and an optional
+callback URL receives the finished job (only hosts listed in
+JOB_CALLBACK_ALLOWED_HOSTS; callbacks are refused when it is empty).
+Jobs are persisted in SQLite under SCRAPER_DATA_DIR (so a restart resumes the
+queue) and drained by an in-process worker pool in the scheduler's bulk lane:
+highest priority first, failed attempts retried with exponential backoff.
+A claimed job holds a lease its worker keeps renewing; only jobs whose lease
+ran out (the owning process died) go back to the queue, so jobs running in
+another live process or uvicorn worker are never run twice.
+Job types are registered by main.py (handler + request model).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from scheduler import LANE_BULK, scheduler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# =============================================================================
+# Config
+# =============================================================================
+
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+JOBS_DB_PATH = os.getenv("SCRAPER_JOBS_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+
+JOB_WORKERS = int(os.getenv("SCRAPER_JOB_WORKERS", "3"))
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BASE_SECONDS = 10.0
+JOB_RETRY_MAX_SECONDS = 600.0
+JOB_RETENTION_SECONDS = 24 * 3600  # finished jobs are kept this long for GET /jobs/{id}
+JOB_PURGE_INTERVAL_SECONDS = 3600
+JOB_POLL_SECONDS = 1.0  # worker idle wake-up (picks up retries coming due)
+JOB_LEASE_SECONDS = 60.0  # a running job is reclaimable this long after its last heartbeat
+JOB_HEARTBEAT_SECONDS = JOB_LEASE_SECONDS / 3
+CALLBACK_TIMEOUT = httpx.Timeout(10.0)
+# Comma-separated hostnames callback_url may point at (e.g. "app.example.com")
+JOB_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+# =============================================================================
+# Pydantic Models
+# =============================================================================
+
+class JobCreateRequest(BaseModel):
+    type: str  # scrape, articles
+    payload: dict[str, Any]  # body of the matching synchronous endpoint
+    priority: int = Field(0, ge=0, le=9)  # higher runs first
+    max_attempts: int = Field(JOB_MAX_ATTEMPTS, ge=1, le=10)
+    callback_url: Optional[str] = None  # POSTed the JobResponse once the job finishes
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str  # queued, running, done, failed
+    priority: int
+    attempts: int
+    max_attempts: int
+    created_at: float
+    updated_at: float
+    run_at: Optional[float] = None  # next attempt (queued jobs)
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+# =============================================================================
+# Job Types
+# =============================================================================
+
+# type -> (request model, async handler returning a response model with `success`)
+_handlers: dict[str, tuple[type[BaseModel], Callable[[Any], Awaitable[BaseModel]]]] = {}
+
+
+def register_job_type(name: str, request_model: type[BaseModel], handler: Callable[[Any], Awaitable[BaseModel]]):
+    _handlers[name] = (request_model, handler)
+
+
+# =============================================================================
+# Persistence
+# =============================================================================
+
+class JobStore:
+    """SQLite job table; claim() hands each due job to exactly one worker."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, type TEXT NOT NULL, payload TEXT NOT NULL, "
+                "priority INTEGER NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "max_attempts INTEGER NOT NULL, run_at REAL NOT NULL, callback_url TEXT, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "owner TEXT, lease_expires_at REAL)"
+            )
+            # Tables created before leases existed
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, priority DESC, run_at, created_at)"
+            )
+        return self._conn
+
+    def insert(self, request: JobCreateRequest) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "INSERT INTO jobs (id, type, payload, priority, status, attempts, max_attempts, run_at, "
+                "callback_url, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (job_id, request.type, json.dumps(request.payload), request.priority, STATUS_QUEUED,
+                 request.max_attempts, now, request.callback_url, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def claim(self, owner: str) -> Optional[sqlite3.Row]:
+        """Mark the highest-priority due job running under a lease held by `owner` and return it."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND run_at <= ? "
+                    "ORDER BY priority DESC, run_at, created_at LIMIT 1",
+                    (STATUS_QUEUED, now),
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_expires_at = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (STATUS_RUNNING, owner, now + JOB_LEASE_SECONDS, now, row["id"]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Extend the lease of a job `owner` is running; False when the lease was lost."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db().execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (now + JOB_LEASE_SECONDS, job_id, STATUS_RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    # finish/retry only apply while `owner` still holds the job, so a worker whose lease
+    # expired can't overwrite the run that took over; they return whether they applied
+
+    def finish(self, job_id: str, owner: str, status: str, result: Optional[dict], error: Optional[str]) -> bool:
+        with self._lock:
+            cursor = self._db().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, owner = NULL, lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(),
+                 job_id, STATUS_RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    def retry(self, job_id: str, owner: str, run_at: float, result: Optional[dict], error: Optional[str]) -> bool:
+        with self._lock:
+            cursor = self._db().execute(
+                "UPDATE jobs SET status = ?, run_at = ?, result = ?, error = ?, owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (STATUS_QUEUED, run_at, json.dumps(result) if result is not None else None, error,
+                 time.time(), job_id, STATUS_RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    def requeue_expired(self) -> int:
+        """Running jobs whose lease ran out (owner process died) go back to the queue."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db().execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (STATUS_QUEUED, now, STATUS_RUNNING, now),
+            )
+            return cursor.rowcount
+
+    def next_run_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MIN(run_at) FROM jobs WHERE status = ?", (STATUS_QUEUED,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def purge_finished(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._db().execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_DONE, STATUS_FAILED, time.time() - older_than),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+_store = JobStore(JOBS_DB_PATH)
+
+# Set on enqueue so idle workers pick new jobs up immediately
+_wakeup = asyncio.Event()
+_workers: list[asyncio.Task] = []
+_last_purge = 0.0
+_last_requeue = 0.0
+# Lease owner id of this process (one per uvicorn worker)
+_owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+_stats = {"completed": 0, "failed": 0, "retried": 0, "callbacks_sent": 0, "callback_errors": 0}
+
+
+def _to_response(row: sqlite3.Row) -> JobResponse:
+    return JobResponse(
+        id=row["id"],
+        type=row["type"],
+        status=row["status"],
+        priority=row["priority"],
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        run_at=row["run_at"] if row["status"] == STATUS_QUEUED else None,
+        result=json.loads(row["result"]) if row["result"] else None,
+        error=row["error"],
+    )
+
+
+# =============================================================================
+# Workers
+# =============================================================================
+
+def _retry_delay(attempt: int) -> float:
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+    return delay + random.uniform(0, delay / 4)
+
+
+def _callback_url_error(url: str) -> Optional[str]:
+    """Why `url` may not receive callbacks, or None when it may."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return "callback_url must be an http(s) URL"
+    if (parsed.hostname or "").lower() not in JOB_CALLBACK_ALLOWED_HOSTS:
+        return f"callback_url host is not allowed: {parsed.hostname}"
+    return None
+
+
+async def _send_callback(url: str, job: JobResponse):
+    # Re-checked here: jobs persisted before the allow-list changed must not bypass it
+    error = _callback_url_error(url)
+    if error:
+        _stats["callback_errors"] += 1
+        logger.warning(f"[JOBS] Callback for job {job.id} skipped: {error}")
+        return
+    try:
+        async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT) as client:
+            res = await client.post(url, json=job.model_dump())
+            res.raise_for_status()
+        _stats["callbacks_sent"] += 1
+    except Exception as e:
+        _stats["callback_errors"] += 1
+        logger.warning(f"[JOBS] Callback for job {job.id} to {url} failed: {e}")
+
+
+async def _keep_lease(job_id: str):
+    """Renew the job's lease while it runs (cancelled when the run ends)."""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            if not await asyncio.to_thread(_store.heartbeat, job_id, _owner):
+                logger.warning(f"[JOBS] Lost the lease on job {job_id}")
+                return
+        except Exception as e:
+            logger.warning(f"[JOBS] Heartbeat for job {job_id} failed: {e}")
+
+
+async def _run(row: sqlite3.Row):
+    job_id = row["id"]
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    heartbeat = asyncio.create_task(_keep_lease(job_id))
+    try:
+        request_model, handler = _handlers[row["type"]]
+        async with scheduler.slot(LANE_BULK):
+            response = await handler(request_model(**json.loads(row["payload"])))
+        result = response.model_dump()
+        if not result.get("success", True):
+            error = result.get("error") or "Job failed"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    finally:
+        heartbeat.cancel()
+
+    if error is None:
+        applied = await asyncio.to_thread(_store.finish, job_id, _owner, STATUS_DONE, result, None)
+        if applied:
+            _stats["completed"] += 1
+    elif row["attempts"] < row["max_attempts"]:
+        delay = _retry_delay(row["attempts"])
+        if await asyncio.to_thread(_store.retry, job_id, _owner, time.time() + delay, result, error):
+            _stats["retried"] += 1
+            logger.info(f"[JOBS] Job {job_id} attempt {row['attempts']} failed ({error}), retrying in {delay:.0f}s")
+        return
+    else:
+        applied = await asyncio.to_thread(_store.finish, job_id, _owner, STATUS_FAILED, result, error)
+        if applied:
+            _stats["failed"] += 1
+            logger.warning(f"[JOBS] Job {job_id} failed after {row['attempts']} attempts: {error}")
+
+    if not applied:
+        # Lease expired and the job was requeued or taken over - that run reports it
+        logger.warning(f"[JOBS] Job {job_id} finished after losing its lease, result dropped")
+        return
+    if row["callback_url"]:
+        await _send_callback(row["callback_url"], _to_response(await asyncio.to_thread(_store.get, job_id)))
+
+
+async def _maybe_requeue_expired():
+    global _last_requeue
+    if time.monotonic() - _last_requeue < JOB_HEARTBEAT_SECONDS:
+        return
+    _last_requeue = time.monotonic()
+    requeued = await asyncio.to_thread(_store.requeue_expired)
+    if requeued:
+        logger.info(f"[JOBS] Requeued {requeued} jobs whose worker stopped heartbeating")
+
+
+async def _maybe_purge():
+    global _last_purge
+    if time.monotonic() - _last_purge < JOB_PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = time.monotonic()
+    purged = await asyncio.to_thread(_store.purge_finished, JOB_RETENTION_SECONDS)
+    if purged:
+        logger.info(f"[JOBS] Purged {purged} finished jobs")
+
+
+async def _worker(index: int):
+    while True:
+        try:
+            row = await asyncio.to_thread(_store.claim, _owner)
+        except Exception as e:
+            logger.error(f"[JOBS] Worker {index}: claiming a job failed: {e}")
+            row = None
+        if row is None:
+            try:
+                await _maybe_requeue_expired()
+            except Exception as e:
+                logger.error(f"[JOBS] Worker {index}: requeueing expired jobs failed: {e}")
+            await _maybe_purge()
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            await _run(row)
+        except Exception as e:
+            logger.error(f"[JOBS] Worker {index}: job {row['id']} crashed: {e}")
+
+
+async def start_workers(count: int = JOB_WORKERS):
+    """Requeue jobs of dead workers, drop expired ones and start the worker pool (app startup)."""
+    await _maybe_requeue_expired()
+    await _maybe_purge()
+    _workers.extend(asyncio.create_task(_worker(i)) for i in range(count))
+
+
+async def stop_workers():
+    """Cancel the workers; jobs they were running are requeued once their lease runs out."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def get_stats() -> dict:
+    next_run_at = await asyncio.to_thread(_store.next_run_at)
+    return {
+        "workers": len(_workers),
+        "jobs": await asyncio.to_thread(_store.counts),
+        "next_run_in_seconds": round(max(0.0, next_run_at - time.time()), 1) if next_run_at else None,
+        **_stats,
+    }
+
+
+# =============================================================================
+# Endpoints
+# =============================================================================
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobCreateRequest):
+    """Enqueue a scrape; poll GET /jobs/{id} or wait for the callback."""
+    entry = _handlers.get(request.type)
+    if entry is None:
+        raise HTTPException(status_code=400, detail=f"Unknown job type: {request.type}")
+    try:
+        entry[0](**request.payload)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid payload: {e}")
+    if request.callback_url:
+        error = _callback_url_error(request.callback_url)
+        if error:
+            raise HTTPException(status_code=422, detail=error)
+
+    job_id = await asyncio.to_thread(_store.insert, request)
+    _wakeup.set()
+    return _to_response(await asyncio.to_thread(_store.get, job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    row = await asyncio.to_thread(_store.get, job_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _to_response(row)
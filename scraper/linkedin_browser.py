@@ -1,19 +1,28 @@
 """
 LinkedIn Browser Login Service
 Playwright-based browser automation for LinkedIn auth with 2FA support.
+Login flows run in isolated stealth contexts handed out by the shared browser manager.
 """
 
 import asyncio
 import base64
 import logging
-import random
+import os
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from datetime import datetime
+from typing import Optional, Tuple
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import BrowserContext, Page
+
+import browser_memory
+from browser_memory import IdleContext
+from browser_manager import browser_manager
+from scheduler import too_many_requests
+from ttl_cache import TTLCache
+from voyager_client import VoyagerClient
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +33,9 @@ router = APIRouter()
 # =============================================================================
 
 SESSION_TTL_MINUTES = 5
-MAX_CONCURRENT_SESSIONS = 5
-
-_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SESSIONS)
 
-# session_id -> (browser, context, page, created_at)
-_browser_sessions: Dict[str, Tuple[Browser, BrowserContext, Page, datetime]] = {}
+# Concurrent login flows; each holds one context of the shared browser manager
+MAX_CONCURRENT_SESSIONS = int(os.getenv("LINKEDIN_BROWSER_MAX_SESSIONS", "10"))
 
 
 # =============================================================================
@@ -48,7 +54,7 @@ class BrowserLoginStartResponse(BaseModel):
     li_at: Optional[str] = None
     jsessionid: Optional[str] = None
     profile_name: Optional[str] = None
-    screenshot: Optional[str] = None  # base64
+    screenshot_url: Optional[str] = None  # GET it while the screenshot is kept (a few minutes)
     error: Optional[str] = None
 
 
@@ -63,8 +69,9 @@ class BrowserLoginVerifyResponse(BaseModel):
     li_at: Optional[str] = None
     jsessionid: Optional[str] = None
     profile_name: Optional[str] = None
-    screenshot: Optional[str] = None
+    screenshot_url: Optional[str] = None
     error: Optional[str] = None
+    timings_ms: Optional[dict[str, int]] = None  # per-phase durations of the verify flow
 
 
 class BrowserLoginCloseRequest(BaseModel):
@@ -79,72 +86,73 @@ class BrowserLoginCloseResponse(BaseModel):
 # Session Management
 # =============================================================================
 
-async def _cleanup_expired():
-    """Remove sessions older than TTL."""
-    now = datetime.utcnow()
-    expired = [
-        sid for sid, (_, _, _, created) in _browser_sessions.items()
-        if now - created > timedelta(minutes=SESSION_TTL_MINUTES)
-    ]
-    for sid in expired:
-        await _close_session(sid)
-
-
-async def _close_session(session_id: str):
-    """Close browser and remove session."""
-    entry = _browser_sessions.pop(session_id, None)
-    if entry:
-        browser, context, page, _ = entry
+async def _dispose(context: BrowserContext, page: Optional[Page] = None):
+    """Close the page and hand the context back to the browser manager."""
+    if page is not None:
         try:
             await page.close()
         except Exception:
             pass
-        try:
-            await context.close()
-        except Exception:
-            pass
-        try:
-            await browser.close()
-        except Exception:
-            pass
+    await browser_manager.release(context)
 
 
-# =============================================================================
-# Stealth Helpers
-# =============================================================================
+async def _close_entry(entry: Tuple[BrowserContext, Page, datetime]):
+    """Close page and context of a login session."""
+    context, page, _ = entry
+    await _dispose(context, page)
 
-STEALTH_SCRIPT = """
-Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-Object.defineProperty(navigator, 'languages', { get: () => ['pl-PL', 'pl', 'en-US', 'en'] });
-Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-window.chrome = { runtime: {}, loadTimes: function(){}, csi: function(){} };
-Object.defineProperty(navigator, 'maxTouchPoints', { get: () => 0 });
-delete navigator.__proto__.webdriver;
-"""
 
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/131.0.0.0 Safari/537.36"
+def _on_session_evicted(session_id: str, entry):
+    logger.info(f"[LinkedIn browser] Closing expired login session {session_id}")
+    return _close_entry(entry)
+
+
+# session_id -> (context, page, created_at); expired by the background sweeper
+_browser_sessions = TTLCache(
+    "linkedin_browser_sessions",
+    ttl_seconds=SESSION_TTL_MINUTES * 60,
+    max_size=MAX_CONCURRENT_SESSIONS,
+    on_evict=_on_session_evicted,
 )
 
+# Login starts in flight; each holds a session slot until it stores its session or ends
+_starting = 0
+
+
+async def _close_session(session_id: str):
+    """Close browser and remove session."""
+    entry = _browser_sessions.pop(session_id)
+    if entry:
+        await _close_entry(entry)
+
+
+def _idle_sessions() -> list[IdleContext]:
+    """Login sessions waiting for a 2FA code, for the browser memory budget."""
+    now = datetime.utcnow()
+    return [
+        IdleContext(
+            (now - created_at).total_seconds(),
+            f"login session {session_id}",
+            lambda session_id=session_id: _close_session(session_id),
+        )
+        for session_id, (_, _, created_at) in _browser_sessions.items()
+    ]
+
+
+browser_memory.register_source("linkedin_browser", idle=_idle_sessions, expire=_browser_sessions.sweep)
+
+
+async def close_all_sessions():
+    """Close every pending login session (app shutdown)."""
+    for session_id, _ in _browser_sessions.items():
+        await _close_session(session_id)
+
 
-async def _create_stealth_browser() -> Tuple[Browser, BrowserContext, Page]:
-    """Launch Chromium with stealth configuration."""
-    pw = await async_playwright().start()
-    browser = await pw.chromium.launch(
-        headless=True,
-        args=["--disable-blink-features=AutomationControlled"],
-    )
-    context = await browser.new_context(
-        user_agent=USER_AGENT,
-        viewport={"width": 1920, "height": 1080},
-        locale="en-US",
-        timezone_id="Europe/Warsaw",
-    )
-    page = await context.new_page()
-    await page.add_init_script(STEALTH_SCRIPT)
-    return browser, context, page
+def get_stats() -> dict:
+    """Login session metrics for /metrics."""
+    return {
+        "sessions": _browser_sessions.stats(),
+    }
 
 
 # =============================================================================
@@ -220,16 +228,13 @@ async def _extract_cookies(context: BrowserContext) -> Tuple[Optional[str], Opti
 
 
 async def _get_profile_name(li_at: str, jsessionid: Optional[str] = None) -> Optional[str]:
-    """Get profile name using linkedin-api with the li_at cookie."""
+    """Get profile name from the Voyager API using the li_at cookie."""
     try:
-        from linkedin_api import Linkedin
         auth_cookies = {"li_at": li_at}
         if jsessionid:
             auth_cookies["JSESSIONID"] = jsessionid
-        api = await asyncio.to_thread(
-            Linkedin, "", "", cookies=auth_cookies
-        )
-        profile = await asyncio.to_thread(api.get_user_profile)
+        api = VoyagerClient(auth_cookies)
+        profile = await api.get_user_profile()
         first = profile.get("firstName", "")
         last = profile.get("lastName", "")
         name = f"{first} {last}".strip()
@@ -238,13 +243,259 @@ async def _get_profile_name(li_at: str, jsessionid: Optional[str] = None) -> Opt
         return None
 
 
-async def _take_screenshot_b64(page: Page) -> Optional[str]:
-    """Take a screenshot and return as base64 string."""
+# =============================================================================
+# Debug Screenshots
+# =============================================================================
+
+# Downscaled JPEG/WebP kept in memory for a few minutes and served by
+# GET /browser-login/{session_id}/screenshot instead of inlined base64
+SCREENSHOT_FORMAT = os.getenv("LINKEDIN_SCREENSHOT_FORMAT", "jpeg")  # jpeg or webp
+SCREENSHOT_QUALITY = int(os.getenv("LINKEDIN_SCREENSHOT_QUALITY", "60"))
+SCREENSHOT_SCALE = float(os.getenv("LINKEDIN_SCREENSHOT_SCALE", "0.5"))
+SCREENSHOT_TTL_SECONDS = int(os.getenv("LINKEDIN_SCREENSHOT_TTL", "300"))
+SCREENSHOT_MAX_ENTRIES = 100
+
+# session_id -> (image bytes, media type)
+_screenshots = TTLCache(
+    "linkedin_login_screenshots",
+    ttl_seconds=SCREENSHOT_TTL_SECONDS,
+    max_size=SCREENSHOT_MAX_ENTRIES,
+)
+
+
+async def _capture_screenshot(page: Page) -> Tuple[bytes, str]:
+    """Viewport screenshot, downscaled by the browser via CDP (plain JPEG as fallback)."""
+    try:
+        viewport = page.viewport_size or {"width": 1920, "height": 1080}
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            result = await cdp.send("Page.captureScreenshot", {
+                "format": SCREENSHOT_FORMAT,
+                "quality": SCREENSHOT_QUALITY,
+                "clip": {
+                    "x": 0,
+                    "y": 0,
+                    "width": viewport["width"],
+                    "height": viewport["height"],
+                    "scale": SCREENSHOT_SCALE,
+                },
+            })
+        finally:
+            await cdp.detach()
+        return base64.b64decode(result["data"]), f"image/{SCREENSHOT_FORMAT}"
+    except Exception as e:
+        logger.debug(f"[LinkedIn browser] CDP screenshot failed, using page.screenshot: {e}")
+        return await page.screenshot(type="jpeg", quality=SCREENSHOT_QUALITY), "image/jpeg"
+
+
+async def _store_screenshot(page: Page, session_id: str) -> Optional[str]:
+    """Capture the page for debugging; returns the URL it is served from."""
     try:
-        screenshot_bytes = await page.screenshot(type="png")
-        return base64.b64encode(screenshot_bytes).decode("utf-8")
+        _screenshots.put(session_id, await _capture_screenshot(page))
     except Exception:
         return None
+    return f"/linkedin/browser-login/{session_id}/screenshot"
+
+
+# =============================================================================
+# Navigation Waits
+# =============================================================================
+
+LOGIN_URL = "https://www.linkedin.com/login"
+NAVIGATION_TIMEOUT_MS = 15000
+FORM_TIMEOUT_MS = 10000
+CONSENT_TIMEOUT_MS = 3000
+
+USERNAME_SELECTOR = "input#username"
+CONSENT_LABELS = ["Reject", "Odrzuć", "Accept", "Akceptuj"]
+CONSENT_SELECTOR = ", ".join(f'button:text-is("{label}")' for label in CONSENT_LABELS)
+
+# URLs LinkedIn redirects to after the login form is submitted
+LOGIN_OUTCOME_URL_MARKERS = ("/feed", "/mynetwork", "/checkpoint", "/challenge", "captcha", "security-verification")
+# Inline errors rendered on the login form / verification page without navigating
+LOGIN_ERROR_SELECTOR = "#error-for-username, #error-for-password, .form__label--error"
+VERIFY_ERROR_SELECTOR = "#error-for-pin, .form__label--error, .body__banner--error"
+
+
+async def _wait_for_outcome(page: Page, url_matches, error_selector: str,
+                            timeout_ms: int = NAVIGATION_TIMEOUT_MS) -> str:
+    """
+    Race the outcomes of a form submit: a redirect matching url_matches or an
+    inline error appearing. Returns "navigated", "error" or "timeout" as soon as
+    the first one happens (or the deadline passes).
+    """
+    waiters = {
+        asyncio.create_task(page.wait_for_url(url_matches, timeout=timeout_ms)): "navigated",
+        asyncio.create_task(page.wait_for_selector(error_selector, state="visible", timeout=timeout_ms)): "error",
+    }
+    outcome = "timeout"
+    pending = set(waiters)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                outcome = waiters[succeeded[0]]
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if outcome == "navigated":
+        # Checkpoint pages are classified from their content
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=CONSENT_TIMEOUT_MS)
+        except Exception:
+            pass
+    return outcome
+
+
+def _is_login_outcome_url(url: str) -> bool:
+    url = url.lower()
+    return any(marker in url for marker in LOGIN_OUTCOME_URL_MARKERS)
+
+
+def _left_checkpoint(url: str) -> bool:
+    url = url.lower()
+    return "/checkpoint" not in url and "/challenge" not in url
+
+
+async def _wait_visible(page: Page, selector: str, timeout_ms: int) -> bool:
+    try:
+        await page.wait_for_selector(selector, state="visible", timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+
+# =============================================================================
+# 2FA Input Discovery
+# =============================================================================
+
+CODE_INPUT_ATTR = "data-newsroom-code-input"
+CODE_SUBMIT_ATTR = "data-newsroom-code-submit"
+CODE_INPUT_TIMEOUT_MS = 8000
+
+# Runs inside the page: ranks visible inputs as verification-code candidates,
+# marks the winner (or one input per digit for OTP layouts) and the submit
+# button with data attributes, and returns a summary - or null while nothing
+# usable is rendered yet, so it doubles as a wait_for_function predicate.
+# With minScore set, a lone weak candidate (e.g. a search box rendered before
+# the challenge form) also returns null so the wait keeps polling.
+CODE_INPUT_MIN_SCORE = 40
+FIND_CODE_INPUT_SCRIPT = """
+({ codeLength, minScore }) => {
+    const INPUT = '%(input)s', SUBMIT = '%(submit)s';
+    document.querySelectorAll('[' + INPUT + '], [' + SUBMIT + ']').forEach(el => {
+        el.removeAttribute(INPUT);
+        el.removeAttribute(SUBMIT);
+    });
+    const SKIP_TYPES = ['hidden', 'submit', 'checkbox', 'radio', 'button', 'password', 'email', 'file'];
+    const SKIP_NAMES = ['email', 'password', 'username', 'search', 'q', 'session_key', 'session_password'];
+    const visible = el => {
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    const inputs = Array.from(document.querySelectorAll('input'))
+        .filter(el => !SKIP_TYPES.includes(el.type) && !el.disabled && !el.readOnly && visible(el));
+
+    const score = el => {
+        const id = (el.id || '').toLowerCase();
+        const name = (el.name || '').toLowerCase();
+        const label = (el.getAttribute('aria-label') || '').toLowerCase();
+        if (SKIP_NAMES.includes(name) || SKIP_NAMES.includes(id)) return -1;
+        let s = 0;
+        if (id === 'input__email_verification_pin' || id === 'input__phone_verification_pin') s += 100;
+        if (name === 'pin' || name === 'verificationcode') s += 80;
+        if ((el.autocomplete || '').toLowerCase() === 'one-time-code') s += 70;
+        if (id.includes('verification') && id.includes('pin')) s += 60;
+        else if (id.includes('verification') || id.includes('pin')) s += 40;
+        if (/verification|code|pin/.test(label)) s += 30;
+        if (el.type === 'tel' || el.type === 'number' || el.inputMode === 'numeric') s += 10;
+        if (el.closest('form')) s += 5;
+        return s;
+    };
+    const ranked = inputs.map(el => ({ el, s: score(el) })).filter(c => c.s >= 0).sort((a, b) => b.s - a.s);
+    const digits = inputs.filter(el => el.maxLength === 1 || el.matches('[data-test="digit-input"], input.otp-input'));
+
+    let result = null;
+    let form = null;
+    if (codeLength > 1 && digits.length >= codeLength && !(ranked.length && ranked[0].s >= 60)) {
+        digits.slice(0, codeLength).forEach((el, i) => el.setAttribute(INPUT, String(i)));
+        form = digits[0].closest('form');
+        result = { mode: 'digits', count: codeLength, score: 0, id: digits[0].id, name: digits[0].name };
+    } else if (ranked.length && ranked[0].s >= minScore) {
+        const best = ranked[0];
+        best.el.setAttribute(INPUT, '0');
+        form = best.el.closest('form');
+        result = { mode: 'single', count: 1, score: best.s, id: best.el.id, name: best.el.name };
+    }
+    if (!result) return null;
+
+    const buttons = Array.from((form || document).querySelectorAll('button, input[type="submit"]')).filter(visible);
+    const submit = buttons.find(b => b.id === 'two-step-submit-button')
+        || buttons.find(b => b.type === 'submit')
+        || buttons.find(b => b.classList.contains('btn__primary--large'))
+        || (form ? buttons[0] : null);
+    if (submit) submit.setAttribute(SUBMIT, '1');
+    result.submit = !!submit;
+    result.candidates = ranked.length;
+    return result;
+}
+""" % {"input": CODE_INPUT_ATTR, "submit": CODE_SUBMIT_ATTR}
+
+# Debug summary of every input on the page (only used when discovery fails)
+DESCRIBE_INPUTS_SCRIPT = """
+() => ({
+    forms: document.forms.length,
+    inputs: Array.from(document.querySelectorAll('input')).map(el => ({
+        type: el.type, id: el.id, name: el.name,
+        className: el.className.substring(0, 80),
+        placeholder: el.placeholder,
+        visible: el.offsetParent !== null,
+        maxLength: el.maxLength,
+        inputMode: el.inputMode
+    }))
+})
+"""
+
+
+async def _find_code_input(page: Page, code_length: int) -> Optional[dict]:
+    """Wait (in-page) for a verification-code input and mark it; None if none appears in time."""
+    try:
+        # Only resolve early on a confident match (strong score or digit layout)
+        handle = await page.wait_for_function(
+            FIND_CODE_INPUT_SCRIPT,
+            arg={"codeLength": code_length, "minScore": CODE_INPUT_MIN_SCORE},
+            timeout=CODE_INPUT_TIMEOUT_MS,
+        )
+        return await handle.json_value()
+    except Exception:
+        # Timed out (or navigated) - one last pass accepting the best candidate
+        try:
+            return await page.evaluate(
+                FIND_CODE_INPUT_SCRIPT, {"codeLength": code_length, "minScore": 0}
+            )
+        except Exception:
+            return None
+
+
+class _PhaseTimer:
+    """Per-phase wall-clock durations for a flow, in milliseconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: dict[str, int] = {}
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = int((now - self._last) * 1000)
+        self._last = now
+
+    def result(self) -> dict[str, int]:
+        return {**self.phases, "total": int((time.perf_counter() - self.started) * 1000)}
 
 
 # =============================================================================
@@ -254,146 +505,149 @@ async def _take_screenshot_b64(page: Page) -> Optional[str]:
 @router.post("/browser-login/start", response_model=BrowserLoginStartResponse)
 async def browser_login_start(request: BrowserLoginStartRequest):
     """Start browser-based LinkedIn login. Handles 2FA detection."""
-    await _cleanup_expired()
+    global _starting
+    _browser_sessions.sweep()
+    if len(_browser_sessions) + _starting >= MAX_CONCURRENT_SESSIONS:
+        # A slot frees up when the oldest pending 2FA session expires (or a start in flight ends)
+        oldest = max((idle.idle_seconds for idle in _idle_sessions()), default=0.0)
+        retry_after = SESSION_TTL_MINUTES * 60 - oldest
+        if _starting:
+            retry_after = min(retry_after, NAVIGATION_TIMEOUT_MS / 1000)
+        raise too_many_requests(retry_after, "Too many active browser sessions. Try again later.")
+
+    # Reserve the slot before the first await, so concurrent starts can't all pass the
+    # check above and then LRU-evict another user's pending 2FA session on put()
+    _starting += 1
+    try:
+        return await _start_login(request)
+    finally:
+        _starting -= 1
 
-    if len(_browser_sessions) >= MAX_CONCURRENT_SESSIONS:
-        return BrowserLoginStartResponse(
-            success=False,
-            state="failed",
-            error="Too many active browser sessions. Try again later.",
-        )
 
-    async with _semaphore:
-        browser = None
-        try:
-            browser, context, page = await _create_stealth_browser()
-
-            # Navigate to LinkedIn login
-            await page.goto("https://www.linkedin.com/login", wait_until="networkidle", timeout=15000)
-
-            # Dismiss cookie consent dialog if present
-            for consent_label in ["Reject", "Odrzuć", "Accept", "Akceptuj"]:
-                try:
-                    btn = page.get_by_role("button", name=consent_label, exact=True)
-                    if await btn.count() > 0:
-                        await btn.first.click(timeout=3000)
-                        await page.wait_for_load_state("networkidle", timeout=5000)
-                        break
-                except Exception:
-                    continue
-
-            # Debug: check if login form is visible
-            username_input = await page.query_selector('input#username')
-            if not username_input:
-                # Maybe cookie consent still showing - take screenshot for debug
-                screenshot = await _take_screenshot_b64(page)
-                # Try force-clicking via JS on any visible button
-                await page.evaluate("""() => {
-                    const btns = Array.from(document.querySelectorAll('button'));
-                    const reject = btns.find(b => /reject|odrzuć/i.test(b.textContent));
-                    const accept = btns.find(b => /accept|akceptuj/i.test(b.textContent));
-                    (reject || accept)?.click();
-                }""")
-                await asyncio.sleep(2)
-                # Check again
-                username_input = await page.query_selector('input#username')
-                if not username_input:
-                    await page.close()
-                    await context.close()
-                    await browser.close()
-                    return BrowserLoginStartResponse(
-                        success=False,
-                        state="failed",
-                        screenshot=screenshot,
-                        error="Login form not found - cookie consent may be blocking",
-                    )
-
-            # Fill credentials with human-like typing delays
-            username_input = await page.query_selector('input#username')
-            await username_input.type(request.email, delay=50)
-            await asyncio.sleep(random.uniform(0.4, 0.8))
-
-            password_input = await page.query_selector('input#password')
-            await password_input.type(request.password, delay=30)
-            await asyncio.sleep(random.uniform(0.5, 1.5))
-
-            # Click sign in
-            await page.click('button[type="submit"]')
-
-            # Wait for navigation
-            try:
-                await page.wait_for_load_state("networkidle", timeout=15000)
-            except Exception:
-                # Timeout is ok - page might still be loading
-                await asyncio.sleep(2)
-
-            # Detect state
-            state, error_msg = await _detect_state(page)
+async def _start_login(request: BrowserLoginStartRequest) -> BrowserLoginStartResponse:
+    """Login flow of browser_login_start, run while holding a reserved session slot."""
+    if not await browser_memory.ensure_headroom():
+        raise too_many_requests(
+            browser_memory.REAPER_INTERVAL_SECONDS, "Browser memory limit reached. Try again later."
+        )
 
-            if state == "success":
-                li_at, jsessionid = await _extract_cookies(context)
-                profile_name = await _get_profile_name(li_at, jsessionid) if li_at else None
+    # Identifies the flow: 2FA session and debug screenshot share it
+    session_id = str(uuid.uuid4())
 
-                # Close browser - no longer needed
-                await page.close()
-                await context.close()
-                await browser.close()
+    context = None
+    try:
+        context = await browser_manager.acquire("stealth")
+        page = await context.new_page()
 
-                return BrowserLoginStartResponse(
-                    success=True,
-                    state="success",
-                    li_at=li_at,
-                    jsessionid=jsessionid,
-                    profile_name=profile_name,
-                )
+        # Navigate to LinkedIn login; continue once the form or a consent banner renders
+        await page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+        try:
+            await page.wait_for_selector(
+                f"{USERNAME_SELECTOR}, {CONSENT_SELECTOR}", state="visible", timeout=FORM_TIMEOUT_MS
+            )
+        except Exception:
+            pass
 
-            if state.startswith("2fa"):
-                # Keep session alive for verify step
-                session_id = str(uuid.uuid4())
-                _browser_sessions[session_id] = (browser, context, page, datetime.utcnow())
+        # Dismiss cookie consent dialog if present
+        for consent_label in CONSENT_LABELS:
+            try:
+                btn = page.get_by_role("button", name=consent_label, exact=True)
+                if await btn.count() > 0:
+                    await btn.first.click(timeout=CONSENT_TIMEOUT_MS)
+                    await btn.first.wait_for(state="hidden", timeout=CONSENT_TIMEOUT_MS)
+                    break
+            except Exception:
+                continue
 
+        # Check if login form is visible
+        if not await _wait_visible(page, USERNAME_SELECTOR, CONSENT_TIMEOUT_MS):
+            # Maybe cookie consent still showing - take screenshot for debug
+            screenshot_url = await _store_screenshot(page, session_id)
+            # Try force-clicking via JS on any visible button
+            await page.evaluate("""() => {
+                const btns = Array.from(document.querySelectorAll('button'));
+                const reject = btns.find(b => /reject|odrzuć/i.test(b.textContent));
+                const accept = btns.find(b => /accept|akceptuj/i.test(b.textContent));
+                (reject || accept)?.click();
+            }""")
+            # Check again
+            if not await _wait_visible(page, USERNAME_SELECTOR, CONSENT_TIMEOUT_MS):
+                await _dispose(context, page)
                 return BrowserLoginStartResponse(
                     success=False,
                     session_id=session_id,
-                    state=state,
+                    state="failed",
+                    screenshot_url=screenshot_url,
+                    error="Login form not found - cookie consent may be blocking",
                 )
 
-            if state == "captcha":
-                screenshot = await _take_screenshot_b64(page)
-                await page.close()
-                await context.close()
-                await browser.close()
+        # Fill credentials
+        await page.fill(USERNAME_SELECTOR, request.email)
+        await page.fill("input#password", request.password)
 
-                return BrowserLoginStartResponse(
-                    success=False,
-                    state="captcha",
-                    screenshot=screenshot,
-                    error="LinkedIn is showing a CAPTCHA.",
-                )
+        # Click sign in and wait for a redirect (feed, checkpoint, captcha) or an inline error
+        await page.click('button[type="submit"]')
+        outcome = await _wait_for_outcome(page, _is_login_outcome_url, LOGIN_ERROR_SELECTOR)
+        print(f"[LinkedIn browser] Login submit outcome: {outcome}, url: {page.url}")
 
-            # Failed
-            await page.close()
-            await context.close()
-            await browser.close()
+        # Detect state
+        state, error_msg = await _detect_state(page)
+
+        if state == "success":
+            li_at, jsessionid = await _extract_cookies(context)
+            profile_name = await _get_profile_name(li_at, jsessionid) if li_at else None
+
+            # Release context - no longer needed
+            await _dispose(context, page)
+
+            return BrowserLoginStartResponse(
+                success=True,
+                state="success",
+                li_at=li_at,
+                jsessionid=jsessionid,
+                profile_name=profile_name,
+            )
+
+        if state.startswith("2fa"):
+            # Keep session alive for verify step
+            _browser_sessions.put(session_id, (context, page, datetime.utcnow()))
 
             return BrowserLoginStartResponse(
                 success=False,
-                state="failed",
-                error=error_msg or "Login failed",
+                session_id=session_id,
+                state=state,
             )
 
-        except Exception as e:
-            if browser:
-                try:
-                    await browser.close()
-                except Exception:
-                    pass
+        if state == "captcha":
+            screenshot_url = await _store_screenshot(page, session_id)
+            await _dispose(context, page)
+
             return BrowserLoginStartResponse(
                 success=False,
-                state="failed",
-                error=str(e),
+                session_id=session_id,
+                state="captcha",
+                screenshot_url=screenshot_url,
+                error="LinkedIn is showing a CAPTCHA.",
             )
 
+        # Failed
+        await _dispose(context, page)
+
+        return BrowserLoginStartResponse(
+            success=False,
+            state="failed",
+            error=error_msg or "Login failed",
+        )
+
+    except Exception as e:
+        if context:
+            await _dispose(context)
+        return BrowserLoginStartResponse(
+            success=False,
+            state="failed",
+            error=str(e),
+        )
+
 
 @router.post("/browser-login/verify", response_model=BrowserLoginVerifyResponse)
 async def browser_login_verify(request: BrowserLoginVerifyRequest):
@@ -406,155 +660,40 @@ async def browser_login_verify(request: BrowserLoginVerifyRequest):
             error="Session not found or expired",
         )
 
-    browser, context, page, created_at = entry
-
-    # Check TTL
-    if datetime.utcnow() - created_at > timedelta(minutes=SESSION_TTL_MINUTES):
-        await _close_session(request.session_id)
-        return BrowserLoginVerifyResponse(
-            success=False,
-            state="failed",
-            error="Session expired",
-        )
+    context, page, created_at = entry
+    timer = _PhaseTimer()
 
     try:
         print(f"[LinkedIn 2FA] Verify called. Page URL: {page.url}, closed: {page.is_closed()}")
 
         # Re-detect state - page may have changed since login start
         current_state, _ = await _detect_state(page)
+        timer.mark("detect_state")
         if current_state == "captcha":
-            screenshot = await _take_screenshot_b64(page)
+            screenshot_url = await _store_screenshot(page, request.session_id)
             await _close_session(request.session_id)
             return BrowserLoginVerifyResponse(
                 success=False,
                 state="captcha",
-                screenshot=screenshot,
+                screenshot_url=screenshot_url,
                 error="Page changed to CAPTCHA. Please retry login.",
+                timings_ms=timer.result(),
             )
 
-        # Wait for the verification page to fully render before looking for inputs
-        await asyncio.sleep(1)
-
-        # Find and fill the verification code input (try multiple selectors)
-        code_selectors = [
-            'input#input__email_verification_pin',
-            'input#input__phone_verification_pin',
-            'input[name="pin"]',
-            'input[name="verificationCode"]',
-            'input[id*="verification"][id*="pin"]',
-            'input[id*="verification"]',
-            'input[id*="pin"]',
-            'input[aria-label*="verification" i]',
-            'input[aria-label*="code" i]',
-            'input[aria-label*="pin" i]',
-            'input[type="tel"]',
-            'input[type="number"]',
-            'input[type="text"]',
-        ]
-
-        filled = False
-
-        # First try waiting for any of the specific selectors to appear
-        combined_selector = ", ".join(code_selectors[:6])
-        try:
-            await page.wait_for_selector(combined_selector, timeout=8000)
-        except Exception:
-            # Timeout — page may still have a generic input, continue checking
-            pass
+        # Find the verification code input(s) and submit button in one in-page pass
+        found = await _find_code_input(page, len(request.code))
+        timer.mark("find_input")
+        print(f"[LinkedIn 2FA] Code input: {found}")
 
-        for selector in code_selectors:
-            try:
-                el = await page.query_selector(selector)
-                if el:
-                    vis = await el.is_visible()
-                    print(f"[LinkedIn 2FA] Selector '{selector}': found, visible={vis}")
-                    if vis:
-                        await el.fill(request.code)
-                        filled = True
-                        break
-            except Exception as e:
-                print(f"[LinkedIn 2FA] Selector '{selector}': error {e}")
-                continue
-
-        if not filled:
-            # Last resort: look for any visible input inside a form
-            try:
-                el = await page.query_selector('form input:not([type="hidden"]):not([type="submit"])')
-                if el and await el.is_visible():
-                    await el.fill(request.code)
-                    filled = True
-            except Exception:
-                pass
-
-        if not filled:
-            # OTP-style: LinkedIn may use multiple single-digit inputs (one per digit)
-            try:
-                otp_selectors = [
-                    'input[data-test="digit-input"]',
-                    'input.otp-input',
-                    'input[inputmode="numeric"]',
-                    'input[maxlength="1"]',
-                    'input[autocomplete="one-time-code"]',
-                ]
-                for otp_sel in otp_selectors:
-                    otp_inputs = await page.query_selector_all(otp_sel)
-                    visible_inputs = []
-                    for inp in otp_inputs:
-                        if await inp.is_visible():
-                            visible_inputs.append(inp)
-                    if len(visible_inputs) >= len(request.code):
-                        for i, digit in enumerate(request.code):
-                            await visible_inputs[i].fill(digit)
-                        filled = True
-                        break
-            except Exception:
-                pass
-
-        if not filled:
-            # Final fallback: find ALL visible non-hidden inputs and try filling the first one
-            try:
-                all_inputs = await page.query_selector_all('input:not([type="hidden"]):not([type="submit"]):not([type="checkbox"]):not([type="radio"])')
-                for inp in all_inputs:
-                    if await inp.is_visible():
-                        inp_type = await inp.get_attribute("type") or "text"
-                        inp_id = await inp.get_attribute("id") or ""
-                        inp_name = await inp.get_attribute("name") or ""
-                        inp_placeholder = await inp.get_attribute("placeholder") or ""
-                        logger.info(f"[LinkedIn 2FA] Visible input: type={inp_type} id={inp_id} name={inp_name} placeholder={inp_placeholder}")
-                        # Skip obvious non-verification inputs
-                        skip_names = {"email", "password", "username", "search", "q"}
-                        if inp_name.lower() in skip_names or inp_id.lower() in skip_names:
-                            continue
-                        await inp.fill(request.code)
-                        filled = True
-                        break
-            except Exception as e:
-                logger.error(f"[LinkedIn 2FA] Final fallback error: {e}")
-
-        if not filled:
-            screenshot = await _take_screenshot_b64(page)
+        if not found:
+            screenshot_url = await _store_screenshot(page, request.session_id)
             input_count = -1
             form_count = -1
-            # Log page content for debugging
             try:
-                page_html = await page.content()
-                input_count = page_html.lower().count("<input")
-                form_count = page_html.lower().count("<form")
-            except Exception as e:
-                print(f"[LinkedIn 2FA] page.content() failed: {e}")
-
-            try:
-                all_inputs_debug = await page.evaluate("""
-                    () => Array.from(document.querySelectorAll('input')).map(el => ({
-                        type: el.type, id: el.id, name: el.name,
-                        className: el.className.substring(0, 80),
-                        placeholder: el.placeholder,
-                        visible: el.offsetParent !== null,
-                        maxLength: el.maxLength,
-                        inputMode: el.inputMode
-                    }))
-                """)
-                print(f"[LinkedIn 2FA] All inputs on page: {all_inputs_debug}")
+                described = await page.evaluate(DESCRIBE_INPUTS_SCRIPT)
+                input_count = len(described["inputs"])
+                form_count = described["forms"]
+                print(f"[LinkedIn 2FA] All inputs on page: {described['inputs']}")
             except Exception as e:
                 print(f"[LinkedIn 2FA] page.evaluate() failed: {e}")
 
@@ -563,37 +702,36 @@ async def browser_login_verify(request: BrowserLoginVerifyRequest):
             return BrowserLoginVerifyResponse(
                 success=False,
                 state="failed",
-                screenshot=screenshot,
+                screenshot_url=screenshot_url,
                 error=f"Could not find verification code input (page has {input_count} inputs, {form_count} forms, url: {page.url})",
+                timings_ms=timer.result(),
             )
 
-        await asyncio.sleep(0.5)
-
-        # Click submit button (try multiple selectors)
-        submit_selectors = [
-            'button[type="submit"]',
-            'button#two-step-submit-button',
-            'button.btn__primary--large',
-            'form button',
-        ]
+        if found["mode"] == "digits":
+            for i, digit in enumerate(request.code):
+                await page.fill(f'[{CODE_INPUT_ATTR}="{i}"]', digit)
+        else:
+            await page.fill(f'[{CODE_INPUT_ATTR}="0"]', request.code)
+        timer.mark("fill")
 
-        for selector in submit_selectors:
-            try:
-                btn = await page.query_selector(selector)
-                if btn and await btn.is_visible():
-                    await btn.click()
-                    break
-            except Exception:
-                continue
-
-        # Wait for navigation
+        # Click the submit button marked by the discovery script (Enter as fallback)
         try:
-            await page.wait_for_load_state("networkidle", timeout=15000)
-        except Exception:
-            await asyncio.sleep(2)
+            if found.get("submit"):
+                await page.click(f'[{CODE_SUBMIT_ATTR}="1"]', timeout=3000)
+            else:
+                await page.press(f'[{CODE_INPUT_ATTR}="{found["count"] - 1}"]', "Enter")
+        except Exception as e:
+            print(f"[LinkedIn 2FA] Submit failed: {e}")
+        timer.mark("submit")
+
+        # Wait for the redirect off the checkpoint or an inline "wrong code" error
+        outcome = await _wait_for_outcome(page, _left_checkpoint, VERIFY_ERROR_SELECTOR)
+        print(f"[LinkedIn 2FA] Submit outcome: {outcome}, url: {page.url}")
+        timer.mark("navigation")
 
         # Detect state
         state, error_msg = await _detect_state(page)
+        timer.mark("final_state")
 
         if state == "success":
             li_at, jsessionid = await _extract_cookies(context)
@@ -601,6 +739,8 @@ async def browser_login_verify(request: BrowserLoginVerifyRequest):
 
             # Close session
             await _close_session(request.session_id)
+            timings = timer.result()
+            print(f"[LinkedIn 2FA] Verified in {timings}")
 
             return BrowserLoginVerifyResponse(
                 success=True,
@@ -608,15 +748,19 @@ async def browser_login_verify(request: BrowserLoginVerifyRequest):
                 li_at=li_at,
                 jsessionid=jsessionid,
                 profile_name=profile_name,
+                timings_ms=timings,
             )
 
         # Still on 2FA or failed
-        screenshot = await _take_screenshot_b64(page) if state == "failed" else None
+        screenshot_url = await _store_screenshot(page, request.session_id) if state == "failed" else None
+        timings = timer.result()
+        print(f"[LinkedIn 2FA] Verify ended in state {state} after {timings}")
         return BrowserLoginVerifyResponse(
             success=False,
             state=state,
-            screenshot=screenshot,
+            screenshot_url=screenshot_url,
             error=error_msg,
+            timings_ms=timings,
         )
 
     except Exception as e:
@@ -625,9 +769,20 @@ async def browser_login_verify(request: BrowserLoginVerifyRequest):
             success=False,
             state="failed",
             error=str(e),
+            timings_ms=timer.result(),
         )
 
 
+@router.get("/browser-login/{session_id}/screenshot")
+async def browser_login_screenshot(session_id: str):
+    """Debug screenshot of a failed/captcha login step (kept for a few minutes)."""
+    entry = _screenshots.get(session_id, touch=False)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Screenshot not found or expired")
+    image, media_type = entry
+    return Response(content=image, media_type=media_type, headers={"Cache-Control": "no-store"})
+
+
 @router.post("/browser-login/close", response_model=BrowserLoginCloseResponse)
 async def browser_login_close(request: BrowserLoginCloseRequest):
     """Close a browser login session."""
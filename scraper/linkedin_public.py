@@ -1,44 +1,54 @@
 """
 LinkedIn Public Profile Scraper
 Scrapes public LinkedIn profiles for posts without authentication.
-Uses Playwright with stealth config (no login required).
+Uses a stealth context from the shared browser manager (no login required).
 """
 
 import asyncio
 import hashlib
 import logging
+import os
 import re
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Tuple
 
 from bs4 import BeautifulSoup
 from fastapi import APIRouter
-from playwright.async_api import async_playwright
 from pydantic import BaseModel
 
+import browser_memory
+from browser_manager import browser_manager
+from browser_state import DomainState
+from rate_limiter import RateLimiter, RateLimitExceeded
+from scheduler import LANE_BULK, scheduler, too_many_requests
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Rate limiting: track last request time per profile
-_last_request_time: dict[str, float] = {}
-RATE_LIMIT_SECONDS = 5
-
-# Reuse stealth config from linkedin_browser.py
-STEALTH_SCRIPT = """
-Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-Object.defineProperty(navigator, 'languages', { get: () => ['pl-PL', 'pl', 'en-US', 'en'] });
-Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-window.chrome = { runtime: {}, loadTimes: function(){}, csi: function(){} };
-Object.defineProperty(navigator, 'maxTouchPoints', { get: () => 0 });
-delete navigator.__proto__.webdriver;
-"""
+# Rate limiting: one token bucket for all traffic to linkedin.com, one per profile.
+# 999/429 responses put the host bucket into exponential backoff.
+LINKEDIN_HOST = "www.linkedin.com"
+RATE_LIMIT_SECONDS = 5  # min interval per profile
+HOST_RATE_PER_MINUTE = float(os.getenv("LINKEDIN_PUBLIC_RATE_PER_MINUTE", "12"))
+HOST_BURST = 3
+MAX_QUEUE_WAIT_SECONDS = 60
+
+_host_limiter = RateLimiter(rate=HOST_RATE_PER_MINUTE / 60, burst=HOST_BURST, max_keys=16)
+_profile_limiter = RateLimiter(rate=1 / RATE_LIMIT_SECONDS, burst=1, max_keys=1000)
 
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/131.0.0.0 Safari/537.36"
-)
+# Profile result cache (stale-while-revalidate)
+# Fresh entries are served as-is; stale entries are served immediately while a
+# background task re-scrapes the profile; entries past the stale window are dropped.
+PUBLIC_CACHE_TTL_SECONDS = int(os.getenv("LINKEDIN_PUBLIC_CACHE_TTL", "21600"))  # 6h
+PUBLIC_CACHE_STALE_SECONDS = int(os.getenv("LINKEDIN_PUBLIC_CACHE_STALE", "259200"))  # 3 days
+PUBLIC_CACHE_MAX_ENTRIES = 500
+
+# public_id -> (response, max_posts, fetched_at), kept in LRU order
+_profile_cache: "OrderedDict[str, Tuple[PublicProfileResponse, int, float]]" = OrderedDict()
+# public_id -> in-flight background refresh
+_refresh_tasks: dict[str, asyncio.Task] = {}
 
 
 # =============================================================================
@@ -63,16 +73,80 @@ class PublicProfileResponse(BaseModel):
     success: bool
     posts: list[PublicPost] = []
     profile_name: Optional[str] = None
+    cached: bool = False
+    cache_age_seconds: Optional[int] = None
     error: Optional[str] = None
 
 
+# =============================================================================
+# Profile Cache
+# =============================================================================
+
+def _cache_get(public_id: str, max_posts: int) -> Optional[Tuple[PublicProfileResponse, float]]:
+    """Return (response, age_seconds) if a usable cache entry exists."""
+    entry = _profile_cache.get(public_id)
+    if not entry:
+        return None
+    response, cached_max_posts, fetched_at = entry
+    age = time.time() - fetched_at
+    if age > PUBLIC_CACHE_STALE_SECONDS:
+        _profile_cache.pop(public_id, None)
+        return None
+    # A smaller earlier scrape can't answer a request for more posts
+    if max_posts > cached_max_posts and len(response.posts) >= cached_max_posts:
+        return None
+    _profile_cache.move_to_end(public_id)
+    return response, age
+
+
+def _cache_put(public_id: str, max_posts: int, response: PublicProfileResponse):
+    """Store a successful scrape, evicting least recently used entries."""
+    _profile_cache[public_id] = (response, max_posts, time.time())
+    _profile_cache.move_to_end(public_id)
+    while len(_profile_cache) > PUBLIC_CACHE_MAX_ENTRIES:
+        _profile_cache.popitem(last=False)
+
+
+def _schedule_refresh(public_id: str, max_posts: int):
+    """Re-scrape a stale profile in the background (one task per profile)."""
+    if public_id in _refresh_tasks:
+        return
+    entry = _profile_cache.get(public_id)
+    if entry:
+        max_posts = max(max_posts, entry[1])
+
+    async def _refresh():
+        try:
+            # Outside any request, so it takes a bulk slot and yields to interactive work
+            async with scheduler.slot(LANE_BULK):
+                response = await _scrape_public_profile(public_id, max_posts)
+            if response.success:
+                _cache_put(public_id, max_posts, response)
+        except Exception as e:
+            logger.warning(f"[LINKEDIN-PUBLIC] Background refresh failed for {public_id}: {e}")
+        finally:
+            _refresh_tasks.pop(public_id, None)
+
+    _refresh_tasks[public_id] = asyncio.create_task(_refresh())
+
+
+def get_stats() -> dict:
+    """Rate limiter and cache metrics for /metrics."""
+    return {
+        "cache_entries": len(_profile_cache),
+        "refreshing": len(_refresh_tasks),
+        "host_limiter": _host_limiter.stats(detail_prefix=""),
+        "profile_limiter": _profile_limiter.stats(),
+    }
+
+
 # =============================================================================
 # Endpoint
 # =============================================================================
 
 @router.post("/public-posts", response_model=PublicProfileResponse)
 async def linkedin_public_posts(request: PublicProfileRequest):
-    """Scrape public LinkedIn profile for posts (no auth required)."""
+    """Scrape public LinkedIn profile for posts (no auth required). Served from cache when possible."""
     public_id = request.public_id.strip().strip("/")
 
     if not public_id or not re.match(r'^[a-zA-Z0-9_-]+$', public_id):
@@ -81,42 +155,68 @@ async def linkedin_public_posts(request: PublicProfileRequest):
             error="Nieprawidłowy identyfikator profilu"
         )
 
-    # Rate limiting
-    now = time.time()
-    last_time = _last_request_time.get(public_id, 0)
-    if now - last_time < RATE_LIMIT_SECONDS:
-        wait = RATE_LIMIT_SECONDS - (now - last_time)
-        await asyncio.sleep(wait)
-    _last_request_time[public_id] = time.time()
+    cached = _cache_get(public_id, request.max_posts)
+    if cached:
+        response, age = cached
+        if age > PUBLIC_CACHE_TTL_SECONDS:
+            _schedule_refresh(public_id, request.max_posts)
+        return response.model_copy(update={
+            "posts": response.posts[:request.max_posts],
+            "cached": True,
+            "cache_age_seconds": int(age),
+        })
+
+    response = await _scrape_public_profile(public_id, request.max_posts)
+    if response.success:
+        _cache_put(public_id, request.max_posts, response)
+    return response
+
+
+async def _scrape_public_profile(public_id: str, max_posts: int) -> PublicProfileResponse:
+    """Launch a browser and scrape the public profile page."""
+    # Rate limiting (queues behind other callers; gives up if the queue is too long)
+    try:
+        await _profile_limiter.acquire(public_id, max_wait=MAX_QUEUE_WAIT_SECONDS)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e.retry_after, f"LinkedIn rate limit - spróbuj ponownie za {int(e.retry_after)} s.")
+    try:
+        waited = await _host_limiter.acquire(LINKEDIN_HOST, max_wait=MAX_QUEUE_WAIT_SECONDS)
+    except RateLimitExceeded as e:
+        # The profile wasn't scraped, so don't charge its budget
+        _profile_limiter.refund(public_id)
+        raise too_many_requests(e.retry_after, f"LinkedIn rate limit - spróbuj ponownie za {int(e.retry_after)} s.")
+    if waited > 1:
+        logger.info(f"[LINKEDIN-PUBLIC] Waited {waited:.1f}s for rate limit ({public_id})")
+
+    if not await browser_memory.ensure_headroom():
+        # Nothing was fetched, so the next attempt shouldn't wait on these tokens
+        _profile_limiter.refund(public_id)
+        _host_limiter.refund(LINKEDIN_HOST)
+        raise too_many_requests(
+            browser_memory.REAPER_INTERVAL_SECONDS, "Serwer jest przeciążony - spróbuj ponownie za chwilę."
+        )
 
-    browser = None
+    context = None
     try:
         url = f"https://www.linkedin.com/in/{public_id}/"
         logger.info(f"[LINKEDIN-PUBLIC] Scraping profile: {url}")
 
-        pw = await async_playwright().start()
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        context = await browser.new_context(
-            user_agent=USER_AGENT,
-            viewport={"width": 1920, "height": 1080},
-            locale="en-US",
-            timezone_id="Europe/Warsaw",
-        )
+        # Stealth context on a warm shared browser; only the HTML is needed
+        context = await browser_manager.acquire("blocked_resources")
         page = await context.new_page()
-        await page.add_init_script(STEALTH_SCRIPT)
+        domain_state = await DomainState.load(url)
+        await domain_state.apply(page, context)
 
         # Navigate with domcontentloaded (NOT networkidle — LinkedIn never reaches it)
         response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
 
-        if response and response.status == 999:
-            await browser.close()
+        if response and response.status in (999, 429):
+            _host_limiter.report_blocked(LINKEDIN_HOST)
             return PublicProfileResponse(
                 success=False,
-                error="LinkedIn zablokował żądanie (status 999). Spróbuj ponownie później."
+                error=f"LinkedIn zablokował żądanie (status {response.status}). Spróbuj ponownie później."
             )
+        _host_limiter.report_success(LINKEDIN_HOST)
 
         # Wait for content to render
         await page.wait_for_timeout(3000)
@@ -127,8 +227,9 @@ async def linkedin_public_posts(request: PublicProfileRequest):
             await page.wait_for_timeout(1000)
 
         html = await page.content()
-        await browser.close()
-        browser = None
+        await domain_state.capture(context)
+        await browser_manager.release(context)
+        context = None
 
         # Parse HTML
         soup = BeautifulSoup(html, 'html.parser')
@@ -137,9 +238,11 @@ async def linkedin_public_posts(request: PublicProfileRequest):
         profile_name = _extract_profile_name(soup)
 
         # Extract posts
-        posts = _extract_posts(soup, public_id, request.max_posts)
+        posts = _extract_posts(soup, public_id, max_posts)
 
         logger.info(f"[LINKEDIN-PUBLIC] Found {len(posts)} posts for {public_id}")
+        if posts:
+            await domain_state.save()
 
         return PublicProfileResponse(
             success=True,
@@ -154,11 +257,8 @@ async def linkedin_public_posts(request: PublicProfileRequest):
             error=str(e),
         )
     finally:
-        if browser:
-            try:
-                await browser.close()
-            except Exception:
-                pass
+        if context:
+            await browser_manager.release(context)
 
 
 # =============================================================================
@@ -1,62 +1,181 @@
 """
 LinkedIn Connector Service
-FastAPI router for LinkedIn Voyager API integration via linkedin-api library.
-Session cache in memory with TTL.
+FastAPI router for LinkedIn Voyager API integration.
+Password login goes through the linkedin-api library; all Voyager calls use the
+native async client in voyager_client.py.
+Session cache in memory with TTL, backed by the persistent session store.
 """
 
 import asyncio
+import base64
 import hashlib
-import random
+import json
+import os
+import re
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from rate_limiter import RateLimiter, RateLimitExceeded
+from scheduler import too_many_requests
+from seen_filter import SeenFilter, resolve_seen_filter
+from session_store import session_store
+from ttl_cache import TTLCache
+from urn_cache import urn_cache
+from voyager_client import MAX_REPEATED_REQUESTS, VoyagerClient
+
 router = APIRouter()
 
 # =============================================================================
-# Session Cache (in-memory, TTL 60min, max 100 sessions)
+# Session Cache (in-memory LRU, sliding TTL 60min, max age 12h, max 5000 sessions)
 # =============================================================================
 
 SESSION_TTL_MINUTES = 60
-MAX_SESSIONS = 100
+MAX_SESSIONS = 5000
+# Absolute lifetime: past it a session answers 410 however active it is
+SESSION_MAX_AGE = timedelta(hours=12)
+
+SESSION_NAMESPACE = "linkedin"
+# Persisted expiry is extended at most this often per session
+STORE_TOUCH_INTERVAL = timedelta(minutes=SESSION_TTL_MINUTES / 4)
+
+# Batch profile fetching: per-session concurrency
+PROFILE_BATCH_CONCURRENCY = 3
+PROFILE_BATCH_MAX_IDS = 100
+
+# Per-account governor on outbound Voyager calls (token bucket + jitter, backs off on 429/999)
+ACCOUNT_RATE_PER_MINUTE = 30
+ACCOUNT_BURST = 5
+ACCOUNT_JITTER_SECONDS = 1.5
+# Interactive calls give up (429) rather than queue behind a long backoff
+GOVERNOR_MAX_WAIT_SECONDS = 30
+
+# Pagination: full pages for first loads, small pages when only new posts are expected
+MAX_PAGE_SIZE = 100
+INCREMENTAL_PAGE_SIZE = 10
+
+# (session_id, "feed" | "profile:<public_id>") -> SeenFilter of post IDs already returned
+_seen_filters = TTLCache("linkedin_seen_filters", ttl_seconds=SESSION_TTL_MINUTES * 60, max_size=MAX_SESSIONS * 4)
+
+# session_id -> Semaphore limiting concurrent profile fetches
+_session_semaphores: Dict[str, asyncio.Semaphore] = {}
+_account_governor = RateLimiter(
+    rate=ACCOUNT_RATE_PER_MINUTE / 60,
+    burst=ACCOUNT_BURST,
+    max_keys=MAX_SESSIONS * 2,
+    jitter=ACCOUNT_JITTER_SECONDS,
+)
+
+
+def _on_session_evicted(session_id: str, _entry):
+    _session_semaphores.pop(session_id, None)
+
+
+# session_id -> (VoyagerClient, last store touch, created_at, persisted client state);
+# rehydrated from session_store on miss
+_sessions = TTLCache(
+    "linkedin_sessions",
+    ttl_seconds=SESSION_TTL_MINUTES * 60,
+    max_size=MAX_SESSIONS,
+    on_evict=_on_session_evicted,
+)
+
+
+def _store_ttl_seconds(created: datetime) -> float:
+    """Persisted expiry: the sliding TTL, capped by what is left of the max age."""
+    remaining = (SESSION_MAX_AGE - (datetime.utcnow() - created)).total_seconds()
+    return max(1.0, min(SESSION_TTL_MINUTES * 60, remaining))
+
+
+async def _save_session(session_id: str, api: VoyagerClient):
+    """Cache the client locally and persist its cookie state for other workers/restarts."""
+    api.use_limiter(_account_governor, session_id, max_wait=GOVERNOR_MAX_WAIT_SECONDS)
+    created = datetime.utcnow()
+    client_state = api.to_state()
+    _sessions.put(session_id, (api, created, created, client_state))
+    await asyncio.to_thread(
+        session_store.save,
+        SESSION_NAMESPACE, session_id,
+        {"client": client_state, "created_at": created.isoformat()},
+        ttl_seconds=_store_ttl_seconds(created),
+    )
 
-# session_id -> (Linkedin instance, created_at)
-_sessions: Dict[str, Tuple[object, datetime]] = {}
 
+async def _load_session(session_id: str) -> Optional[tuple]:
+    """Rehydrate a session persisted by another worker or before a restart."""
+    state = await asyncio.to_thread(session_store.load, SESSION_NAMESPACE, session_id)
+    if not state:
+        return None
+    api = VoyagerClient.from_state(state["client"])
+    api.use_limiter(_account_governor, session_id, max_wait=GOVERNOR_MAX_WAIT_SECONDS)
+    # Rows persisted before created_at was stored count from now
+    created = datetime.fromisoformat(state["created_at"]) if state.get("created_at") else datetime.utcnow()
+    entry = (api, datetime.utcnow(), created, state["client"])
+    _sessions.put(session_id, entry)
+    return entry
 
-def _cleanup_sessions():
-    """Remove expired sessions."""
-    now = datetime.utcnow()
-    expired = [
-        sid for sid, (_, created) in _sessions.items()
-        if now - created > timedelta(minutes=SESSION_TTL_MINUTES)
-    ]
-    for sid in expired:
-        _sessions.pop(sid, None)
-
-    # Evict oldest if over limit
-    if len(_sessions) > MAX_SESSIONS:
-        sorted_sessions = sorted(_sessions.items(), key=lambda x: x[1][1])
-        for sid, _ in sorted_sessions[:len(_sessions) - MAX_SESSIONS]:
-            _sessions.pop(sid, None)
-
-
-def _get_session(session_id: str):
-    """Get LinkedIn session by ID, or raise 404."""
-    _cleanup_sessions()
-    entry = _sessions.get(session_id)
-    if not entry:
+
+def _forget_session(session_id: str):
+    _sessions.pop(session_id)
+    _session_semaphores.pop(session_id, None)
+
+
+async def _drop_session(session_id: str):
+    _forget_session(session_id)
+    await asyncio.to_thread(session_store.delete, SESSION_NAMESPACE, session_id)
+
+
+async def _get_session(session_id: str) -> VoyagerClient:
+    """Get LinkedIn session by ID (sliding TTL, absolute max age), or raise 404/410."""
+    entry = _sessions.get(session_id) or await _load_session(session_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Session not found or expired")
-    api, created = entry
-    if datetime.utcnow() - created > timedelta(minutes=SESSION_TTL_MINUTES):
-        _sessions.pop(session_id, None)
+
+    api, store_touched, created, persisted = entry
+    now = datetime.utcnow()
+    if now - created > SESSION_MAX_AGE:
+        await _drop_session(session_id)
         raise HTTPException(status_code=410, detail="Session expired")
+    # LinkedIn rotates cookies (JSESSIONID, lidc...) - persist them so a rehydrated client has the current ones
+    client_state = api.to_state()
+    rotated = client_state != persisted
+    if rotated or now - store_touched > STORE_TOUCH_INTERVAL:
+        found = await asyncio.to_thread(
+            session_store.touch, SESSION_NAMESPACE, session_id,
+            ttl_seconds=_store_ttl_seconds(created),
+            state={"client": client_state, "created_at": created.isoformat()} if rotated else None,
+        )
+        if not found:
+            # Disconnected on another worker (or expired in the store)
+            _forget_session(session_id)
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+        _sessions.put(session_id, (api, now, created, client_state))
     return api
 
 
+def _account_rate_limited(error: RateLimitExceeded):
+    return too_many_requests(error.retry_after, "LinkedIn rate limit for this account, try again later")
+
+
+# =============================================================================
+# Search Cache (keywords -> profiles, per session or shared)
+# =============================================================================
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("LINKEDIN_SEARCH_CACHE_TTL", "900"))
+SEARCH_CACHE_MAX_ENTRIES = 2000
+# Share results between sessions (only public profile fields are cached anyway)
+SEARCH_CACHE_SHARED = os.getenv("LINKEDIN_SEARCH_CACHE_SHARED", "").lower() in ("1", "true", "yes")
+
+# (scope, normalized keywords) -> (requested limit, exhausted, [LinkedInProfileInfo]);
+# exhausted: LinkedIn returned fewer raw results than the limit, so a larger limit adds nothing
+_search_cache = TTLCache("linkedin_search", ttl_seconds=SEARCH_CACHE_TTL_SECONDS, max_size=SEARCH_CACHE_MAX_ENTRIES)
+_search_stats = {"exact_hits": 0, "misses": 0}
+
+
 # =============================================================================
 # Pydantic Models
 # =============================================================================
@@ -80,6 +199,11 @@ class LinkedInFetchRequest(BaseModel):
     max_posts: int = 30
     hashtags: Optional[list[str]] = None
     include_reposts: bool = False
+    since_activity_id: Optional[str] = None  # stop at posts we already have
+    since: Optional[str] = None  # ISO timestamp; stop at older posts
+    cursor: Optional[str] = None  # next_cursor of a previous response
+    skip_seen: bool = False  # skip posts this session already returned
+    seen_filter: Optional[str] = None  # seen_filter token of a previous response (implies skip_seen)
 
 
 class LinkedInPost(BaseModel):
@@ -95,6 +219,9 @@ class LinkedInFetchResponse(BaseModel):
     success: bool
     posts: list[LinkedInPost] = []
     fetched_count: int = 0
+    next_cursor: Optional[str] = None
+    seen_filter: Optional[str] = None
+    seen_skipped: int = 0
     error: Optional[str] = None
 
 
@@ -115,6 +242,7 @@ class SearchProfilesRequest(BaseModel):
 class SearchProfilesResponse(BaseModel):
     success: bool
     profiles: list[LinkedInProfileInfo] = []
+    cached: bool = False
     error: Optional[str] = None
 
 
@@ -122,12 +250,40 @@ class ProfilePostsRequest(BaseModel):
     session_id: str
     public_id: str
     max_posts: int = 10
+    since_activity_id: Optional[str] = None
+    since: Optional[str] = None
+    cursor: Optional[str] = None
+    skip_seen: bool = False
+    seen_filter: Optional[str] = None
 
 
 class ProfilePostsResponse(BaseModel):
     success: bool
     posts: list[LinkedInPost] = []
     fetched_count: int = 0
+    next_cursor: Optional[str] = None
+    seen_filter: Optional[str] = None
+    seen_skipped: int = 0
+    error: Optional[str] = None
+
+
+class ProfilePostsBatchRequest(BaseModel):
+    session_id: str
+    public_ids: list[str]
+    max_posts: int = 10
+    since: Optional[str] = None
+    since_activity_ids: Optional[dict[str, str]] = None  # public_id -> last seen activity ID
+    skip_seen: bool = False  # skip posts this session already returned per profile
+
+
+class ProfilePostsBatchItem(BaseModel):
+    public_id: str
+    success: bool
+    posts: list[LinkedInPost] = []
+    fetched_count: int = 0
+    next_cursor: Optional[str] = None
+    seen_filter: Optional[str] = None
+    seen_skipped: int = 0
     error: Optional[str] = None
 
 
@@ -157,27 +313,23 @@ class LinkedInDisconnectResponse(BaseModel):
 async def linkedin_auth(request: LinkedInAuthRequest):
     """Authenticate with LinkedIn via email/password or li_at cookie."""
     try:
-        from linkedin_api import Linkedin
-
         api = None
         profile_name = None
 
         if request.li_at_cookie:
-            # Cookie-based auth (for 2FA users)
-            # linkedin-api 2.3+ requires RequestsCookieJar, not dict
-            import requests.cookies
-            cookie_jar = requests.cookies.RequestsCookieJar()
-            cookie_jar.set("li_at", request.li_at_cookie, domain=".linkedin.com", path="/")
+            # Cookie-based auth (for 2FA users) - no login round trip needed
+            cookies = {"li_at": request.li_at_cookie}
             if request.jsessionid:
-                cookie_jar.set("JSESSIONID", request.jsessionid, domain=".linkedin.com", path="/")
-            api = await asyncio.to_thread(
-                Linkedin, "", "", cookies=cookie_jar
-            )
+                cookies["JSESSIONID"] = request.jsessionid
+            api = VoyagerClient(cookies)
         elif request.email and request.password:
-            # Login/password auth
-            api = await asyncio.to_thread(
+            # Login/password auth (linkedin-api handles the login challenge flow)
+            from linkedin_api import Linkedin
+
+            linkedin = await asyncio.to_thread(
                 Linkedin, request.email, request.password
             )
+            api = VoyagerClient.from_linkedin_api(linkedin)
         else:
             return LinkedInAuthResponse(
                 success=False,
@@ -186,7 +338,7 @@ async def linkedin_auth(request: LinkedInAuthRequest):
 
         # Get profile name to verify auth worked
         try:
-            profile = await asyncio.to_thread(api.get_user_profile)
+            profile = await api.get_user_profile()
             first = profile.get("firstName", "")
             last = profile.get("lastName", "")
             profile_name = f"{first} {last}".strip() or request.email or "LinkedIn User"
@@ -195,8 +347,7 @@ async def linkedin_auth(request: LinkedInAuthRequest):
 
         # Cache session
         session_id = str(uuid.uuid4())
-        _cleanup_sessions()
-        _sessions[session_id] = (api, datetime.utcnow())
+        await _save_session(session_id, api)
 
         return LinkedInAuthResponse(
             success=True,
@@ -220,37 +371,39 @@ async def linkedin_auth(request: LinkedInAuthRequest):
 async def linkedin_fetch_posts(request: LinkedInFetchRequest):
     """Fetch posts from LinkedIn feed."""
     try:
-        api = _get_session(request.session_id)
-
-        # Human-like delay before fetching
-        await asyncio.sleep(random.uniform(1.0, 3.0))
+        api = await _get_session(request.session_id)
+        seen = _resolve_seen(request.session_id, "feed", request.skip_seen, request.seen_filter)
 
-        # Fetch feed posts
-        raw_posts = await asyncio.to_thread(
-            api.get_feed_posts, limit=request.max_posts
-        )
+        # Fetch feed posts (page by page, stopping at already-seen posts)
+        boundary = _SinceBoundary(request.since_activity_id, request.since)
+        raw_posts, next_cursor = await _fetch_feed_posts(api, request.max_posts, boundary, request.cursor)
 
+        hashtag_pattern = _hashtag_pattern(request.hashtags)
         posts = []
+        skipped = 0
         for post_data in raw_posts:
             try:
-                post = _parse_feed_post(post_data, request)
-                if post:
+                post = _parse_feed_post(post_data, request.include_reposts, hashtag_pattern, seen)
+                if post is _SEEN:
+                    skipped += 1
+                elif post:
                     posts.append(post)
             except Exception:
                 continue
 
-            # Human-like delay between processing
-            if len(posts) % 10 == 0 and len(posts) > 0:
-                await asyncio.sleep(random.uniform(0.5, 1.5))
-
         return LinkedInFetchResponse(
             success=True,
             posts=posts,
             fetched_count=len(posts),
+            next_cursor=next_cursor,
+            seen_filter=_remember_seen(request.session_id, "feed", seen, posts),
+            seen_skipped=skipped,
         )
 
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise _account_rate_limited(e)
     except Exception as e:
         return LinkedInFetchResponse(success=False, error=str(e))
 
@@ -259,9 +412,9 @@ async def linkedin_fetch_posts(request: LinkedInFetchRequest):
 async def linkedin_test(request: LinkedInTestRequest):
     """Test LinkedIn connection."""
     try:
-        api = _get_session(request.session_id)
+        api = await _get_session(request.session_id)
 
-        profile = await asyncio.to_thread(api.get_user_profile)
+        profile = await api.get_user_profile()
         first = profile.get("firstName", "")
         last = profile.get("lastName", "")
         profile_name = f"{first} {last}".strip() or "LinkedIn User"
@@ -270,6 +423,8 @@ async def linkedin_test(request: LinkedInTestRequest):
 
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise _account_rate_limited(e)
     except Exception as e:
         return LinkedInTestResponse(success=False, error=str(e))
 
@@ -278,13 +433,13 @@ async def linkedin_test(request: LinkedInTestRequest):
 async def linkedin_search_profiles(request: SearchProfilesRequest):
     """Search for LinkedIn profiles by keywords."""
     try:
-        api = _get_session(request.session_id)
+        api = await _get_session(request.session_id)
 
-        await asyncio.sleep(random.uniform(1.0, 3.0))
+        cached = _search_cache_lookup(request.session_id, request.keywords, request.limit)
+        if cached is not None:
+            return SearchProfilesResponse(success=True, profiles=cached, cached=True)
 
-        raw_results = await asyncio.to_thread(
-            api.search_people, keywords=request.keywords, limit=request.limit
-        )
+        raw_results = await api.search_people(keywords=request.keywords, limit=request.limit)
 
         profiles = []
         for person in raw_results or []:
@@ -309,10 +464,14 @@ async def linkedin_search_profiles(request: SearchProfilesRequest):
             except Exception:
                 continue
 
+        exhausted = len(raw_results or []) < request.limit
+        _search_cache_store(request.session_id, request.keywords, request.limit, exhausted, profiles)
         return SearchProfilesResponse(success=True, profiles=profiles)
 
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise _account_rate_limited(e)
     except Exception as e:
         return SearchProfilesResponse(success=False, error=str(e))
 
@@ -321,15 +480,16 @@ async def linkedin_search_profiles(request: SearchProfilesRequest):
 async def linkedin_profile_posts(request: ProfilePostsRequest):
     """Fetch posts from a specific LinkedIn profile."""
     try:
-        api = _get_session(request.session_id)
-
-        await asyncio.sleep(random.uniform(2.0, 5.0))
+        api = await _get_session(request.session_id)
+        scope = _profile_seen_scope(request.public_id)
+        seen = _resolve_seen(request.session_id, scope, request.skip_seen, request.seen_filter)
 
         print(f"[LINKEDIN] Fetching profile posts for: {request.public_id}, max_posts={request.max_posts}")
 
         try:
-            raw_posts = await asyncio.to_thread(
-                _fetch_profile_posts, api, request.public_id, request.max_posts
+            boundary = _SinceBoundary(request.since_activity_id, request.since)
+            raw_posts, next_cursor = await _fetch_profile_posts(
+                api, request.public_id, request.max_posts, boundary, request.cursor
             )
         except Exception as fetch_err:
             print(f"[LINKEDIN] fetch_profile_posts failed: {type(fetch_err).__name__}: {fetch_err}")
@@ -337,65 +497,128 @@ async def linkedin_profile_posts(request: ProfilePostsRequest):
 
         print(f"[LINKEDIN] Raw posts returned: {len(raw_posts) if raw_posts else 0}")
 
-        posts = []
-        for i, post_data in enumerate(raw_posts or []):
-            try:
-                post = _parse_post(post_data, author_name=None)
-                if post:
-                    posts.append(post)
-                else:
-                    print(f"[LINKEDIN] Post {i} parsed to None (content too short or missing)")
-            except Exception as parse_err:
-                print(f"[LINKEDIN] Post {i} parse error: {parse_err}")
-                continue
+        posts, skipped = _parse_profile_posts(raw_posts, seen)
 
         return ProfilePostsResponse(
             success=True,
             posts=posts,
             fetched_count=len(posts),
+            next_cursor=next_cursor,
+            seen_filter=_remember_seen(request.session_id, scope, seen, posts),
+            seen_skipped=skipped,
         )
 
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise _account_rate_limited(e)
     except Exception as e:
         return ProfilePostsResponse(success=False, error=str(e))
 
 
+@router.post("/profile-posts/batch")
+async def linkedin_profile_posts_batch(request: ProfilePostsBatchRequest):
+    """
+    Fetch posts from many LinkedIn profiles over one session.
+    Profiles are fetched concurrently (bounded per session) and streamed back as
+    NDJSON, one ProfilePostsBatchItem per line, in completion order.
+    """
+    api = await _get_session(request.session_id)
+
+    public_ids = list(dict.fromkeys(pid.strip().strip("/") for pid in request.public_ids if pid.strip()))
+    if len(public_ids) > PROFILE_BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {PROFILE_BATCH_MAX_IDS} profiles per batch")
+
+    async def stream():
+        tasks = [
+            asyncio.create_task(_fetch_profile_batch_item(
+                api, request.session_id, pid, request.max_posts,
+                _SinceBoundary((request.since_activity_ids or {}).get(pid), request.since),
+                request.skip_seen,
+            ))
+            for pid in public_ids
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/disconnect", response_model=LinkedInDisconnectResponse)
 async def linkedin_disconnect(request: LinkedInDisconnectRequest):
-    """Remove LinkedIn session from cache."""
-    _sessions.pop(request.session_id, None)
+    """Remove LinkedIn session from cache and session store."""
+    await _drop_session(request.session_id)
     return LinkedInDisconnectResponse(success=True)
 
 
+def get_stats() -> dict:
+    """Session and cache metrics for /metrics."""
+    return {
+        "sessions": _sessions.stats(),
+        "urn_cache": urn_cache.stats(),
+        "seen_filters": _seen_filters.stats(),
+        "search_cache": {**_search_cache.stats(), **_search_stats, "shared": SEARCH_CACHE_SHARED},
+        "account_governor": _account_governor.stats(),
+    }
+
+
 # =============================================================================
 # Helpers
 # =============================================================================
 
-def _fetch_profile_posts(api, public_id: str, max_posts: int) -> list:
+def _search_key(session_id: str, keywords: str) -> tuple[str, str]:
+    scope = "*" if SEARCH_CACHE_SHARED else session_id
+    return scope, " ".join(keywords.lower().split())
+
+
+def _search_cache_store(session_id: str, keywords: str, limit: int, exhausted: bool,
+                        profiles: list[LinkedInProfileInfo]):
+    key = _search_key(session_id, keywords)
+    if key[1]:
+        _search_cache.put(key, (limit, exhausted, profiles))
+
+
+def _search_cache_lookup(session_id: str, keywords: str, limit: int) -> Optional[list[LinkedInProfileInfo]]:
     """
-    Fetch posts for a LinkedIn profile by public_id.
-    Uses get_profile to resolve the real URN, then queries profileUpdatesV2.
-    This avoids the KeyError bug in linkedin-api's get_profile_posts.
+    Serve a search from an earlier one with the same keywords and an equal or
+    larger limit (or one LinkedIn had already run out of results for).
+    Longer queries are not derived from shorter ones: LinkedIn also matches on
+    location, company and other fields the cached profiles don't carry.
     """
+    scope, query = _search_key(session_id, keywords)
+    if not query:
+        return None
+
+    entry = _search_cache.get((scope, query))
+    if entry is not None:
+        cached_limit, exhausted, profiles = entry
+        if cached_limit >= limit or exhausted:
+            _search_stats["exact_hits"] += 1
+            return profiles[:limit]
+
+    _search_stats["misses"] += 1
+    return None
+
+
+async def _resolve_profile_urn(api: VoyagerClient, public_id: str) -> Optional[str]:
+    """Resolve public_id -> fsd_profile URN via /identity/dash/profiles (no cache)."""
     import json as _json
 
-    # Step 1: Resolve public_id -> profile URN via get_profile
-    # We call the raw API to avoid the buggy get_profile error handling
-    res = api._fetch(
-        f"/identity/dash/profiles?q=memberIdentity&memberIdentity={public_id}"
-        f"&decorationId=com.linkedin.voyager.dash.deco.identity.profile.WebTopCardCore-19"
-    )
-    profile_data = res.json()
+    profile_data = await api.get_profile(public_id)
 
     if not isinstance(profile_data, dict) or "elements" not in profile_data:
         print(f"[LINKEDIN] Profile lookup failed for {public_id}: {_json.dumps(profile_data)[:300]}")
-        return []
+        return None
 
     elements = profile_data.get("elements", [])
     if not elements:
         print(f"[LINKEDIN] No profile elements for {public_id}")
-        return []
+        return None
 
     # Extract entityUrn from profile (format: urn:li:fsd_profile:ACoAAxxxxxxx)
     profile_urn = elements[0].get("entityUrn", "") or elements[0].get("objectUrn", "")
@@ -418,186 +641,362 @@ def _fetch_profile_posts(api, public_id: str, max_posts: int) -> list:
             print(f"[LINKEDIN] Constructed fsd_profile URN from objectUrn: {profile_urn}")
         else:
             print(f"[LINKEDIN] Cannot resolve URN for {public_id}")
-            return []
-
-    # Step 2: Fetch posts using the resolved URN
-    url_params = {
-        "count": min(max_posts, 100),
-        "start": 0,
-        "q": "memberShareFeed",
-        "moduleKey": "member-shares:phone",
-        "includeLongTermHistory": True,
-        "profileUrn": profile_urn,
-    }
+            return None
 
-    res2 = api._fetch("/identity/profileUpdatesV2", params=url_params)
-    data2 = res2.json()
+    await asyncio.to_thread(urn_cache.put, public_id, profile_urn)
+    return profile_urn
 
-    print(f"[LINKEDIN] Posts API status={res2.status_code}, keys={list(data2.keys()) if isinstance(data2, dict) else type(data2)}")
 
-    if isinstance(data2, dict) and "elements" in data2:
-        posts = data2["elements"]
-        print(f"[LINKEDIN] Got {len(posts)} post elements for {public_id}")
-        return posts
+async def _fetch_profile_posts(api: VoyagerClient, public_id: str, max_posts: int,
+                              boundary: Optional["_SinceBoundary"] = None,
+                              cursor: Optional[str] = None) -> tuple[list, Optional[str]]:
+    """
+    Fetch posts for a LinkedIn profile by public_id.
+    Resolves the real URN (persistent cache first, then /identity/dash/profiles),
+    then pages through profileUpdatesV2 until max_posts or the since boundary.
+    This avoids the KeyError bug in linkedin-api's get_profile_posts.
+    Returns (raw posts, continuation cursor or None when exhausted).
+    """
+    boundary = boundary or _SinceBoundary()
+    start, pagination_token = _decode_cursor(cursor)
 
-    if isinstance(data2, dict) and "status" in data2:
-        print(f"[LINKEDIN] Posts API error: status={data2.get('status')}, msg={data2.get('message', 'N/A')}")
+    # Step 1: Resolve public_id -> profile URN
+    # SQLite-backed: first lookup loads the table, so keep it off the event loop
+    profile_urn = await asyncio.to_thread(urn_cache.get, public_id)
+    from_cache = bool(profile_urn)
+    if not profile_urn:
+        profile_urn = await _resolve_profile_urn(api, public_id)
+        if not profile_urn:
+            return [], None
+
+    # Step 2: Page through posts using the resolved URN
+    posts: list = []
+    for _ in range(MAX_REPEATED_REQUESTS):
+        if len(posts) >= max_posts:
+            break
+        page_size = min(max_posts - len(posts), INCREMENTAL_PAGE_SIZE if boundary else MAX_PAGE_SIZE)
+        data = await api.get_profile_updates(
+            profile_urn, count=page_size, start=start, pagination_token=pagination_token
+        )
 
-    return []
+        if not isinstance(data, dict) or "elements" not in data:
+            if isinstance(data, dict) and "status" in data:
+                print(f"[LINKEDIN] Posts API error: status={data.get('status')}, msg={data.get('message', 'N/A')}")
+                if from_cache:
+                    # Cached URN may be stale (e.g. account merged) - resolve again next time
+                    await asyncio.to_thread(urn_cache.invalidate, public_id)
+            return posts, None
 
+        elements = data["elements"]
+        start += len(elements)
+        pagination_token = (data.get("metadata") or {}).get("paginationToken") or pagination_token
+
+        # Pinned posts can be older than the boundary on any page: skip known posts
+        # and stop only once a whole page is known
+        new_elements = [el for el in elements if not boundary.is_seen(el)]
+        posts.extend(new_elements[:max_posts - len(posts)])
+
+        if (elements and not new_elements) or len(elements) < page_size:
+            # Reached already-seen posts or the end of the profile
+            print(f"[LINKEDIN] Got {len(posts)} new post elements for {public_id} (exhausted)")
+            return posts, None
+
+    print(f"[LINKEDIN] Got {len(posts)} post elements for {public_id}")
+    return posts, _encode_cursor(start, pagination_token)
 
-def _extract_activity_id(post_data: dict) -> str:
-    """Extract clean LinkedIn activity ID from post data URNs."""
-    import re
 
-    # Try multiple URN sources
-    for key in ["dashEntityUrn", "entityUrn", "urn", "updateUrn"]:
-        urn = post_data.get(key, "")
-        if not urn:
+async def _fetch_feed_posts(api: VoyagerClient, max_posts: int, boundary: "_SinceBoundary",
+                            cursor: Optional[str] = None) -> tuple[list, Optional[str]]:
+    """
+    Page through the home feed until max_posts, a page of only known posts or
+    MAX_REPEATED_REQUESTS pages. Returns (raw posts, cursor).
+    """
+    start, _ = _decode_cursor(cursor)
+    posts: list = []
+    for _ in range(MAX_REPEATED_REQUESTS):
+        if len(posts) >= max_posts:
+            break
+        page_size = min(max_posts - len(posts), INCREMENTAL_PAGE_SIZE if boundary else MAX_PAGE_SIZE)
+        page, consumed = await api.get_feed_page(page_size, start)
+        start += consumed
+
+        # Pinned or resurfaced posts older than the boundary can show up on any page:
+        # skip them, and stop only once a whole page is already known
+        new_posts = [post for post in page if not boundary.is_seen(post)]
+        posts.extend(new_posts[:max_posts - len(posts)])
+
+        if not consumed or (page and not new_posts):
+            return posts, None
+
+    return posts, _encode_cursor(start)
+
+
+class _SinceBoundary:
+    """Incremental-fetch boundary: posts at or before since_activity_id / since are already known."""
+
+    def __init__(self, since_activity_id: Optional[str] = None, since: Optional[str] = None):
+        self.activity_id = int(since_activity_id) if since_activity_id and since_activity_id.isdigit() else None
+        self.since = _parse_iso(since) if since else None
+
+    def __bool__(self) -> bool:
+        return self.activity_id is not None or self.since is not None
+
+    def is_seen(self, post_data: dict) -> bool:
+        if self.activity_id is not None:
+            # Feed posts parsed by linkedin-api only carry the activity URN in their url
+            activity_id = _extract_activity_id(post_data) or _extract_activity_id({"urn": post_data.get("url", "")})
+            if activity_id and int(activity_id) <= self.activity_id:
+                return True
+        if self.since is not None:
+            published_at = _extract_published_at(post_data)
+            published = _parse_iso(published_at) if published_at else None
+            if published and published <= self.since:
+                return True
+        return False
+
+
+def _parse_iso(value: str) -> Optional[datetime]:
+    """Parse an ISO timestamp into a naive UTC datetime."""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _encode_cursor(start: int, pagination_token: Optional[str] = None) -> str:
+    """Opaque continuation cursor returned to the caller."""
+    payload = json.dumps({"start": start, "token": pagination_token}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> tuple[int, Optional[str]]:
+    if not cursor:
+        return 0, None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(payload["start"]), payload.get("token")
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+async def _fetch_profile_batch_item(api: VoyagerClient, session_id: str, public_id: str, max_posts: int,
+                                    boundary: "_SinceBoundary", skip_seen: bool = False) -> ProfilePostsBatchItem:
+    """Fetch one profile of a batch within the session's concurrency limit (calls go through the governor)."""
+    semaphore = _session_semaphores.setdefault(session_id, asyncio.Semaphore(PROFILE_BATCH_CONCURRENCY))
+    try:
+        scope = _profile_seen_scope(public_id)
+        seen = _resolve_seen(session_id, scope, skip_seen, None)
+        async with semaphore:
+            raw_posts, next_cursor = await _fetch_profile_posts(api, public_id, max_posts, boundary)
+        posts, skipped = _parse_profile_posts(raw_posts, seen)
+        return ProfilePostsBatchItem(
+            public_id=public_id, success=True, posts=posts, fetched_count=len(posts), next_cursor=next_cursor,
+            seen_filter=_remember_seen(session_id, scope, seen, posts), seen_skipped=skipped,
+        )
+    except Exception as e:
+        print(f"[LINKEDIN] Batch fetch failed for {public_id}: {type(e).__name__}: {e}")
+        return ProfilePostsBatchItem(public_id=public_id, success=False, error=str(e))
+
+
+def _parse_profile_posts(raw_posts: Optional[list],
+                         seen: Optional[SeenFilter] = None) -> tuple[list[LinkedInPost], int]:
+    """Parse raw profileUpdatesV2 elements, skipping unparseable and already-seen ones."""
+    posts = []
+    skipped = 0
+    for i, post_data in enumerate(raw_posts or []):
+        try:
+            post = _parse_post(post_data, author_name=None, seen=seen)
+            if post is _SEEN:
+                skipped += 1
+            elif post:
+                posts.append(post)
+            else:
+                print(f"[LINKEDIN] Post {i} parsed to None (content too short or missing)")
+        except Exception as parse_err:
+            print(f"[LINKEDIN] Post {i} parse error: {parse_err}")
             continue
-        # Match activity ID pattern: a long numeric ID (typically 19-20 digits)
-        match = re.search(r"urn:li:(?:activity|ugcPost):(\d{15,25})", str(urn))
-        if match:
-            return match.group(1)
+    return posts, skipped
 
-    # Fallback: check socialDetail for URN
-    social_detail = post_data.get("socialDetail", {})
-    if isinstance(social_detail, dict):
-        for key in ["urn", "entityUrn", "dashEntityUrn"]:
-            urn = social_detail.get(key, "")
-            match = re.search(r"urn:li:(?:activity|ugcPost):(\d{15,25})", str(urn))
-            if match:
-                return match.group(1)
 
-    return ""
+def _profile_seen_scope(public_id: str) -> str:
+    return f"profile:{public_id.strip().strip('/').lower()}"
 
 
-def _extract_published_at(post_data: dict) -> Optional[str]:
-    """Extract published timestamp from LinkedIn post data. Checks multiple locations."""
-    # Direct timestamp fields
-    for key in ["createdAt", "publishedAt", "created_at", "published_at"]:
-        ts = post_data.get(key)
-        if ts:
-            try:
-                if isinstance(ts, (int, float)):
-                    return datetime.fromtimestamp(ts / 1000).isoformat()
-                return str(ts)
-            except Exception:
-                continue
+def _resolve_seen(session_id: str, scope: str, skip_seen: bool, token: Optional[str]) -> Optional[SeenFilter]:
+    """Seen filter for this request, or None when the caller didn't ask to skip seen posts."""
+    if not skip_seen and not token:
+        return None
+    return resolve_seen_filter(token, _seen_filters.get((session_id, scope)))
 
-    # Check inside updateMetadata
-    update_meta = post_data.get("updateMetadata", {})
-    if isinstance(update_meta, dict):
-        for key in ["updateCreatedTime", "createdAt", "publishedAt"]:
-            ts = update_meta.get(key)
-            if ts and isinstance(ts, (int, float)):
-                try:
-                    return datetime.fromtimestamp(ts / 1000).isoformat()
-                except Exception:
-                    continue
 
-    # Check inside socialDetail
-    social = post_data.get("socialDetail", {})
-    if isinstance(social, dict):
-        for key in ["createdTime", "createdAt"]:
-            ts = social.get(key)
-            if ts and isinstance(ts, (int, float)):
-                try:
-                    return datetime.fromtimestamp(ts / 1000).isoformat()
-                except Exception:
-                    continue
+def _remember_seen(session_id: str, scope: str, seen: Optional[SeenFilter],
+                   posts: list[LinkedInPost]) -> Optional[str]:
+    """Record returned post IDs; returns the token the caller can persist."""
+    if seen is None:
+        return None
+    seen.update(post.external_id for post in posts)
+    _seen_filters.put((session_id, scope), seen)
+    return seen.to_token()
 
-    return None
 
+_ACTIVITY_ID_RE = re.compile(r"urn:li:(?:activity|ugcPost):(\d{15,25})")
+_URN_KEYS = ("dashEntityUrn", "entityUrn", "urn", "updateUrn")
+_SOCIAL_URN_KEYS = ("urn", "entityUrn", "dashEntityUrn")
 
-def _parse_post(post_data: dict, author_name: Optional[str] = None) -> Optional[LinkedInPost]:
-    """Parse a raw LinkedIn post into our model. Works for both feed and profile posts."""
+# (container key or None for top level, timestamp fields, accept non-numeric values)
+_TIMESTAMP_SOURCES = (
+    (None, ("createdAt", "publishedAt", "created_at", "published_at"), True),
+    ("updateMetadata", ("updateCreatedTime", "createdAt", "publishedAt"), False),
+    ("socialDetail", ("createdTime", "createdAt"), False),
+)
+
+MIN_CONTENT_LENGTH = 10
+
+
+class _PostFields(NamedTuple):
+    """Fields extracted from a raw post in one pass, before any model is built."""
+    text: str
+    external_id: str
+    is_repost: bool
 
-    # Extract author from actor if not provided
-    if not author_name:
-        actor = post_data.get("actor", {})
-        if isinstance(actor, dict):
-            name_field = actor.get("name", {})
-            desc_field = actor.get("description", {})
-            author_name = (
-                (name_field.get("text", "") if isinstance(name_field, dict) else str(name_field or ""))
-                or (desc_field.get("text", "") if isinstance(desc_field, dict) else str(desc_field or ""))
-                or "Unknown"
-            )
-        else:
-            author_name = "Unknown"
 
-    commentary = post_data.get("commentary", {})
+# Returned by the parsers for posts the caller has already seen
+_SEEN = object()
+
+
+def _extract_text(post_data: dict) -> str:
+    """Post text from commentary (plain or {"text": ...}), falling back to text/content."""
+    commentary = post_data.get("commentary")
     if isinstance(commentary, dict):
-        text_field = commentary.get("text", "")
-        # text can be a nested dict with {"text": "...", "attributes": [...]}
-        if isinstance(text_field, dict):
-            content_text = text_field.get("text", "")
-        else:
-            content_text = str(text_field or "")
+        text = commentary.get("text") or ""
+        if isinstance(text, dict):
+            text = text.get("text") or ""
     else:
-        content_text = str(commentary or "")
+        text = commentary or ""
+    if not text:
+        text = post_data.get("text") or post_data.get("content") or ""
+        if isinstance(text, dict):
+            text = text.get("text") or ""
+    return text if isinstance(text, str) else str(text)
 
-    # Also check for 'content' or 'text' at top level
-    if not content_text:
-        content_text = post_data.get("text", "") or post_data.get("content", "")
-        if isinstance(content_text, dict):
-            content_text = content_text.get("text", "")
-        content_text = str(content_text or "")
 
-    if not content_text or len(content_text.strip()) < 10:
-        return None
+def _extract_activity_id(post_data: dict) -> str:
+    """Extract clean LinkedIn activity ID from post data URNs."""
+    for key in _URN_KEYS:
+        urn = post_data.get(key)
+        if urn:
+            match = _ACTIVITY_ID_RE.search(urn if isinstance(urn, str) else str(urn))
+            if match:
+                return match.group(1)
 
-    # Extract clean activity ID
-    activity_id = _extract_activity_id(post_data)
-    if activity_id:
-        external_id = activity_id
-    else:
-        external_id = hashlib.md5(content_text[:200].encode()).hexdigest()[:16]
+    # Fallback: check socialDetail for URN
+    social_detail = post_data.get("socialDetail")
+    if isinstance(social_detail, dict):
+        for key in _SOCIAL_URN_KEYS:
+            urn = social_detail.get(key)
+            if urn:
+                match = _ACTIVITY_ID_RE.search(urn if isinstance(urn, str) else str(urn))
+                if match:
+                    return match.group(1)
 
-    # Title: first line or first 120 chars
-    lines = content_text.strip().split("\n")
-    title = lines[0][:120] if lines else content_text[:120]
+    return ""
 
-    # Clean URL with just the activity ID
-    url = f"https://www.linkedin.com/feed/update/urn:li:activity:{external_id}"
 
-    # Published date
-    published_at = _extract_published_at(post_data)
+def _extract_published_at(post_data: dict) -> Optional[str]:
+    """Extract published timestamp from LinkedIn post data. Checks multiple locations."""
+    for container_key, keys, allow_text in _TIMESTAMP_SOURCES:
+        container = post_data if container_key is None else post_data.get(container_key)
+        if not isinstance(container, dict):
+            continue
+        for key in keys:
+            ts = container.get(key)
+            if not ts:
+                continue
+            if isinstance(ts, (int, float)):
+                try:
+                    return datetime.fromtimestamp(ts / 1000).isoformat()
+                except (OverflowError, OSError, ValueError):
+                    continue
+            if allow_text:
+                return str(ts)
+    return None
+
+
+def _extract_author(post_data: dict) -> str:
+    actor = post_data.get("actor")
+    if not isinstance(actor, dict):
+        return "Unknown"
+    name_field = actor.get("name", {})
+    desc_field = actor.get("description", {})
+    return (
+        (name_field.get("text", "") if isinstance(name_field, dict) else str(name_field or ""))
+        or (desc_field.get("text", "") if isinstance(desc_field, dict) else str(desc_field or ""))
+        or "Unknown"
+    )
+
 
-    return LinkedInPost(
+def _extract_post_fields(post_data: dict) -> Optional[_PostFields]:
+    """Single extraction pass; None when the post has no usable text."""
+    text = _extract_text(post_data)
+    if len(text) < MIN_CONTENT_LENGTH or len(text.strip()) < MIN_CONTENT_LENGTH:
+        return None
+    social = post_data.get("socialDetail")
+    is_repost = bool(post_data.get("resharedPost") or (isinstance(social, dict) and social.get("reshared")))
+    external_id = _extract_activity_id(post_data) or hashlib.md5(text[:200].encode()).hexdigest()[:16]
+    return _PostFields(text, external_id, is_repost)
+
+
+def _build_post(post_data: dict, fields: _PostFields, author_name: Optional[str] = None) -> LinkedInPost:
+    """Build the response model from extracted fields (trusted data, so no validation)."""
+    text = fields.text
+    external_id = fields.external_id
+    stripped = text.strip()
+    newline = stripped.find("\n")
+    title = (stripped if newline < 0 else stripped[:newline])[:120]
+    return LinkedInPost.model_construct(
         external_id=external_id,
         title=title,
-        content=content_text,
-        url=url,
-        author=author_name,
-        published_at=published_at,
+        content=text,
+        url=f"https://www.linkedin.com/feed/update/urn:li:activity:{external_id}",
+        author=author_name or _extract_author(post_data),
+        published_at=_extract_published_at(post_data),
     )
 
 
-def _parse_feed_post(post_data: dict, request: LinkedInFetchRequest) -> Optional[LinkedInPost]:
-    """Parse a raw LinkedIn feed post with feed-specific filtering (reposts, hashtags)."""
+def _parse_post(post_data: dict, author_name: Optional[str] = None, seen: Optional[SeenFilter] = None):
+    """
+    Parse a raw LinkedIn post into our model. Works for both feed and profile posts.
+    Returns None for unusable posts and _SEEN for posts already in `seen`.
+    """
+    fields = _extract_post_fields(post_data)
+    if fields is None:
+        return None
+    if seen is not None and fields.external_id in seen:
+        return _SEEN
+    return _build_post(post_data, fields, author_name)
+
 
-    # Check repost before full parsing
-    is_repost = bool(post_data.get("resharedPost") or post_data.get("socialDetail", {}).get("reshared"))
-    if is_repost and not request.include_reposts:
+def _hashtag_pattern(hashtags: Optional[list[str]]) -> Optional[re.Pattern]:
+    """One case-insensitive alternation over all requested hashtags, built once per request."""
+    if not hashtags:
         return None
+    tags = sorted({f"#{tag.lower().lstrip('#')}" for tag in hashtags}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(tag) for tag in tags), re.IGNORECASE)
 
-    # Hashtag filtering requires content extraction first
-    if request.hashtags:
-        commentary = post_data.get("commentary", {})
-        content_text = commentary.get("text", "") if isinstance(commentary, dict) else str(commentary or "")
-        if not content_text:
-            content_text = post_data.get("text", "") or post_data.get("content", "")
-            if isinstance(content_text, dict):
-                content_text = content_text.get("text", "")
-        if content_text:
-            content_lower = content_text.lower()
-            has_hashtag = any(
-                f"#{tag.lower().lstrip('#')}" in content_lower
-                for tag in request.hashtags
-            )
-            if not has_hashtag:
-                return None
 
-    return _parse_post(post_data)
+def _parse_feed_post(post_data: dict, include_reposts: bool = False,
+                     hashtag_pattern: Optional[re.Pattern] = None, seen: Optional[SeenFilter] = None):
+    """Parse a raw LinkedIn feed post with feed-specific filtering (reposts, hashtags, seen IDs)."""
+    fields = _extract_post_fields(post_data)
+    if fields is None:
+        return None
+    if fields.is_repost and not include_reposts:
+        return None
+    if hashtag_pattern is not None and not hashtag_pattern.search(fields.text):
+        return None
+    if seen is not None and fields.external_id in seen:
+        return _SEEN
+    return _build_post(post_data, fields)
@@ -5,27 +5,65 @@ FastAPI microservice for web scraping using Crawl4AI
 
 import asyncio
 import re
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 from urllib.parse import urljoin, urlparse
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, HttpUrl
 
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
 from bs4 import BeautifulSoup
 import aiohttp
 
-from linkedin_service import router as linkedin_router
-from linkedin_browser import router as linkedin_browser_router
-from linkedin_public import router as linkedin_public_router
-from twitter_service import router as twitter_router
+from linkedin_service import router as linkedin_router, get_stats as linkedin_stats
+from linkedin_browser import (
+    router as linkedin_browser_router,
+    close_all_sessions as close_browser_sessions,
+    get_stats as linkedin_browser_stats,
+)
+from linkedin_public import router as linkedin_public_router, get_stats as linkedin_public_stats
+from twitter_service import router as twitter_router, get_stats as twitter_stats
+from session_store import session_store
+import browser_memory
+from browser_manager import browser_manager
+import browser_state
+from browser_state import DomainState
+from voyager_client import close_transport as close_voyager_transport
+import jobs
+import scheduler
+from scheduler import scheduled, too_many_requests
+import ttl_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown of shared resources"""
+    session_store.purge_expired()
+    sweeper = asyncio.create_task(ttl_cache.run_sweeper())
+    reaper = asyncio.create_task(browser_memory.run_reaper())
+    try:
+        await browser_manager.start()
+    except Exception as e:
+        # Launched lazily on first use instead
+        print(f"[BROWSER MANAGER] Warm-up failed: {e}")
+    await jobs.start_workers()
+    yield
+    await jobs.stop_workers()
+    sweeper.cancel()
+    reaper.cancel()
+    await close_browser_sessions()
+    await browser_manager.stop()
+    await close_voyager_transport()
+
 
 app = FastAPI(
     title="Crawl4AI Scraper Service",
     description="Web scraping microservice for Newsroom AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for Next.js
@@ -37,11 +75,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount connector routers
-app.include_router(linkedin_router, prefix="/linkedin", tags=["linkedin"])
-app.include_router(linkedin_browser_router, prefix="/linkedin", tags=["linkedin-browser"])
-app.include_router(linkedin_public_router, prefix="/linkedin", tags=["linkedin-public"])
-app.include_router(twitter_router, prefix="/twitter", tags=["twitter"])
+# Mount connector routers (browser/connector work runs in a scheduler lane, see scheduler.py)
+app.include_router(linkedin_router, prefix="/linkedin", tags=["linkedin"], dependencies=[Depends(scheduled)])
+app.include_router(linkedin_browser_router, prefix="/linkedin", tags=["linkedin-browser"], dependencies=[Depends(scheduled)])
+app.include_router(linkedin_public_router, prefix="/linkedin", tags=["linkedin-public"], dependencies=[Depends(scheduled)])
+app.include_router(twitter_router, prefix="/twitter", tags=["twitter"], dependencies=[Depends(scheduled)])
+app.include_router(jobs.router, tags=["jobs"])
 
 # =============================================================================
 # Models
@@ -82,25 +121,47 @@ class ArticlesResponse(BaseModel):
 # Browser Configuration
 # =============================================================================
 
-def get_browser_config() -> BrowserConfig:
-    return BrowserConfig(
-        headless=True,
-        viewport_width=1920,
-        viewport_height=1080,
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
+BROWSER_MEMORY_ERROR = "Browser memory limit reached, try again later"
+
+# Drops fixed/sticky overlays (cookie walls, modals, newsletter popups) before the HTML is read
+REMOVE_OVERLAYS_SCRIPT = """
+() => {
+    const viewport = window.innerWidth * window.innerHeight;
+    document.querySelectorAll('body *').forEach(el => {
+        const style = getComputedStyle(el);
+        if (style.position !== 'fixed' && style.position !== 'sticky') return;
+        const rect = el.getBoundingClientRect();
+        const label = (el.id || '') + ' ' + (el.getAttribute('class') || '');
+        if (rect.width * rect.height > viewport * 0.3 || (parseInt(style.zIndex) || 0) >= 1000
+                || /cookie|consent|gdpr|modal|popup|overlay/i.test(label)) {
+            el.remove();
+        }
+    });
+    document.documentElement.style.overflow = 'auto';
+    document.body.style.overflow = 'auto';
+}
+"""
 
-def get_crawler_config(wait_for: Optional[str] = None, timeout: int = 60000, fast_mode: bool = False) -> CrawlerRunConfig:
+_content_crawler: Optional[AsyncWebCrawler] = None
+
+def get_crawler_config(wait_for: Optional[str] = None, timeout: int = 60000, fast_mode: bool = False,
+                       warm: bool = False) -> CrawlerRunConfig:
     """
     Get crawler configuration.
     fast_mode=True uses 'domcontentloaded' instead of 'networkidle' for faster loading
     on sites with many ads/trackers (like strefainwestorow.pl)
+    warm=True (saved storage state for the domain, consent already given) keeps the
+    same load event but skips most of the delay that lets consent overlays render
     """
+    if warm:
+        delay = 0.5
+    else:
+        delay = 1.0 if fast_mode else 2.0
     config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
         page_timeout=timeout,
         wait_until="domcontentloaded" if fast_mode else "networkidle",
-        delay_before_return_html=1.0 if fast_mode else 2.0,
+        delay_before_return_html=delay,
         remove_overlay_elements=True,
         excluded_tags=["script", "style", "noscript"]  # Keep nav, footer for links
     )
@@ -108,6 +169,33 @@ def get_crawler_config(wait_for: Optional[str] = None, timeout: int = 60000, fas
         config.wait_for = f"css:{wait_for}"
     return config
 
+async def crawl(url: str, config: CrawlerRunConfig, domain_state: DomainState):
+    """
+    Render `url` in a fresh context from the browser manager (closed before returning,
+    so concurrent crawls never share cookies or cache) and run crawl4ai's content
+    pipeline (cleaning, links, markdown) on the HTML. Returns a crawl4ai CrawlResult.
+    """
+    global _content_crawler
+    context = await browser_manager.acquire("plain")
+    try:
+        page = await context.new_page()
+        await domain_state.apply(page, context)
+        await page.goto(url, wait_until=config.wait_until, timeout=config.page_timeout)
+        if config.wait_for:
+            await page.wait_for_selector(config.wait_for.removeprefix("css:"), timeout=config.page_timeout)
+        await page.wait_for_timeout(config.delay_before_return_html * 1000)
+        if config.remove_overlay_elements:
+            await page.evaluate(REMOVE_OVERLAYS_SCRIPT)
+        html = await page.content()
+        await domain_state.capture(context)
+    finally:
+        await browser_manager.release(context)
+
+    # Processing only - this crawler never starts its own browser
+    if _content_crawler is None:
+        _content_crawler = AsyncWebCrawler()
+    return await _content_crawler.aprocess_html(url, html, None, config, None, None, False)
+
 # =============================================================================
 # Endpoints
 # =============================================================================
@@ -117,43 +205,72 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "crawl4ai-scraper", "timestamp": datetime.utcnow().isoformat()}
 
-@app.post("/scrape", response_model=ScrapeResponse)
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics (rate limiters, caches, browser memory)"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "linkedin": linkedin_stats(),
+        "linkedin_browser": linkedin_browser_stats(),
+        "linkedin_public": linkedin_public_stats(),
+        "twitter": twitter_stats(),
+        "browsers": browser_manager.stats(),
+        "browser_memory": browser_memory.get_stats(),
+        "browser_state": browser_state.get_stats(),
+        "scheduler": scheduler.get_stats(),
+        "jobs": await jobs.get_stats(),
+        "caches": ttl_cache.all_stats(),
+    }
+
+@app.get("/queue")
+async def queue_depth():
+    """Current queue depth and estimated wait per lane, plus persisted job counts"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "lanes": scheduler.scheduler.queue_depth(),
+        "jobs": (await jobs.get_stats())["jobs"],
+    }
+
+@app.post("/scrape", response_model=ScrapeResponse, dependencies=[Depends(scheduled)])
 async def scrape_url(request: ScrapeRequest):
     """
     Scrape a single URL and return markdown content
     """
     url = str(request.url)
 
+    if not await browser_memory.ensure_headroom():
+        raise too_many_requests(browser_memory.REAPER_INTERVAL_SECONDS, BROWSER_MEMORY_ERROR)
+
     try:
-        browser_config = get_browser_config()
-        crawler_config = get_crawler_config(request.wait_for, request.timeout)
-
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=url, config=crawler_config)
-
-            if result.success:
-                # Extract title from metadata or markdown
-                title = result.metadata.get("title") if result.metadata else None
-                if not title and result.markdown:
-                    # Try to extract from first heading
-                    match = re.search(r'^#\s+(.+)$', result.markdown, re.MULTILINE)
-                    if match:
-                        title = match.group(1).strip()
-
-                return ScrapeResponse(
-                    success=True,
-                    url=url,
-                    title=title,
-                    markdown=result.markdown,
-                    html_length=len(result.html) if result.html else 0,
-                    links_count=len(result.links.get("internal", [])) + len(result.links.get("external", []))
-                )
-            else:
-                return ScrapeResponse(
-                    success=False,
-                    url=url,
-                    error=result.error_message or "Unknown error"
-                )
+        domain_state = await DomainState.load(url)
+        crawler_config = get_crawler_config(request.wait_for, request.timeout, warm=domain_state.warm)
+
+        result = await crawl(url, crawler_config, domain_state)
+
+        if result.success:
+            await domain_state.save()
+            # Extract title from metadata or markdown
+            title = result.metadata.get("title") if result.metadata else None
+            if not title and result.markdown:
+                # Try to extract from first heading
+                match = re.search(r'^#\s+(.+)$', result.markdown, re.MULTILINE)
+                if match:
+                    title = match.group(1).strip()
+
+            return ScrapeResponse(
+                success=True,
+                url=url,
+                title=title,
+                markdown=result.markdown,
+                html_length=len(result.html) if result.html else 0,
+                links_count=len(result.links.get("internal", [])) + len(result.links.get("external", []))
+            )
+        else:
+            return ScrapeResponse(
+                success=False,
+                url=url,
+                error=result.error_message or "Unknown error"
+            )
 
     except Exception as e:
         return ScrapeResponse(
@@ -162,7 +279,7 @@ async def scrape_url(request: ScrapeRequest):
             error=str(e)
         )
 
-@app.post("/scrape/articles", response_model=ArticlesResponse)
+@app.post("/scrape/articles", response_model=ArticlesResponse, dependencies=[Depends(scheduled)])
 async def scrape_articles(request: ArticlesRequest):
     """
     Scrape a blog/news site and extract list of article links
@@ -170,94 +287,97 @@ async def scrape_articles(request: ArticlesRequest):
     url = str(request.url)
     base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
 
+    if not await browser_memory.ensure_headroom():
+        raise too_many_requests(browser_memory.REAPER_INTERVAL_SECONDS, BROWSER_MEMORY_ERROR)
+
     try:
-        browser_config = get_browser_config()
         # Use fast_mode=True for article list scraping (doesn't need full page load)
-        crawler_config = get_crawler_config(timeout=60000, fast_mode=True)
-
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=url, config=crawler_config)
-
-            if not result.success:
-                return ArticlesResponse(
-                    success=False,
-                    source_url=url,
-                    error=result.error_message or "Failed to scrape page"
-                )
-
-            articles = []
-            seen_urls = set()
-
-            # Extract links from the page - try result.links first, fallback to HTML parsing
-            all_links = result.links.get("internal", []) + result.links.get("external", [])
-
-            # If few article-like links found, try fetching HTML directly with aiohttp
-            article_links_count = sum(1 for l in all_links if isinstance(l, dict) and '/posts/' in l.get('href', '') or '/wiadomosci/' in l.get('href', ''))
-
-            if article_links_count < 3:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0"}
-                        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                            if resp.status == 200:
-                                html_content = await resp.text()
-                                soup = BeautifulSoup(html_content, 'html.parser')
-                                all_links = []
-                                for a_tag in soup.find_all('a', href=True):
-                                    href = a_tag.get('href', '')
-                                    text = a_tag.get_text(strip=True)
-                                    if href:
-                                        all_links.append({"href": href, "text": text})
-                except Exception:
-                    pass  # Fall back to Crawl4AI results
-
-            for link in all_links:
-                # Handle both dict and string formats
-                if isinstance(link, dict):
-                    href = link.get("href", "")
-                    text = link.get("text", "").strip()
-                else:
-                    href = str(link)
-                    text = ""
-
-                if not href:
-                    continue
-
-                # Make absolute URL
-                if href.startswith("/"):
-                    href = urljoin(base_url, href)
-                elif not href.startswith("http"):
-                    continue
-
-                # Skip if already seen
-                if href in seen_urls:
-                    continue
-                seen_urls.add(href)
-
-                # Filter for article-like URLs
-                is_article = is_article_url(href, base_url)
-                if is_article:
-                    # Clean up title
-                    title = text if text else extract_title_from_url(href)
-                    if title and len(title) > 10:  # Minimum title length
-                        # Try to extract date from URL
-                        article_date = extract_date_from_url(href)
-                        articles.append(ArticleInfo(
-                            url=href,
-                            title=title[:200],  # Limit title length
-                            date=article_date,
-                            author=None,
-                            excerpt=None
-                        ))
-
-                if len(articles) >= request.max_articles:
-                    break
+        domain_state = await DomainState.load(url)
+        crawler_config = get_crawler_config(timeout=60000, fast_mode=True, warm=domain_state.warm)
+
+        result = await crawl(url, crawler_config, domain_state)
 
+        if not result.success:
             return ArticlesResponse(
-                success=True,
+                success=False,
                 source_url=url,
-                articles=articles
+                error=result.error_message or "Failed to scrape page"
             )
+        await domain_state.save()
+
+        articles = []
+        seen_urls = set()
+
+        # Extract links from the page - try result.links first, fallback to HTML parsing
+        all_links = result.links.get("internal", []) + result.links.get("external", [])
+
+        # If few article-like links found, try fetching HTML directly with aiohttp
+        article_links_count = sum(1 for l in all_links if isinstance(l, dict) and '/posts/' in l.get('href', '') or '/wiadomosci/' in l.get('href', ''))
+
+        if article_links_count < 3:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0"}
+                    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                        if resp.status == 200:
+                            html_content = await resp.text()
+                            soup = BeautifulSoup(html_content, 'html.parser')
+                            all_links = []
+                            for a_tag in soup.find_all('a', href=True):
+                                href = a_tag.get('href', '')
+                                text = a_tag.get_text(strip=True)
+                                if href:
+                                    all_links.append({"href": href, "text": text})
+            except Exception:
+                pass  # Fall back to Crawl4AI results
+
+        for link in all_links:
+            # Handle both dict and string formats
+            if isinstance(link, dict):
+                href = link.get("href", "")
+                text = link.get("text", "").strip()
+            else:
+                href = str(link)
+                text = ""
+
+            if not href:
+                continue
+
+            # Make absolute URL
+            if href.startswith("/"):
+                href = urljoin(base_url, href)
+            elif not href.startswith("http"):
+                continue
+
+            # Skip if already seen
+            if href in seen_urls:
+                continue
+            seen_urls.add(href)
+
+            # Filter for article-like URLs
+            is_article = is_article_url(href, base_url)
+            if is_article:
+                # Clean up title
+                title = text if text else extract_title_from_url(href)
+                if title and len(title) > 10:  # Minimum title length
+                    # Try to extract date from URL
+                    article_date = extract_date_from_url(href)
+                    articles.append(ArticleInfo(
+                        url=href,
+                        title=title[:200],  # Limit title length
+                        date=article_date,
+                        author=None,
+                        excerpt=None
+                    ))
+
+            if len(articles) >= request.max_articles:
+                break
+
+        return ArticlesResponse(
+            success=True,
+            source_url=url,
+            articles=articles
+        )
 
     except Exception as e:
         return ArticlesResponse(
@@ -440,6 +560,14 @@ def extract_date_from_content(html: str, markdown: str) -> Optional[str]:
 
     return None
 
+# =============================================================================
+# Job Types
+# =============================================================================
+
+# POST /jobs runs the same handlers as the synchronous endpoints
+jobs.register_job_type("scrape", ScrapeRequest, scrape_url)
+jobs.register_job_type("articles", ArticlesRequest, scrape_articles)
+
 # =============================================================================
 # Main
 # =============================================================================
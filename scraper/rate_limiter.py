@@ -0,0 +1,186 @@
+"""
+Rate Limiter
+Token-bucket rate limiting shared by the LinkedIn/X connectors.
+Buckets are keyed by arbitrary strings (target host, profile, account) and kept
+in a size-bounded LRU. Block responses (LinkedIn 999, HTTP 429) trigger an
+exponential backoff on the affected bucket. Callers that find a token available
+proceed immediately; only waiting callers get the (optional) jitter.
+"""
+
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller would have to wait longer than its max_wait."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit for {key} exceeded, retry after {retry_after:.0f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "blocked_until", "strikes", "lock", "waiters",
+                 "acquired", "blocks", "total_wait", "max_wait")
+
+    def __init__(self, burst: float):
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.strikes = 0
+        self.lock = asyncio.Lock()
+        self.waiters = 0
+        self.acquired = 0
+        self.blocks = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class RateLimiter:
+    """
+    Keyed token buckets with adaptive backoff.
+    Callers of the same key queue on a FIFO lock, so only the head of the queue
+    waits for the next token. Idle buckets are evicted once max_keys is reached.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        max_keys: int = 1000,
+        backoff_base: float = 30.0,
+        backoff_max: float = 900.0,
+        jitter: float = 0.0,
+    ):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.jitter = jitter  # max random seconds added when a caller has to wait
+        self.max_keys = max_keys
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._evicted = 0
+
+    def _bucket(self, key: str) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(self.burst)
+            self._buckets[key] = bucket
+            self._evict()
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _evict(self):
+        """Drop least recently used buckets that nobody is waiting on."""
+        if len(self._buckets) <= self.max_keys:
+            return
+        for key in list(self._buckets):
+            if len(self._buckets) <= self.max_keys:
+                break
+            bucket = self._buckets[key]
+            if bucket.waiters == 0 and bucket.blocked_until <= time.monotonic():
+                del self._buckets[key]
+                self._evicted += 1
+
+    def _refill(self, bucket: _Bucket, now: float):
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+
+    def _delay(self, bucket: _Bucket, now: float) -> float:
+        self._refill(bucket, now)
+        delay = max(0.0, bucket.blocked_until - now)
+        if bucket.tokens < 1:
+            delay = max(delay, (1 - bucket.tokens) / self.rate)
+        return delay
+
+    def estimate_wait(self, key: str) -> float:
+        """Approximate seconds a new caller would wait for this key."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        return self._delay(bucket, time.monotonic()) + bucket.waiters / self.rate
+
+    async def acquire(self, key: str, max_wait: Optional[float] = None) -> float:
+        """Wait for a token on `key`. Returns the seconds spent waiting."""
+        bucket = self._bucket(key)
+        if max_wait is not None:
+            expected = self.estimate_wait(key)
+            if expected > max_wait:
+                raise RateLimitExceeded(key, expected)
+
+        started = time.monotonic()
+        bucket.waiters += 1
+        try:
+            async with bucket.lock:
+                while True:
+                    delay = self._delay(bucket, time.monotonic())
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay + random.uniform(0, self.jitter))
+                bucket.tokens -= 1
+        finally:
+            bucket.waiters -= 1
+
+        waited = time.monotonic() - started
+        bucket.acquired += 1
+        bucket.total_wait += waited
+        bucket.max_wait = max(bucket.max_wait, waited)
+        return waited
+
+    def refund(self, key: str):
+        """Return a token taken by acquire() when the call it guarded never happened."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(self.burst, bucket.tokens + 1)
+            bucket.acquired -= 1
+
+    def report_blocked(self, key: str, retry_after: Optional[float] = None):
+        """Back off `key` after a 999/429 response (exponential per consecutive block)."""
+        bucket = self._bucket(key)
+        backoff = retry_after or min(self.backoff_max, self.backoff_base * (2 ** bucket.strikes))
+        bucket.strikes += 1
+        bucket.blocks += 1
+        bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + backoff)
+        bucket.tokens = 0
+
+    def report_success(self, key: str):
+        """Reset the backoff streak after a successful call."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.strikes = 0
+
+    def stats(self, detail_prefix: Optional[str] = None) -> dict:
+        """Aggregate metrics, plus per-key state for keys starting with detail_prefix."""
+        now = time.monotonic()
+        acquired = sum(b.acquired for b in self._buckets.values())
+        total_wait = sum(b.total_wait for b in self._buckets.values())
+        result = {
+            "keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evicted": self._evicted,
+            "acquired": acquired,
+            "waiting": sum(b.waiters for b in self._buckets.values()),
+            "blocks": sum(b.blocks for b in self._buckets.values()),
+            "backing_off": sum(1 for b in self._buckets.values() if b.blocked_until > now),
+            "avg_wait_seconds": round(total_wait / acquired, 3) if acquired else 0.0,
+            "max_wait_seconds": round(max((b.max_wait for b in self._buckets.values()), default=0.0), 3),
+        }
+        if detail_prefix is not None:
+            result["detail"] = {
+                key: {
+                    "tokens": round(min(self.burst, b.tokens + (now - b.updated) * self.rate), 2),
+                    "waiting": b.waiters,
+                    "acquired": b.acquired,
+                    "blocks": b.blocks,
+                    "backoff_remaining_seconds": round(max(0.0, b.blocked_until - now), 1),
+                    "avg_wait_seconds": round(b.total_wait / b.acquired, 3) if b.acquired else 0.0,
+                }
+                for key, b in self._buckets.items()
+                if key.startswith(detail_prefix)
+            }
+        return result
@@ -0,0 +1,221 @@
+"""
+Work Scheduler
+Two priority lanes in front of all browser and connector work:
+- interactive: user-initiated requests (opening an article, discovering a source)
+- bulk: scheduled refreshes and queued jobs
+Every request holds one of SCHEDULER_CAPACITY slots while it runs. Bulk work may
+only use the slots not reserved for interactive requests, and a freed slot goes
+to a waiting interactive request before any bulk one, so a cron run can't push
+interactive latency up.
+Callers pick the lane per request with the X-Priority header (default interactive).
+
+Admission control: the expected queue wait is estimated from the lane's queue
+depth and recent service times. A request that can't start within its deadline
+(X-Deadline-Seconds header, else the lane default) or finds its lane queue full
+is rejected up front with 429 + Retry-After instead of piling up in the process.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Header, HTTPException, Response
+
+SCHEDULER_CAPACITY = int(os.getenv("SCHEDULER_CAPACITY", "8"))
+SCHEDULER_INTERACTIVE_RESERVED = int(os.getenv("SCHEDULER_INTERACTIVE_RESERVED", "3"))
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+WAIT_SAMPLES = 200  # recent queue waits kept per lane for percentiles
+
+# Admission: max queue wait a request accepts, and max queued requests per lane
+DEFAULT_DEADLINE_SECONDS = {
+    LANE_INTERACTIVE: float(os.getenv("SCHEDULER_INTERACTIVE_DEADLINE", "30")),
+    LANE_BULK: float(os.getenv("SCHEDULER_BULK_DEADLINE", "300")),
+}
+MAX_QUEUE_DEPTH = {
+    LANE_INTERACTIVE: int(os.getenv("SCHEDULER_INTERACTIVE_MAX_QUEUE", "50")),
+    LANE_BULK: int(os.getenv("SCHEDULER_BULK_MAX_QUEUE", "200")),
+}
+INITIAL_SERVICE_SECONDS = 5.0  # service time assumed until requests have completed
+SERVICE_TIME_ALPHA = 0.2  # EWMA weight of the latest service time
+
+
+class QueueFull(Exception):
+    """Raised by admit() when a request can't start in time; retry_after is the estimated wait."""
+
+    def __init__(self, lane: str, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class _Lane:
+    __slots__ = ("waiting", "active", "acquired", "rejected", "total_wait", "max_wait", "recent_waits",
+                 "service_seconds")
+
+    def __init__(self):
+        self.waiting = 0
+        self.active = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.service_seconds = INITIAL_SERVICE_SECONDS  # EWMA of slot hold time
+
+
+class LaneScheduler:
+    """Slot scheduler with capacity reserved for the interactive lane."""
+
+    def __init__(self, capacity: int = SCHEDULER_CAPACITY, interactive_reserved: int = SCHEDULER_INTERACTIVE_RESERVED):
+        self.capacity = capacity
+        self.interactive_reserved = min(interactive_reserved, capacity - 1)
+        self._lanes = {lane: _Lane() for lane in LANES}
+        self._condition = asyncio.Condition()
+
+    @property
+    def active(self) -> int:
+        return sum(lane.active for lane in self._lanes.values())
+
+    def _can_run(self, lane: str) -> bool:
+        if lane == LANE_INTERACTIVE:
+            return self.active < self.capacity
+        # Bulk yields to waiting interactive requests and leaves the reserve free
+        interactive = self._lanes[LANE_INTERACTIVE]
+        return interactive.waiting == 0 and self.active < self.capacity - self.interactive_reserved
+
+    def estimate_wait(self, lane: str) -> float:
+        """Approximate seconds a new request in `lane` would queue before getting a slot."""
+        if self._lanes[lane].waiting == 0 and self._can_run(lane):
+            return 0.0
+        interactive = self._lanes[LANE_INTERACTIVE]
+        if lane == LANE_INTERACTIVE:
+            ahead, slots = interactive.waiting, self.capacity
+        else:
+            ahead = interactive.waiting + self._lanes[LANE_BULK].waiting
+            slots = self.capacity - self.interactive_reserved
+        # Slots free up at about `slots` per average service time of the running work
+        if self.active:
+            service = sum(l.service_seconds * l.active for l in self._lanes.values()) / self.active
+        else:
+            service = self._lanes[lane].service_seconds
+        return (ahead + 1) * service / max(1, slots)
+
+    def admit(self, lane: str, deadline: Optional[float] = None):
+        """Raise QueueFull when the lane queue is full or the estimated wait exceeds the deadline."""
+        state = self._lanes[lane]
+        deadline = deadline if deadline is not None else DEFAULT_DEADLINE_SECONDS[lane]
+        expected = self.estimate_wait(lane)
+        if state.waiting >= MAX_QUEUE_DEPTH[lane]:
+            state.rejected += 1
+            raise QueueFull(lane, expected, f"{lane} queue is full ({state.waiting} waiting)")
+        if expected > deadline:
+            state.rejected += 1
+            raise QueueFull(lane, expected, f"Expected queue wait {expected:.0f}s exceeds the {deadline:.0f}s deadline")
+
+    def queue_depth(self) -> dict:
+        return {
+            name: {
+                "waiting": lane.waiting,
+                "active": lane.active,
+                "estimated_wait_seconds": round(self.estimate_wait(name), 1),
+            }
+            for name, lane in self._lanes.items()
+        }
+
+    @asynccontextmanager
+    async def slot(self, lane: str = LANE_INTERACTIVE) -> AsyncIterator[float]:
+        """Hold a slot in `lane` for the duration of the block; yields the seconds spent queued."""
+        state = self._lanes[lane]
+        started = time.monotonic()
+        async with self._condition:
+            state.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self._can_run(lane))
+            finally:
+                state.waiting -= 1
+                # A cancelled interactive waiter may have been blocking bulk work
+                self._condition.notify_all()
+            state.active += 1
+
+        waited = time.monotonic() - started
+        state.acquired += 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        state.recent_waits.append(waited)
+        held_since = time.monotonic()
+        try:
+            yield waited
+        finally:
+            held = time.monotonic() - held_since
+            state.service_seconds += SERVICE_TIME_ALPHA * (held - state.service_seconds)
+            async with self._condition:
+                state.active -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        lanes = {}
+        for name, lane in self._lanes.items():
+            recent = sorted(lane.recent_waits)
+            lanes[name] = {
+                "waiting": lane.waiting,
+                "active": lane.active,
+                "acquired": lane.acquired,
+                "rejected": lane.rejected,
+                "avg_service_seconds": round(lane.service_seconds, 3),
+                "avg_wait_seconds": round(lane.total_wait / lane.acquired, 3) if lane.acquired else 0.0,
+                "p95_wait_seconds": round(recent[int(len(recent) * 0.95)], 3) if recent else 0.0,
+                "max_wait_seconds": round(lane.max_wait, 3),
+            }
+        return {
+            "capacity": self.capacity,
+            "interactive_reserved": self.interactive_reserved,
+            "active": self.active,
+            "lanes": lanes,
+        }
+
+
+scheduler = LaneScheduler()
+
+
+def resolve_lane(priority: Optional[str]) -> str:
+    return LANE_BULK if (priority or "").strip().lower() == LANE_BULK else LANE_INTERACTIVE
+
+
+def too_many_requests(retry_after: float, detail: str) -> HTTPException:
+    """429 with a Retry-After (whole seconds, at least 1)."""
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def scheduled(
+    response: Response,
+    x_priority: Optional[str] = Header(None),
+    x_deadline_seconds: Optional[float] = Header(None),
+):
+    """
+    FastAPI dependency: admit the request and run it in the lane named by the
+    X-Priority header. Reports the lane's queue depth in X-Queue-Depth.
+    """
+    lane = resolve_lane(x_priority)
+    try:
+        scheduler.admit(lane, x_deadline_seconds)
+    except QueueFull as e:
+        raise too_many_requests(e.retry_after, str(e))
+    response.headers["X-Queue-Depth"] = str(scheduler.queue_depth()[lane]["waiting"])
+    async with scheduler.slot(lane):
+        yield
+
+
+def get_stats() -> dict:
+    return scheduler.stats()
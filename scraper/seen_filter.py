@@ -0,0 +1,109 @@
+"""
+Seen-ID Filter
+Compact set of already-delivered item IDs (tweets, LinkedIn posts) so repeat
+refreshes can skip known items before parsing them into models.
+Two rotating Bloom filter generations: when the current one reaches capacity it
+becomes the previous one, so the filter remembers the most recent 1-2x capacity
+IDs at a bounded size. Serializes to a short base64 token the caller can
+persist and send back.
+"""
+
+import base64
+import hashlib
+import math
+import struct
+import zlib
+from typing import Iterable, Optional
+
+DEFAULT_CAPACITY = 2000
+DEFAULT_ERROR_RATE = 0.001
+
+_TOKEN_VERSION = 1
+# Largest decoded token accepted (a 200k-capacity filter); bounds zlib output on untrusted input
+MAX_TOKEN_BYTES = 1 << 20
+_HEADER = struct.Struct(">BIIBII")  # version, capacity, bits, hashes, count current, count previous
+
+
+class SeenFilter:
+    """Two-generation Bloom filter over string IDs (false positives ~error_rate, no false negatives)."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+        self._previous_count = 0
+
+    def _positions(self, item_id: str) -> list[int]:
+        digest = hashlib.blake2b(item_id.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack(">QQ", digest)
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _test(bits: bytearray, positions: list[int]) -> bool:
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+    def __contains__(self, item_id: str) -> bool:
+        positions = self._positions(item_id)
+        return self._test(self._current, positions) or (
+            self._previous_count > 0 and self._test(self._previous, positions)
+        )
+
+    def __len__(self) -> int:
+        return self._count + self._previous_count
+
+    def add(self, item_id: str):
+        positions = self._positions(item_id)
+        if self._test(self._current, positions):
+            return
+        if self._count >= self.capacity:
+            self._previous, self._previous_count = self._current, self._count
+            self._current, self._count = bytearray(len(self._previous)), 0
+        for pos in positions:
+            self._current[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def update(self, item_ids: Iterable[str]):
+        for item_id in item_ids:
+            self.add(item_id)
+
+    def to_token(self) -> str:
+        header = _HEADER.pack(
+            _TOKEN_VERSION, self.capacity, self.num_bits, self.num_hashes, self._count, self._previous_count
+        )
+        payload = zlib.compress(header + bytes(self._current) + bytes(self._previous), 9)
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @classmethod
+    def from_token(cls, token: str) -> "SeenFilter":
+        """Decode a token produced by to_token(); raises ValueError when it is malformed."""
+        try:
+            decompressor = zlib.decompressobj()
+            raw = decompressor.decompress(base64.urlsafe_b64decode(token.encode()), MAX_TOKEN_BYTES)
+            if decompressor.unconsumed_tail or not decompressor.eof:
+                raise ValueError("Seen filter token too large")
+            version, capacity, num_bits, num_hashes, count, previous_count = _HEADER.unpack_from(raw)
+        except Exception:
+            raise ValueError("Invalid seen filter")
+        size = (num_bits + 7) // 8
+        if version != _TOKEN_VERSION or not capacity or not num_bits or len(raw) != _HEADER.size + 2 * size:
+            raise ValueError("Invalid seen filter")
+
+        seen = cls.__new__(cls)
+        seen.capacity = capacity
+        seen.num_bits = num_bits
+        seen.num_hashes = num_hashes
+        seen._current = bytearray(raw[_HEADER.size:_HEADER.size + size])
+        seen._previous = bytearray(raw[_HEADER.size + size:])
+        seen._count = count
+        seen._previous_count = previous_count
+        return seen
+
+
+def resolve_seen_filter(token: Optional[str], cached: Optional[SeenFilter]) -> SeenFilter:
+    """Caller-supplied token wins over the session's copy; otherwise start empty."""
+    if token:
+        return SeenFilter.from_token(token)
+    return cached if cached is not None else SeenFilter()
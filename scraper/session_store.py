@@ -0,0 +1,224 @@
+"""
+Session Store
+Persists connector session state (cookies, CSRF tokens) outside the process so
+LinkedIn/X sessions survive restarts and work across several uvicorn workers.
+Client objects are never stored - connectors serialize their cookie state and
+rehydrate a client lazily on first use.
+
+Backends (SESSION_STORE env):
+- "sqlite" (default): Fernet-encrypted rows in a SQLite file under SCRAPER_DATA_DIR,
+  shared by all workers on the same volume
+- "memory": process-local dict, a stand-in for a shared KV store (tests, dev)
+
+The Fernet key comes from SESSION_STORE_KEY or a mounted secret file
+(SESSION_STORE_KEY_FILE). Only when neither is set (local dev) is a key
+generated next to the database - that protects nothing if the volume leaks.
+Store methods do blocking I/O; call them via asyncio.to_thread from request paths.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE", "sqlite")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join(DATA_DIR, "sessions.sqlite3"))
+SESSION_STORE_KEY_FILE = os.getenv("SESSION_STORE_KEY_FILE")  # e.g. /run/secrets/session_store_key
+# Dev fallback only: generated key stored on the same volume as the database
+SESSION_STORE_KEY_PATH = os.path.join(DATA_DIR, "session_store.key")
+
+
+class SessionStore(ABC):
+    """Interface: namespaced session_id -> JSON-serializable state with an expiry."""
+
+    @abstractmethod
+    def save(self, namespace: str, session_id: str, state: dict, ttl_seconds: float):
+        ...
+
+    @abstractmethod
+    def load(self, namespace: str, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def touch(self, namespace: str, session_id: str, ttl_seconds: float, state: Optional[dict] = None) -> bool:
+        """
+        Extend the expiry of an existing session (sliding TTL), replacing its state
+        when given. False when the session is gone (deleted elsewhere or expired);
+        a missing session is never recreated.
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, session_id: str):
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store with the same semantics as a shared KV (TTL per key)."""
+
+    def __init__(self):
+        self._data: dict[tuple[str, str], tuple[str, float]] = {}
+
+    def save(self, namespace: str, session_id: str, state: dict, ttl_seconds: float):
+        self._data[(namespace, session_id)] = (json.dumps(state), time.time() + ttl_seconds)
+
+    def load(self, namespace: str, session_id: str) -> Optional[dict]:
+        entry = self._data.get((namespace, session_id))
+        if not entry:
+            return None
+        payload, expires_at = entry
+        if expires_at < time.time():
+            self._data.pop((namespace, session_id), None)
+            return None
+        return json.loads(payload)
+
+    def touch(self, namespace: str, session_id: str, ttl_seconds: float, state: Optional[dict] = None) -> bool:
+        entry = self._data.get((namespace, session_id))
+        if not entry or entry[1] < time.time():
+            return False
+        payload = json.dumps(state) if state is not None else entry[0]
+        self._data[(namespace, session_id)] = (payload, time.time() + ttl_seconds)
+        return True
+
+    def delete(self, namespace: str, session_id: str):
+        self._data.pop((namespace, session_id), None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at < now]
+        for key in expired:
+            self._data.pop(key, None)
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Encrypted SQLite store (WAL mode, safe for several worker processes)."""
+
+    def __init__(self, path: str, key: bytes):
+        from cryptography.fernet import Fernet
+
+        self._fernet = Fernet(key)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "namespace TEXT NOT NULL, session_id TEXT NOT NULL, state BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, PRIMARY KEY (namespace, session_id))"
+        )
+        self._conn.commit()
+
+    def save(self, namespace: str, session_id: str, state: dict, ttl_seconds: float):
+        token = self._fernet.encrypt(json.dumps(state).encode())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (namespace, session_id, state, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, session_id, token, time.time() + ttl_seconds),
+            )
+            self._conn.commit()
+
+    def load(self, namespace: str, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, expires_at FROM sessions WHERE namespace = ? AND session_id = ?",
+                (namespace, session_id),
+            ).fetchone()
+        if not row:
+            return None
+        token, expires_at = row
+        if expires_at < time.time():
+            self.delete(namespace, session_id)
+            return None
+        try:
+            return json.loads(self._fernet.decrypt(token))
+        except Exception:
+            # Key rotated or row corrupted - treat as missing
+            self.delete(namespace, session_id)
+            return None
+
+    def touch(self, namespace: str, session_id: str, ttl_seconds: float, state: Optional[dict] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            if state is None:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET expires_at = ? WHERE namespace = ? AND session_id = ? AND expires_at >= ?",
+                    (now + ttl_seconds, namespace, session_id, now),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET state = ?, expires_at = ? "
+                    "WHERE namespace = ? AND session_id = ? AND expires_at >= ?",
+                    (self._fernet.encrypt(json.dumps(state).encode()), now + ttl_seconds, namespace, session_id, now),
+                )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def delete(self, namespace: str, session_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM sessions WHERE namespace = ? AND session_id = ?", (namespace, session_id)
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+
+def _load_or_create_key() -> bytes:
+    """SESSION_STORE_KEY env or SESSION_STORE_KEY_FILE secret; dev fallback: key file next to the database."""
+    env_key = os.getenv("SESSION_STORE_KEY")
+    if env_key:
+        return env_key.encode()
+    if SESSION_STORE_KEY_FILE:
+        with open(SESSION_STORE_KEY_FILE, "rb") as f:
+            key = f.read().strip()
+        if not key:
+            raise RuntimeError(f"Session store key file {SESSION_STORE_KEY_FILE} is empty")
+        return key
+
+    from cryptography.fernet import Fernet
+
+    logger.warning(
+        "[SESSION STORE] SESSION_STORE_KEY / SESSION_STORE_KEY_FILE not set - using a key file next to "
+        "the database (dev only, not encryption at rest)"
+    )
+    os.makedirs(DATA_DIR, exist_ok=True)
+    try:
+        # O_EXCL: when several workers start at once, only one creates the key
+        fd = os.open(SESSION_STORE_KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another worker may still be writing it
+        for _ in range(50):
+            with open(SESSION_STORE_KEY_PATH, "rb") as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.1)
+        raise RuntimeError(f"Session store key file {SESSION_STORE_KEY_PATH} is empty")
+    key = Fernet.generate_key()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def create_session_store() -> SessionStore:
+    if SESSION_STORE_BACKEND == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(SESSION_STORE_PATH, _load_or_create_key())
+
+
+session_store = create_session_store()
@@ -0,0 +1,151 @@
+"""
+TTL Cache
+Shared in-memory cache for sessions and other short-lived state.
+OrderedDict-based: O(1) lookup with LRU touch and sliding TTL. Since every
+access pushes an entry to the back with a fresh expiry, the front of the dict is
+always the next entry to expire, so sweeping is O(expired) rather than O(n).
+Every cache registers itself for the background sweeper started in the app lifespan.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL_SECONDS = 30
+
+_registry: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+class TTLCache:
+    """Size-bounded LRU with sliding TTL and an optional (sync or async) eviction callback."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_size: int,
+        on_evict: Optional[Callable[[Hashable, Any], Any]] = None,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._pending: set[asyncio.Task] = set()  # async eviction callbacks still running
+        _registry.add(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key: Hashable, touch: bool = True) -> Optional[Any]:
+        """Return the value (refreshing its TTL and LRU position) or None if missing/expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._evict(key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        if touch:
+            self._data[key] = (value, now + self.ttl_seconds)
+            self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._data[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._evict(next(iter(self._data)))
+            self.evicted += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove without calling on_evict (caller owns the value)."""
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        return ((key, value) for key, (value, _) in list(self._data.items()))
+
+    def sweep(self) -> int:
+        """Evict expired entries from the front. Returns the number removed."""
+        now = time.monotonic()
+        removed = 0
+        while self._data:
+            key, (_, expires_at) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            self._evict(key)
+            removed += 1
+        self.expired += removed
+        return removed
+
+    def _evict(self, key: Hashable):
+        value, _ = self._data.pop(key)
+        if self.on_evict is None:
+            return
+        try:
+            result = self.on_evict(key, value)
+            if inspect.isawaitable(result):
+                # Keep a reference so the task isn't garbage-collected mid-run
+                task = asyncio.ensure_future(result)
+                self._pending.add(task)
+                task.add_done_callback(lambda t: self._eviction_done(key, t))
+        except Exception as e:
+            logger.warning(f"[CACHE] {self.name}: eviction callback failed for {key}: {e}")
+
+    def _eviction_done(self, key: Hashable, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[CACHE] {self.name}: eviction callback failed for {key}: {task.exception()}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+def sweep_all() -> int:
+    return sum(cache.sweep() for cache in list(_registry))
+
+
+def all_stats() -> dict:
+    return {cache.name: cache.stats() for cache in sorted(_registry, key=lambda c: c.name)}
+
+
+async def run_sweeper(interval: float = SWEEP_INTERVAL_SECONDS):
+    """Background task: periodically expire entries of every registered cache."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = sweep_all()
+            if removed:
+                logger.info(f"[CACHE] Sweeper expired {removed} entries")
+        except Exception as e:
+            logger.error(f"[CACHE] Sweeper error: {e}")
@@ -1,58 +1,167 @@
 """
 X/Twitter Connector Service
 FastAPI router for X/Twitter integration via Twikit (async scraper).
-Session cache in memory with TTL.
+Session cache in memory with TTL, backed by the persistent session store.
 """
 
 import asyncio
 import hashlib
-import random
+import re
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from functools import partial
+from typing import Dict, NamedTuple, Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from rate_limiter import RateLimiter, RateLimitExceeded
+from scheduler import too_many_requests
+from seen_filter import SeenFilter, resolve_seen_filter
+from session_store import session_store
+from ttl_cache import TTLCache
+
 router = APIRouter()
 
 # =============================================================================
-# Session Cache (in-memory, TTL 90min, max 100 sessions)
+# Session Cache (in-memory LRU, sliding TTL 90min, max age 12h, max 5000 sessions)
 # =============================================================================
 
 SESSION_TTL_MINUTES = 90
-MAX_SESSIONS = 100
+MAX_SESSIONS = 5000
+# Absolute lifetime: past it a session answers 410 however active it is
+SESSION_MAX_AGE = timedelta(hours=12)
+
+SESSION_NAMESPACE = "twitter"
+CLIENT_LANGUAGE = "en-US"
+# Persisted expiry is extended at most this often per session
+STORE_TOUCH_INTERVAL = timedelta(minutes=SESSION_TTL_MINUTES / 4)
+
+# Per-account governor on outbound X calls (token bucket + jitter, backs off on rate-limit errors)
+ACCOUNT_RATE_PER_MINUTE = 20
+ACCOUNT_BURST = 5
+ACCOUNT_JITTER_SECONDS = 1.5
+# Interactive calls give up (429) rather than queue behind a long backoff
+GOVERNOR_MAX_WAIT_SECONDS = 30
+
+_account_governor = RateLimiter(
+    rate=ACCOUNT_RATE_PER_MINUTE / 60,
+    burst=ACCOUNT_BURST,
+    max_keys=MAX_SESSIONS * 2,
+    jitter=ACCOUNT_JITTER_SECONDS,
+)
+
+# Timeline paging: twikit result pages followed via .next() until max_tweets / since_id
+MAX_TIMELINE_PAGES = 10
+TIMELINE_PAGE_SIZE = 40
+INCREMENTAL_PAGE_SIZE = 20
+
+# Batch fetching: jobs per request and concurrent jobs per account
+TIMELINE_BATCH_MAX_JOBS = 50
+TIMELINE_BATCH_CONCURRENCY = 2
+
+# (session_id, timeline source) -> SeenFilter of tweet IDs already returned
+_seen_filters = TTLCache("twitter_seen_filters", ttl_seconds=SESSION_TTL_MINUTES * 60, max_size=MAX_SESSIONS)
+
+# session_id -> Semaphore limiting concurrent batch jobs
+_session_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+# Thread expansion: per-request fetch budget so timeline latency stays bounded
+THREAD_FETCH_BUDGET = 5  # conversations fetched per timeline request
+THREAD_FETCH_CONCURRENCY = 3
+THREAD_FETCH_TIMEOUT_SECONDS = 8.0
+THREAD_CACHE_TTL_SECONDS = 30 * 60
+THREAD_CACHE_MAX_ENTRIES = 5000
+
+# (session_id, conversation_id) -> [_ThreadSegment] of the author's self-thread
+_thread_cache = TTLCache("twitter_threads", ttl_seconds=THREAD_CACHE_TTL_SECONDS, max_size=THREAD_CACHE_MAX_ENTRIES)
+
+def _on_session_evicted(session_id: str, _entry):
+    _session_semaphores.pop(session_id, None)
+
+
+# session_id -> (Client instance, last store touch, created_at, persisted cookies);
+# rehydrated from session_store on miss
+_sessions = TTLCache(
+    "twitter_sessions",
+    ttl_seconds=SESSION_TTL_MINUTES * 60,
+    max_size=MAX_SESSIONS,
+    on_evict=_on_session_evicted,
+)
+
+
+def _store_ttl_seconds(created: datetime) -> float:
+    """Persisted expiry: the sliding TTL, capped by what is left of the max age."""
+    remaining = (SESSION_MAX_AGE - (datetime.utcnow() - created)).total_seconds()
+    return max(1.0, min(SESSION_TTL_MINUTES * 60, remaining))
+
+
+async def _save_session(session_id: str, client):
+    """Cache the client locally and persist its cookies for other workers/restarts."""
+    created = datetime.utcnow()
+    cookies = client.get_cookies()
+    _sessions.put(session_id, (client, created, created, cookies))
+    await asyncio.to_thread(
+        session_store.save,
+        SESSION_NAMESPACE, session_id,
+        {"cookies": cookies, "created_at": created.isoformat()},
+        ttl_seconds=_store_ttl_seconds(created),
+    )
+
+
+async def _load_session(session_id: str) -> Optional[tuple]:
+    """Rehydrate a twikit client from persisted cookies (no login round trip)."""
+    state = await asyncio.to_thread(session_store.load, SESSION_NAMESPACE, session_id)
+    if not state:
+        return None
+    from twikit import Client
 
-# session_id -> (Client instance, created_at)
-_sessions: Dict[str, Tuple[object, datetime]] = {}
+    client = Client(CLIENT_LANGUAGE)
+    client.set_cookies(state["cookies"])
+    # Rows persisted before created_at was stored count from now
+    created = datetime.fromisoformat(state["created_at"]) if state.get("created_at") else datetime.utcnow()
+    entry = (client, datetime.utcnow(), created, state["cookies"])
+    _sessions.put(session_id, entry)
+    return entry
 
 
-def _cleanup_sessions():
-    """Remove expired sessions."""
-    now = datetime.utcnow()
-    expired = [
-        sid for sid, (_, created) in _sessions.items()
-        if now - created > timedelta(minutes=SESSION_TTL_MINUTES)
-    ]
-    for sid in expired:
-        _sessions.pop(sid, None)
-
-    if len(_sessions) > MAX_SESSIONS:
-        sorted_sessions = sorted(_sessions.items(), key=lambda x: x[1][1])
-        for sid, _ in sorted_sessions[:len(_sessions) - MAX_SESSIONS]:
-            _sessions.pop(sid, None)
-
-
-def _get_session(session_id: str):
-    """Get Twitter session by ID, or raise 404."""
-    _cleanup_sessions()
-    entry = _sessions.get(session_id)
-    if not entry:
+def _forget_session(session_id: str):
+    _sessions.pop(session_id)
+    _session_semaphores.pop(session_id, None)
+
+
+async def _drop_session(session_id: str):
+    _forget_session(session_id)
+    await asyncio.to_thread(session_store.delete, SESSION_NAMESPACE, session_id)
+
+
+async def _get_session(session_id: str):
+    """Get Twitter session by ID (sliding TTL, absolute max age), or raise 404/410."""
+    entry = _sessions.get(session_id) or await _load_session(session_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Session not found or expired")
-    client, created = entry
-    if datetime.utcnow() - created > timedelta(minutes=SESSION_TTL_MINUTES):
-        _sessions.pop(session_id, None)
+
+    client, store_touched, created, persisted = entry
+    now = datetime.utcnow()
+    if now - created > SESSION_MAX_AGE:
+        await _drop_session(session_id)
         raise HTTPException(status_code=410, detail="Session expired")
+    # X rotates ct0 and friends - persist them so a rehydrated client has the current ones
+    cookies = client.get_cookies()
+    rotated = cookies != persisted
+    if rotated or now - store_touched > STORE_TOUCH_INTERVAL:
+        found = await asyncio.to_thread(
+            session_store.touch, SESSION_NAMESPACE, session_id,
+            ttl_seconds=_store_ttl_seconds(created),
+            state={"cookies": cookies, "created_at": created.isoformat()} if rotated else None,
+        )
+        if not found:
+            # Disconnected on another worker (or expired in the store)
+            _forget_session(session_id)
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+        _sessions.put(session_id, (client, now, created, cookies))
     return client
 
 
@@ -77,10 +186,16 @@ class TwitterAuthResponse(BaseModel):
 class TwitterFetchRequest(BaseModel):
     session_id: str
     timeline_type: str = "following"  # "following" or "for_you"
+    list_id: Optional[str] = None  # read this list instead of the home timeline
+    user_id: Optional[str] = None  # read this user's tweets instead of the home timeline
     max_tweets: int = 50
     include_retweets: bool = True
     include_replies: bool = False
     expand_threads: bool = True
+    since_id: Optional[str] = None  # stop at tweets we already have
+    cursor: Optional[str] = None  # next_cursor of a previous response
+    skip_seen: bool = False  # skip tweets this session already returned for the same timeline
+    seen_filter: Optional[str] = None  # seen_filter token of a previous response (implies skip_seen)
 
 
 class Tweet(BaseModel):
@@ -96,6 +211,27 @@ class TwitterFetchResponse(BaseModel):
     success: bool
     tweets: list[Tweet] = []
     fetched_count: int = 0
+    next_cursor: Optional[str] = None
+    seen_filter: Optional[str] = None
+    seen_skipped: int = 0
+    error: Optional[str] = None
+
+
+class TwitterBatchRequest(BaseModel):
+    jobs: list[TwitterFetchRequest]
+
+
+class TwitterBatchItem(BaseModel):
+    job_index: int
+    session_id: str
+    source: str  # "following", "for_you", "list:<id>" or "user:<id>"
+    success: bool
+    tweets: list[Tweet] = []
+    fetched_count: int = 0
+    duplicates_skipped: int = 0
+    next_cursor: Optional[str] = None
+    seen_filter: Optional[str] = None
+    seen_skipped: int = 0
     error: Optional[str] = None
 
 
@@ -127,7 +263,7 @@ async def twitter_auth(request: TwitterAuthRequest):
     try:
         from twikit import Client
 
-        client = Client("en-US")
+        client = Client(CLIENT_LANGUAGE)
 
         if request.auth_token and request.ct0:
             # Cookie-based auth (preferred)
@@ -157,8 +293,7 @@ async def twitter_auth(request: TwitterAuthRequest):
 
         # Cache session
         session_id = str(uuid.uuid4())
-        _cleanup_sessions()
-        _sessions[session_id] = (client, datetime.utcnow())
+        await _save_session(session_id, client)
 
         return TwitterAuthResponse(
             success=True,
@@ -182,38 +317,16 @@ async def twitter_auth(request: TwitterAuthRequest):
 async def twitter_fetch_timeline(request: TwitterFetchRequest):
     """Fetch tweets from X/Twitter timeline."""
     try:
-        client = _get_session(request.session_id)
-
-        # Human-like delay
-        await asyncio.sleep(random.uniform(1.0, 3.0))
-
-        # Fetch timeline
-        if request.timeline_type == "for_you":
-            raw_tweets = await client.get_timeline(count=request.max_tweets)
-        else:
-            raw_tweets = await client.get_latest_timeline(count=request.max_tweets)
-
-        tweets = []
-        for tweet_data in raw_tweets:
-            try:
-                tweet = _parse_tweet(tweet_data, request)
-                if tweet:
-                    tweets.append(tweet)
-            except Exception:
-                continue
-
-            # Rate limit awareness
-            if len(tweets) % 20 == 0 and len(tweets) > 0:
-                await asyncio.sleep(random.uniform(0.5, 1.5))
-
-        # Thread expansion
-        if request.expand_threads and tweets:
-            tweets = await _expand_threads(client, tweets, raw_tweets)
+        client = await _get_session(request.session_id)
+        result = await _collect_timeline(client, request)
 
         return TwitterFetchResponse(
             success=True,
-            tweets=tweets,
-            fetched_count=len(tweets),
+            tweets=result.tweets,
+            fetched_count=len(result.tweets),
+            next_cursor=result.next_cursor,
+            seen_filter=result.seen_filter,
+            seen_skipped=result.seen_skipped,
         )
 
     except HTTPException:
@@ -222,13 +335,46 @@ async def twitter_fetch_timeline(request: TwitterFetchRequest):
         return TwitterFetchResponse(success=False, error=str(e))
 
 
+@router.post("/timeline/batch")
+async def twitter_fetch_timeline_batch(request: TwitterBatchRequest):
+    """
+    Fetch several timelines / lists / user feeds, possibly across accounts.
+    Jobs run concurrently (bounded per account, calls go through each account's
+    governor) and stream back as NDJSON, one TwitterBatchItem per line, in
+    completion order. Tweets already sent by an earlier job are dropped.
+    """
+    if len(request.jobs) > TIMELINE_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=422, detail=f"At most {TIMELINE_BATCH_MAX_JOBS} jobs per batch")
+
+    async def stream():
+        seen: set[str] = set()
+        tasks = [
+            asyncio.create_task(_fetch_batch_job(index, job))
+            for index, job in enumerate(request.jobs)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                unique = [tweet for tweet in item.tweets if tweet.external_id not in seen]
+                seen.update(tweet.external_id for tweet in unique)
+                item.duplicates_skipped = len(item.tweets) - len(unique)
+                item.tweets = unique
+                item.fetched_count = len(unique)
+                yield item.model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/test", response_model=TwitterTestResponse)
 async def twitter_test(request: TwitterTestRequest):
     """Test X/Twitter connection."""
     try:
-        client = _get_session(request.session_id)
+        client = await _get_session(request.session_id)
 
-        user = await client.user()
+        user = await _governed(request.session_id, client.user)
         username = user.screen_name or user.name or "X User"
 
         return TwitterTestResponse(success=True, username=username)
@@ -241,20 +387,179 @@ async def twitter_test(request: TwitterTestRequest):
 
 @router.post("/disconnect", response_model=TwitterDisconnectResponse)
 async def twitter_disconnect(request: TwitterDisconnectRequest):
-    """Remove Twitter session from cache."""
-    _sessions.pop(request.session_id, None)
+    """Remove Twitter session from cache and session store."""
+    await _drop_session(request.session_id)
     return TwitterDisconnectResponse(success=True)
 
 
+def get_stats() -> dict:
+    """Session and rate governor metrics for /metrics."""
+    return {
+        "sessions": _sessions.stats(),
+        "account_governor": _account_governor.stats(),
+        "thread_cache": _thread_cache.stats(),
+        "seen_filters": _seen_filters.stats(),
+    }
+
+
 # =============================================================================
 # Helpers
 # =============================================================================
 
-def _parse_tweet(tweet_data, request: TwitterFetchRequest) -> Optional[Tweet]:
-    """Parse a raw tweet object into our model."""
+async def _governed(session_id: str, call, *args, **kwargs):
+    """Run one outbound twikit call under the account's rate governor (429 if the wait is too long)."""
+    try:
+        await _account_governor.acquire(session_id, max_wait=GOVERNOR_MAX_WAIT_SECONDS)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e.retry_after, "X rate limit for this account, try again later")
+    try:
+        result = await call(*args, **kwargs)
+    except Exception as e:
+        if _is_rate_limit_error(e):
+            reset = getattr(e, "rate_limit_reset", None)
+            retry_after = reset - time.time() if reset else None
+            _account_governor.report_blocked(session_id, retry_after if retry_after and retry_after > 0 else None)
+        raise
+    _account_governor.report_success(session_id)
+    return result
+
+
+def _timeline_source(request: TwitterFetchRequest) -> str:
+    if request.list_id:
+        return f"list:{request.list_id}"
+    if request.user_id:
+        return f"user:{request.user_id}"
+    return "for_you" if request.timeline_type == "for_you" else "following"
+
+
+class _TimelineResult(NamedTuple):
+    tweets: list[Tweet]
+    next_cursor: Optional[str]
+    seen_filter: Optional[str]
+    seen_skipped: int
+
+
+async def _collect_timeline(client, request: TwitterFetchRequest) -> _TimelineResult:
+    """Fetch, parse and (optionally) thread-merge one timeline, skipping already-seen tweets."""
+    seen_key = (request.session_id, _timeline_source(request))
+    seen: Optional[SeenFilter] = None
+    if request.skip_seen or request.seen_filter:
+        seen = resolve_seen_filter(request.seen_filter, _seen_filters.get(seen_key))
+
+    raw_tweets, next_cursor = await _fetch_timeline(request.session_id, client, request)
+
+    tweets = []
+    skipped = 0
+    for tweet_data in raw_tweets:
+        try:
+            tweet = _parse_tweet(tweet_data, request, seen)
+            if tweet:
+                tweets.append(tweet)
+            elif seen is not None and str(getattr(tweet_data, "id", "")) in seen:
+                skipped += 1
+        except Exception:
+            continue
+
+    # Thread expansion
+    delivered_ids = {tweet.external_id for tweet in tweets}
+    if request.expand_threads and tweets:
+        tweets, thread_ids = await _expand_threads(request.session_id, client, tweets, raw_tweets)
+        delivered_ids |= thread_ids
+
+    if seen is None:
+        return _TimelineResult(tweets, next_cursor, None, 0)
+    # Every constituent of a merged thread, so its continuation tweets don't come back
+    seen.update(delivered_ids | {tweet.external_id for tweet in tweets})
+    _seen_filters.put(seen_key, seen)
+    return _TimelineResult(tweets, next_cursor, seen.to_token(), skipped)
+
+
+async def _fetch_batch_job(index: int, job: TwitterFetchRequest) -> TwitterBatchItem:
+    """Run one batch job within its account's concurrency limit."""
+    source = _timeline_source(job)
+    try:
+        client = await _get_session(job.session_id)
+        semaphore = _session_semaphores.setdefault(job.session_id, asyncio.Semaphore(TIMELINE_BATCH_CONCURRENCY))
+        async with semaphore:
+            result = await _collect_timeline(client, job)
+        return TwitterBatchItem(
+            job_index=index, session_id=job.session_id, source=source, success=True,
+            tweets=result.tweets, fetched_count=len(result.tweets), next_cursor=result.next_cursor,
+            seen_filter=result.seen_filter, seen_skipped=result.seen_skipped,
+        )
+    except HTTPException as e:
+        return TwitterBatchItem(job_index=index, session_id=job.session_id, source=source,
+                                success=False, error=str(e.detail))
+    except Exception as e:
+        print(f"[TWITTER] Batch job {index} ({source}) failed: {type(e).__name__}: {e}")
+        return TwitterBatchItem(job_index=index, session_id=job.session_id, source=source,
+                                success=False, error=str(e))
+
+
+async def _fetch_timeline(session_id: str, client, request: TwitterFetchRequest) -> tuple[list, Optional[str]]:
+    """
+    Read timeline pages lazily until max_tweets or the since_id boundary.
+    Home "following" and list timelines are chronological, so reaching since_id
+    ends the fetch (and no cursor is returned). "for_you" is ranked and user
+    timelines lead with the pinned tweet, so there known tweets are skipped and
+    the fetch ends after a page with nothing new.
+    Pages are requested no larger than the tweets still wanted and consumed
+    whole; the returned cursor continues after the last page read.
+    """
+    if request.list_id:
+        fetch = partial(client.get_list_tweets, request.list_id)
+    elif request.user_id:
+        fetch = partial(client.get_user_tweets, request.user_id, "Tweets")
+    elif request.timeline_type == "for_you":
+        fetch = client.get_timeline
+    else:
+        fetch = client.get_latest_timeline
+    since_id = int(request.since_id) if request.since_id and request.since_id.isdigit() else None
+    chronological = not request.user_id and _timeline_source(request) != "for_you"
+    page_size = INCREMENTAL_PAGE_SIZE if since_id is not None else TIMELINE_PAGE_SIZE
+
+    collected: list = []
+    cursor = request.cursor
+    for _ in range(MAX_TIMELINE_PAGES):
+        count = min(request.max_tweets - len(collected), page_size)
+        page = await _governed(session_id, fetch, count=count, cursor=cursor)
+        new_on_page = 0
+        for tweet in page:
+            tweet_id = str(getattr(tweet, "id", ""))
+            if since_id is not None and tweet_id.isdigit() and int(tweet_id) <= since_id:
+                if chronological:
+                    return collected, None
+                continue
+            # Pages are kept whole (X may return a few more than count), so the
+            # cursor never skips tweets left over on a partly read page
+            collected.append(tweet)
+            new_on_page += 1
+
+        if not len(page) or not page.next_cursor:
+            return collected, None
+        if since_id is not None and not new_on_page:
+            return collected, None
+        cursor = page.next_cursor
+        if len(collected) >= request.max_tweets:
+            break
+
+    return collected, cursor or None
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """twikit raises TooManyRequests for HTTP 429 (imported lazily, like the rest of twikit)."""
+    from twikit.errors import TooManyRequests
+
+    return isinstance(error, TooManyRequests)
+
+
+def _parse_tweet(tweet_data, request: TwitterFetchRequest, seen: Optional[SeenFilter] = None) -> Optional[Tweet]:
+    """Parse a raw tweet object into our model (None for filtered or already-seen tweets)."""
     try:
         # twikit Tweet object has attributes
         tweet_id = str(getattr(tweet_data, "id", ""))
+        if seen is not None and tweet_id in seen:
+            return None
         text = getattr(tweet_data, "text", "") or getattr(tweet_data, "full_text", "") or ""
         user = getattr(tweet_data, "user", None)
         author_name = ""
@@ -306,19 +611,159 @@ def _parse_tweet(tweet_data, request: TwitterFetchRequest) -> Optional[Tweet]:
         return None
 
 
-async def _expand_threads(client, tweets: list[Tweet], raw_tweets) -> list[Tweet]:
-    """Expand thread tweets by combining replies in the same conversation."""
-    try:
-        # Group tweets by conversation - simple approach: combine sequential tweets from same author
-        # that are replies to each other
-        thread_map: Dict[str, list[Tweet]] = {}
-        standalone = []
+_THREAD_HINT_RE = re.compile(r"\U0001F9F5|\(1/\d*\)|(?:^|\s)1/\d*(?:\s|$)|\bthread\b", re.IGNORECASE)
+
+
+class _ThreadSegment(NamedTuple):
+    tweet_id: str
+    text: str
+    created_at: Optional[str] = None
+
+
+def _legacy(tweet_data) -> dict:
+    legacy = getattr(tweet_data, "_legacy", None)
+    return legacy if isinstance(legacy, dict) else {}
+
+
+def _reply_parent_id(tweet_data) -> Optional[str]:
+    parent = getattr(tweet_data, "in_reply_to", None) or getattr(tweet_data, "in_reply_to_tweet_id", None)
+    return str(parent) if parent else None
 
+
+def _author_id(tweet_data) -> Optional[str]:
+    user = getattr(tweet_data, "user", None)
+    return str(getattr(user, "id", "") or "") or None
+
+
+def _conversation_id(tweet_data) -> str:
+    conversation = getattr(tweet_data, "conversation_id", None) or _legacy(tweet_data).get("conversation_id_str")
+    return str(conversation or _reply_parent_id(tweet_data) or getattr(tweet_data, "id", ""))
+
+
+def _is_self_reply(tweet_data) -> bool:
+    if not _reply_parent_id(tweet_data):
+        return False
+    reply_user = _legacy(tweet_data).get("in_reply_to_user_id_str")
+    return reply_user is not None and reply_user == _author_id(tweet_data)
+
+
+def _tweet_text(tweet_data) -> str:
+    return getattr(tweet_data, "text", "") or getattr(tweet_data, "full_text", "") or ""
+
+
+def _segment(tweet_data) -> _ThreadSegment:
+    created_at = getattr(tweet_data, "created_at", None)
+    return _ThreadSegment(str(getattr(tweet_data, "id", "")), _tweet_text(tweet_data),
+                          str(created_at) if created_at else None)
+
+
+def _segment_sort_key(segment: _ThreadSegment):
+    # Snowflake IDs grow with time
+    return int(segment.tweet_id) if segment.tweet_id.isdigit() else 0
+
+
+async def _fetch_thread(session_id: str, client, conversation_id: str,
+                        author_id: Optional[str]) -> list[_ThreadSegment]:
+    """Root tweet plus the author's continuation, as returned by get_tweet_by_id."""
+    cached = _thread_cache.get((session_id, conversation_id))
+    if cached is not None:
+        return cached
+    root = await _governed(session_id, client.get_tweet_by_id, conversation_id)
+    segments = [_segment(root)]
+    for part in getattr(root, "thread", None) or []:
+        if author_id is None or _author_id(part) == author_id:
+            segments.append(_segment(part))
+    _thread_cache.put((session_id, conversation_id), segments)
+    return segments
+
+
+async def _expand_threads(session_id: str, client, tweets: list[Tweet],
+                          raw_tweets) -> tuple[list[Tweet], set[str]]:
+    """
+    Merge self-threads into one item per conversation. Returns the items and
+    the IDs of every tweet merged into a thread.
+    Self-replies on the timeline (and roots that announce a thread) mark a
+    conversation as a thread; its root and continuation are fetched concurrently
+    within THREAD_FETCH_BUDGET / THREAD_FETCH_TIMEOUT_SECONDS and cached per
+    session. Threads that can't be fetched in time are merged from the tweets
+    already on the timeline.
+    """
+    try:
+        raw_by_id = {str(getattr(t, "id", "")): t for t in raw_tweets}
+
+        # conversation -> author and self-thread segments seen on the timeline
+        local_segments: dict[str, list[_ThreadSegment]] = {}
+        thread_authors: dict[str, Optional[str]] = {}
+        for raw in raw_tweets:
+            conversation_id = _conversation_id(raw)
+            is_root = conversation_id == str(getattr(raw, "id", ""))
+            if _is_self_reply(raw) or (is_root and _THREAD_HINT_RE.search(_tweet_text(raw))):
+                thread_authors.setdefault(conversation_id, _author_id(raw))
+        for raw in raw_tweets:
+            conversation_id = _conversation_id(raw)
+            if conversation_id in thread_authors and _author_id(raw) == thread_authors[conversation_id]:
+                local_segments.setdefault(conversation_id, []).append(_segment(raw))
+
+        if not thread_authors:
+            return tweets, set()
+
+        # Fetch full threads for the first conversations on the timeline, within budget
+        to_fetch: list[str] = []
+        for tweet in tweets:
+            raw = raw_by_id.get(tweet.external_id)
+            conversation_id = _conversation_id(raw) if raw is not None else None
+            if conversation_id in thread_authors and conversation_id not in to_fetch:
+                to_fetch.append(conversation_id)
+        to_fetch = to_fetch[:THREAD_FETCH_BUDGET]
+
+        semaphore = asyncio.Semaphore(THREAD_FETCH_CONCURRENCY)
+
+        async def fetch(conversation_id: str):
+            async with semaphore:
+                return await _fetch_thread(session_id, client, conversation_id, thread_authors[conversation_id])
+
+        tasks = {asyncio.create_task(fetch(cid)): cid for cid in to_fetch}
+        fetched: dict[str, list[_ThreadSegment]] = {}
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=THREAD_FETCH_TIMEOUT_SECONDS)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    fetched[tasks[task]] = task.result()
+
+        # One merged item per thread, at the position of its first timeline tweet
+        merged: list[Tweet] = []
+        emitted: set[str] = set()
+        thread_ids: set[str] = set()
         for tweet in tweets:
-            # For now, keep all tweets as standalone
-            # Thread expansion would require additional API calls per tweet
-            standalone.append(tweet)
+            raw = raw_by_id.get(tweet.external_id)
+            conversation_id = _conversation_id(raw) if raw is not None else None
+            if conversation_id not in thread_authors:
+                merged.append(tweet)
+                continue
+            if conversation_id in emitted:
+                continue
+            emitted.add(conversation_id)
 
-        return standalone
-    except Exception:
-        return tweets
+            segments = {seg.tweet_id: seg for seg in local_segments.get(conversation_id, [])}
+            segments.update((seg.tweet_id, seg) for seg in fetched.get(conversation_id, []))
+            ordered = sorted(segments.values(), key=_segment_sort_key)
+            if len(ordered) < 2:
+                merged.append(tweet)
+                continue
+
+            thread_ids.update(seg.tweet_id for seg in ordered)
+            root = ordered[0]
+            content = "\n\n".join(seg.text.strip() for seg in ordered if seg.text.strip())
+            merged.append(tweet.model_copy(update={
+                "external_id": root.tweet_id,
+                "title": root.text[:120].split("\n")[0] or tweet.title,
+                "content": content,
+                "url": tweet.url.rsplit("/", 1)[0] + f"/{root.tweet_id}",
+                "published_at": root.created_at or tweet.published_at,
+            }))
+        return merged, thread_ids
+    except Exception as e:
+        print(f"[TWITTER] Thread expansion failed: {type(e).__name__}: {e}")
+        return tweets, set()
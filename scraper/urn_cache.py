@@ -0,0 +1,89 @@
+"""
+LinkedIn URN Cache
+Persistent public_id -> fsd_profile URN map (SQLite) with an in-memory front.
+A member's profile URN never changes, so entries don't expire; they are only
+dropped when LinkedIn stops resolving them.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+URN_CACHE_PATH = os.getenv("LINKEDIN_URN_CACHE_PATH", os.path.join(DATA_DIR, "linkedin_urns.sqlite3"))
+
+
+class UrnCache:
+    """public_id -> profile URN, read-through memory dict over a SQLite table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._memory: dict[str, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profile_urns ("
+                "public_id TEXT PRIMARY KEY, urn TEXT NOT NULL, resolved_at REAL NOT NULL)"
+            )
+            self._memory.update(self._conn.execute("SELECT public_id, urn FROM profile_urns"))
+        return self._conn
+
+    @staticmethod
+    def _key(public_id: str) -> str:
+        return public_id.strip().strip("/").lower()
+
+    def get(self, public_id: str) -> Optional[str]:
+        key = self._key(public_id)
+        with self._lock:
+            self._db()
+            urn = self._memory.get(key)
+            if urn:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return urn
+
+    def put(self, public_id: str, urn: str):
+        key = self._key(public_id)
+        with self._lock:
+            db = self._db()
+            if self._memory.get(key) == urn:
+                return
+            self._memory[key] = urn
+            db.execute(
+                "INSERT OR REPLACE INTO profile_urns (public_id, urn, resolved_at) VALUES (?, ?, ?)",
+                (key, urn, time.time()),
+            )
+            db.commit()
+            self.writes += 1
+
+    def invalidate(self, public_id: str):
+        key = self._key(public_id)
+        with self._lock:
+            db = self._db()
+            self._memory.pop(key, None)
+            db.execute("DELETE FROM profile_urns WHERE public_id = ?", (key,))
+            db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+urn_cache = UrnCache(URN_CACHE_PATH)
@@ -0,0 +1,268 @@
+"""
+Async LinkedIn Voyager Client
+Native asyncio client for the Voyager endpoints used by linkedin_service,
+built on httpx with a connection pool shared by all sessions.
+Each session keeps its own cookie jar (li_at, JSESSIONID) and CSRF token.
+"""
+
+import random
+from typing import Optional
+from urllib.parse import quote, urlparse
+
+import httpx
+
+from rate_limiter import RateLimiter
+
+API_BASE_URL = "https://www.linkedin.com/voyager/api"
+
+# Statuses LinkedIn uses for throttling / bot blocking
+RATE_LIMIT_STATUSES = (429, 999)
+
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+REQUEST_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+DEFAULT_HEADERS = {
+    "user-agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "accept-language": "en-AU,en-GB;q=0.9,en-US;q=0.8,en;q=0.7",
+    "x-li-lang": "en_US",
+    "x-restli-protocol-version": "2.0.0",
+}
+
+NORMALIZED_JSON = "application/vnd.linkedin.normalized+json+2.1"
+
+# Same limits linkedin-api uses for feed/profile-update pagination
+MAX_UPDATE_COUNT = 100
+MAX_REPEATED_REQUESTS = 200
+MAX_SEARCH_PAGES = 10
+
+SEARCH_QUERY_ID = "voyagerSearchDashClusters.b0928897b71bd00a5a7291755dcd64f0"
+
+# Shared pool: every VoyagerClient sends through this transport
+_transport: Optional[httpx.AsyncHTTPTransport] = None
+
+
+def _get_transport() -> httpx.AsyncHTTPTransport:
+    global _transport
+    if _transport is None:
+        _transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            http2=False,
+        )
+    return _transport
+
+
+async def close_transport():
+    """Close the shared connection pool (app shutdown)."""
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
+
+
+class VoyagerError(Exception):
+    """Non-recoverable Voyager response (throttled, blocked, logged out)."""
+
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"Voyager API returned status {status_code}")
+        self.status_code = status_code
+
+    @property
+    def is_rate_limited(self) -> bool:
+        return self.status_code in RATE_LIMIT_STATUSES
+
+
+class VoyagerClient:
+    """Per-session async Voyager client sharing the process-wide connection pool."""
+
+    def __init__(self, cookies: dict[str, str], headers: Optional[dict[str, str]] = None):
+        cookies = dict(cookies)
+        jsessionid = cookies.get("JSESSIONID")
+        if not jsessionid:
+            # Any ajax:<n> value works as long as the cookie and csrf-token header match
+            jsessionid = f"ajax:{random.randint(10**18, 10**19 - 1)}"
+            cookies["JSESSIONID"] = f'"{jsessionid}"'
+
+        self._http = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            transport=_get_transport(),
+            headers={**DEFAULT_HEADERS, **(headers or {}), "csrf-token": jsessionid.strip('"')},
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=False,
+        )
+        for name, value in cookies.items():
+            self._http.cookies.set(name, value, domain=".linkedin.com", path="/")
+
+        self._limiter: Optional[RateLimiter] = None
+        self._limiter_key = ""
+        self._limiter_max_wait: Optional[float] = None
+
+    def use_limiter(self, limiter: RateLimiter, key: str, max_wait: Optional[float] = None):
+        """
+        Gate every outbound request on `limiter[key]` and feed it 429/999 responses.
+        Requests that would wait longer than max_wait raise RateLimitExceeded.
+        """
+        self._limiter = limiter
+        self._limiter_key = key
+        self._limiter_max_wait = max_wait
+
+    @classmethod
+    def from_linkedin_api(cls, api) -> "VoyagerClient":
+        """Reuse the cookies and headers of an authenticated linkedin_api.Linkedin instance."""
+        session = api.client.session
+        cookies = {c.name: c.value for c in session.cookies if "linkedin.com" in (c.domain or "")}
+        headers = {k.lower(): v for k, v in session.headers.items() if k.lower() != "csrf-token"}
+        return cls(cookies, headers)
+
+    def cookies(self) -> dict[str, str]:
+        """Current session cookies (li_at, JSESSIONID, ...)."""
+        return {cookie.name: cookie.value for cookie in self._http.cookies.jar}
+
+    def to_state(self) -> dict:
+        """Serializable session state (cookies + headers) for the session store."""
+        headers = {k: v for k, v in self._http.headers.items() if k.lower() != "csrf-token"}
+        return {"cookies": self.cookies(), "headers": headers}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "VoyagerClient":
+        return cls(state.get("cookies", {}), state.get("headers"))
+
+    async def fetch(self, uri: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> httpx.Response:
+        """GET a Voyager URI, raising VoyagerError on throttling or a lost session."""
+        if self._limiter:
+            await self._limiter.acquire(self._limiter_key, max_wait=self._limiter_max_wait)
+        res = await self._http.get(uri, params=params, headers=headers)
+        if res.status_code in RATE_LIMIT_STATUSES:
+            if self._limiter:
+                retry_after = res.headers.get("retry-after", "")
+                self._limiter.report_blocked(
+                    self._limiter_key, float(retry_after) if retry_after.isdigit() else None
+                )
+            raise VoyagerError(res.status_code, f"LinkedIn rate limit (status {res.status_code})")
+        if self._limiter:
+            self._limiter.report_success(self._limiter_key)
+        if res.is_redirect and "/login" in res.headers.get("location", ""):
+            raise VoyagerError(401, "LinkedIn session expired")
+        return res
+
+    # -------------------------------------------------------------------------
+    # Endpoints
+    # -------------------------------------------------------------------------
+
+    async def get_user_profile(self) -> dict:
+        """Profile of the authenticated user (/me)."""
+        res = await self.fetch("/me")
+        return res.json()
+
+    async def get_profile(self, public_id: str) -> dict:
+        """Top card of a profile by public_id (/identity/dash/profiles)."""
+        res = await self.fetch(
+            f"/identity/dash/profiles?q=memberIdentity&memberIdentity={quote(public_id, safe='')}"
+            f"&decorationId=com.linkedin.voyager.dash.deco.identity.profile.WebTopCardCore-19"
+        )
+        return res.json()
+
+    async def get_profile_updates(self, profile_urn: str, count: int, start: int = 0,
+                                  pagination_token: Optional[str] = None) -> dict:
+        """One page of a member's shares (/identity/profileUpdatesV2)."""
+        params = {
+            "count": count,
+            "start": start,
+            "q": "memberShareFeed",
+            "moduleKey": "member-shares:phone",
+            "includeLongTermHistory": True,
+            "profileUrn": profile_urn,
+        }
+        if pagination_token:
+            params["paginationToken"] = pagination_token
+        res = await self.fetch("/identity/profileUpdatesV2", params=params)
+        return res.json()
+
+    async def get_feed_page(self, count: int, start: int = 0, exclude_promoted_posts: bool = True) -> tuple[list, int]:
+        """
+        One page of the home feed, parsed like linkedin_api.Linkedin.get_feed_posts.
+        Returns (posts, number of feed updates consumed) - use the latter to advance start.
+        """
+        from linkedin_api.utils.helpers import (
+            get_list_posts_sorted_without_promoted,
+            parse_list_raw_posts,
+            parse_list_raw_urns,
+        )
+
+        res = await self.fetch(
+            "/feed/updatesV2",
+            params={"count": str(count), "q": "chronFeed", "start": start},
+            headers={"accept": NORMALIZED_JSON},
+        )
+        data = res.json()
+        posts = parse_list_raw_posts(data.get("included", {}), "https://www.linkedin.com")
+        urns = parse_list_raw_urns(data.get("data", {}).get("*elements", []))
+        if exclude_promoted_posts:
+            posts = get_list_posts_sorted_without_promoted(urns, posts)
+        return posts, len(urns)
+
+    async def get_feed_posts(self, limit: int = -1, offset: int = 0, exclude_promoted_posts: bool = True) -> list:
+        """Home feed posts, paging like linkedin_api.Linkedin.get_feed_posts."""
+        if limit == -1:
+            limit = MAX_UPDATE_COUNT
+        posts: list = []
+        consumed = 0
+        for _ in range(MAX_REPEATED_REQUESTS):
+            count = min(MAX_UPDATE_COUNT, limit - consumed)
+            if count <= 0:
+                break
+            page, page_consumed = await self.get_feed_page(count, offset + consumed, exclude_promoted_posts)
+            posts.extend(page)
+            consumed += page_consumed
+            if not page or not page_consumed:
+                break
+        return posts
+
+    async def search_people(self, keywords: str, limit: int = 10) -> list[dict]:
+        """People search via the searchDashClusters GraphQL query."""
+        results: list[dict] = []
+        for _ in range(MAX_SEARCH_PAGES):
+            if len(results) >= limit:
+                break
+            start = len(results)
+            res = await self.fetch(
+                f"/graphql?variables=(start:{start},origin:GLOBAL_SEARCH_HEADER,"
+                f"query:(keywords:{quote(keywords, safe='')},"
+                f"flagshipSearchIntent:SEARCH_SRP,"
+                f"queryParameters:List((key:resultType,value:List(PEOPLE))),"
+                f"includeFiltersInResponse:false))&queryId={SEARCH_QUERY_ID}"
+            )
+            clusters = (res.json().get("data") or {}).get("searchDashClustersByAll") or {}
+            new_results = [
+                _parse_search_entity(item["item"]["entityResult"])
+                for cluster in clusters.get("elements", [])
+                for item in cluster.get("items", [])
+                if (item.get("item") or {}).get("entityResult")
+            ]
+            if not new_results:
+                break
+            results.extend(new_results)
+        return results[:limit]
+
+
+def _parse_search_entity(entity: dict) -> dict:
+    """Flatten a search EntityResultViewModel into the linkedin_api search_people shape."""
+    navigation_url = entity.get("navigationUrl") or ""
+    path = urlparse(navigation_url).path
+    public_id = path.split("/in/", 1)[1].strip("/") if "/in/" in path else ""
+    entity_urn = entity.get("entityUrn") or ""
+    return {
+        "urn_id": entity_urn.split("(")[-1].split(",")[0].split(":")[-1] if entity_urn else None,
+        "public_id": public_id,
+        "distance": (entity.get("entityCustomTrackingInfo") or {}).get("memberDistance"),
+        "jobtitle": (entity.get("primarySubtitle") or {}).get("text"),
+        "location": (entity.get("secondarySubtitle") or {}).get("text"),
+        "name": (entity.get("title") or {}).get("text"),
+    }
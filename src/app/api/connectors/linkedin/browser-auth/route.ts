@@ -78,7 +78,10 @@ export async function POST(request: Request) {
       return NextResponse.json({
         success: false,
         state: "captcha",
-        screenshot: result.screenshot,
+        screenshotUrl:
+          result.screenshotUrl && result.sessionId
+            ? `/api/connectors/linkedin/browser-auth/screenshot/${result.sessionId}`
+            : undefined,
         error: result.error || "LinkedIn wymaga CAPTCHA",
       });
     }
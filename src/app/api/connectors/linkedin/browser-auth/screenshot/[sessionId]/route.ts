@@ -0,0 +1,35 @@
+import { NextRequest, NextResponse } from "next/server";
+import { getCurrentUser } from "@/lib/auth";
+import { linkedInBrowserLoginScreenshot } from "@/lib/connectors/linkedin/client";
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ sessionId: string }> }
+) {
+  try {
+    const session = await getCurrentUser();
+    if (!session) {
+      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+    }
+
+    const { sessionId } = await params;
+    const screenshot = await linkedInBrowserLoginScreenshot(sessionId);
+
+    if (!screenshot) {
+      return NextResponse.json({ error: "Zrzut ekranu wygasł" }, { status: 404 });
+    }
+
+    return new NextResponse(screenshot.body, {
+      headers: {
+        "Content-Type": screenshot.contentType,
+        "Cache-Control": "no-store",
+      },
+    });
+  } catch (error) {
+    console.error("LinkedIn browser auth screenshot error:", error);
+    return NextResponse.json(
+      { error: "Nie udało się pobrać zrzutu ekranu" },
+      { status: 500 }
+    );
+  }
+}
@@ -66,7 +66,9 @@ export async function POST(request: Request) {
       success: false,
       state: result.state,
       error: result.error || "Weryfikacja nie powiodła się",
-      screenshot: result.screenshot,
+      screenshotUrl: result.screenshotUrl
+        ? `/api/connectors/linkedin/browser-auth/screenshot/${sessionId}`
+        : undefined,
     });
   } catch (error) {
     console.error("LinkedIn browser auth verify error:", error);
@@ -3,8 +3,8 @@ import { Prisma } from "@prisma/client";
 import { prisma } from "@/lib/prisma";
 import { getCurrentUser } from "@/lib/auth";
 import {
-  scrapeArticlesList,
-  scrapeUrl,
+  scrapeArticlesListQueued,
+  scrapeUrlQueued,
   checkScraperHealth,
   SourceConfig,
 } from "@/lib/scrapeService";
@@ -125,7 +125,7 @@ export async function GET() {
               continue;
             }
 
-            const articlesResult = await scrapeArticlesList(source.url, 20, source.config);
+            const articlesResult = await scrapeArticlesListQueued(source.url, 20, source.config);
 
             if (!articlesResult.success) {
               send({ type: "source_done", sourceId: source.id, sourceName: source.name, newCount: 0, skipCount: 0, errorCount: 1, error: articlesResult.error });
@@ -156,7 +156,7 @@ export async function GET() {
                   continue;
                 }
 
-                const articleContent = await scrapeUrl(articleInfo.url);
+                const articleContent = await scrapeUrlQueued(articleInfo.url);
                 if (!articleContent.success) {
                   errorCount++;
                   send({ type: "article_error", sourceId: source.id, articleTitle: articleInfo.title, error: articleContent.error });
@@ -264,7 +264,7 @@ async function syncConnectorSource(
 
   try {
     const connector = await getConnector(sourceType as "GMAIL" | "LINKEDIN" | "TWITTER");
-    const items = await connector.fetchItems(fullSource);
+    const items = await connector.fetchItems(fullSource, { priority: "bulk" });
 
     let newCount = 0;
     let skipCount = 0;
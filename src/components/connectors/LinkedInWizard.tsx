@@ -191,7 +191,7 @@ export function LinkedInWizard({
 
       // CAPTCHA
       if (data.state === "captcha") {
-        setCaptchaScreenshot(data.screenshot || null);
+        setCaptchaScreenshot(data.screenshotUrl || null);
         setStep("captcha");
         return;
       }
@@ -955,7 +955,7 @@ export function LinkedInWizard({
             <div className="rounded-xl overflow-hidden border border-border">
               {/* eslint-disable-next-line @next/next/no-img-element */}
               <img
-                src={`data:image/png;base64,${captchaScreenshot}`}
+                src={captchaScreenshot}
                 alt="CAPTCHA screenshot"
                 className="w-full"
               />
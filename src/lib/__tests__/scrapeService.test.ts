@@ -317,6 +317,20 @@ describe("scrapeUrl", () => {
     expect(body.timeout).toBe(60000);
   });
 
+  it("sends the scheduler lane as X-Priority header", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response(JSON.stringify({ success: true, url: "u", html_length: 0, links_count: 0 }), { status: 200 })
+    );
+
+    await scrapeUrl("https://example.com", { priority: "bulk" });
+
+    const callArgs = vi.mocked(global.fetch).mock.calls[0];
+    expect(callArgs[1]!.headers).toEqual({
+      "Content-Type": "application/json",
+      "X-Priority": "bulk",
+    });
+  });
+
   it("returns error result for non-ok HTTP response", async () => {
     vi.mocked(global.fetch).mockResolvedValue(
       new Response("", { status: 500, statusText: "Internal Server Error" })
@@ -331,6 +345,22 @@ describe("scrapeUrl", () => {
     expect(result.error).toBe("HTTP 500: Internal Server Error");
   });
 
+  it("returns retry_after from a 429 response", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response("", {
+        status: 429,
+        statusText: "Too Many Requests",
+        headers: { "Retry-After": "12" },
+      })
+    );
+
+    const result = await scrapeUrl("https://example.com");
+
+    expect(result.success).toBe(false);
+    expect(result.error).toBe("HTTP 429: Too Many Requests");
+    expect(result.retry_after).toBe(12);
+  });
+
   it("returns error result on network failure", async () => {
     vi.mocked(global.fetch).mockRejectedValue(new Error("Connection refused"));
 
@@ -413,6 +443,20 @@ describe("scrapeArticlesList", () => {
     expect(result).toEqual(mockResult);
   });
 
+  it("sends the scheduler lane as X-Priority header", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response(JSON.stringify({ success: true, source_url: "u", articles: [] }), { status: 200 })
+    );
+
+    await scrapeArticlesList("https://blog.example.com", 10, null, "bulk");
+
+    const callArgs = vi.mocked(global.fetch).mock.calls[0];
+    expect(callArgs[1]!.headers).toEqual({
+      "Content-Type": "application/json",
+      "X-Priority": "bulk",
+    });
+  });
+
   it("uses default maxArticles=20 when not specified", async () => {
     vi.mocked(global.fetch).mockResolvedValue(
       new Response(JSON.stringify({ success: true, source_url: "u", articles: [] }), { status: 200 })
@@ -438,6 +482,22 @@ describe("scrapeArticlesList", () => {
     expect(result.error).toBe("HTTP 503: Service Unavailable");
   });
 
+  it("returns retry_after from a 429 response", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response("", {
+        status: 429,
+        statusText: "Too Many Requests",
+        headers: { "Retry-After": "30" },
+      })
+    );
+
+    const result = await scrapeArticlesList("https://example.com");
+
+    expect(result.success).toBe(false);
+    expect(result.articles).toEqual([]);
+    expect(result.retry_after).toBe(30);
+  });
+
   it("returns error result on network failure", async () => {
     vi.mocked(global.fetch).mockRejectedValue(new Error("ECONNREFUSED"));
 
@@ -638,3 +698,194 @@ describe("checkScraperHealth", () => {
     expect(callArgs[1]!.signal).toBeDefined();
   });
 });
+
+// ---------------------------------------------------------------------------
+// enqueueScrapeJob / getScrapeJob
+// ---------------------------------------------------------------------------
+describe("enqueueScrapeJob", () => {
+  let enqueueScrapeJob: typeof import("../scrapeService").enqueueScrapeJob;
+
+  beforeEach(async () => {
+    vi.stubGlobal("fetch", vi.fn());
+    vi.stubEnv("SCRAPER_URL", "http://test-scraper:9000");
+    const mod = await loadModule();
+    enqueueScrapeJob = mod.enqueueScrapeJob;
+  });
+
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    vi.unstubAllEnvs();
+  });
+
+  it("sends POST to /jobs with type, payload and options", async () => {
+    const job = { id: "job-1", type: "articles", status: "queued", priority: 5, attempts: 0 };
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response(JSON.stringify(job), { status: 202 })
+    );
+
+    const result = await enqueueScrapeJob(
+      "articles",
+      { url: "https://example.com", max_articles: 10 },
+      { priority: 5, callbackUrl: "https://app.example.com/api/hook" }
+    );
+
+    expect(result).toEqual(job);
+    expect(global.fetch).toHaveBeenCalledWith(
+      "http://test-scraper:9000/jobs",
+      expect.objectContaining({ method: "POST" })
+    );
+    const body = JSON.parse(vi.mocked(global.fetch).mock.calls[0][1]!.body as string);
+    expect(body).toEqual({
+      type: "articles",
+      payload: { url: "https://example.com", max_articles: 10 },
+      priority: 5,
+      callback_url: "https://app.example.com/api/hook",
+    });
+  });
+
+  it("returns null when the scraper rejects the job", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response(JSON.stringify({ detail: "Unknown job type" }), { status: 400 })
+    );
+
+    expect(await enqueueScrapeJob("scrape", { url: "https://example.com" })).toBeNull();
+  });
+
+  it("returns null on network error", async () => {
+    vi.mocked(global.fetch).mockRejectedValue(new Error("ECONNREFUSED"));
+
+    expect(await enqueueScrapeJob("scrape", { url: "https://example.com" })).toBeNull();
+  });
+});
+
+describe("getScrapeJob", () => {
+  let getScrapeJob: typeof import("../scrapeService").getScrapeJob;
+
+  beforeEach(async () => {
+    vi.stubGlobal("fetch", vi.fn());
+    vi.stubEnv("SCRAPER_URL", "http://test-scraper:9000");
+    const mod = await loadModule();
+    getScrapeJob = mod.getScrapeJob;
+  });
+
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    vi.unstubAllEnvs();
+  });
+
+  it("fetches the job by id", async () => {
+    const job = {
+      id: "job-1",
+      type: "scrape",
+      status: "done",
+      result: { success: true, url: "https://example.com", html_length: 10, links_count: 0 },
+    };
+    vi.mocked(global.fetch).mockResolvedValue(
+      new Response(JSON.stringify(job), { status: 200 })
+    );
+
+    const result = await getScrapeJob("job-1");
+
+    expect(result).toEqual(job);
+    expect(global.fetch).toHaveBeenCalledWith(
+      "http://test-scraper:9000/jobs/job-1",
+      expect.objectContaining({ method: "GET" })
+    );
+  });
+
+  it("returns null for unknown or expired jobs", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(new Response("", { status: 404 }));
+
+    expect(await getScrapeJob("missing")).toBeNull();
+  });
+});
+
+describe("scrapeUrlQueued / scrapeArticlesListQueued", () => {
+  let mod: typeof import("../scrapeService");
+
+  beforeEach(async () => {
+    vi.stubGlobal("fetch", vi.fn());
+    vi.stubEnv("SCRAPER_URL", "http://test-scraper:9000");
+    vi.useFakeTimers();
+    mod = await loadModule();
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+    vi.unstubAllGlobals();
+    vi.unstubAllEnvs();
+  });
+
+  it("enqueues a scrape job and polls until it is done", async () => {
+    const scraped = { success: true, url: "https://example.com/a", html_length: 10, links_count: 0 };
+    vi.mocked(global.fetch)
+      .mockResolvedValueOnce(new Response(JSON.stringify({ id: "job-1", status: "queued" }), { status: 202 }))
+      .mockResolvedValueOnce(new Response(JSON.stringify({ id: "job-1", status: "running" }), { status: 200 }))
+      .mockResolvedValueOnce(
+        new Response(JSON.stringify({ id: "job-1", status: "done", result: scraped }), { status: 200 })
+      );
+
+    const pending = mod.scrapeUrlQueued("https://example.com/a");
+    await vi.runAllTimersAsync();
+
+    expect(await pending).toEqual(scraped);
+    const body = JSON.parse(vi.mocked(global.fetch).mock.calls[0][1]!.body as string);
+    expect(body.type).toBe("scrape");
+    expect(body.payload).toEqual({ url: "https://example.com/a", timeout: 30000 });
+    expect(vi.mocked(global.fetch).mock.calls[2][0]).toBe("http://test-scraper:9000/jobs/job-1");
+  });
+
+  it("returns an error result when the job cannot be enqueued", async () => {
+    vi.mocked(global.fetch).mockResolvedValue(new Response("", { status: 503 }));
+
+    const result = await mod.scrapeUrlQueued("https://example.com/a");
+
+    expect(result.success).toBe(false);
+    expect(result.error).toBe("Failed to enqueue scrape job");
+  });
+
+  it("returns the job error when the job failed without a result", async () => {
+    vi.mocked(global.fetch)
+      .mockResolvedValueOnce(new Response(JSON.stringify({ id: "job-2", status: "queued" }), { status: 202 }))
+      .mockResolvedValueOnce(
+        new Response(JSON.stringify({ id: "job-2", status: "failed", error: "Timeout" }), { status: 200 })
+      );
+
+    const result = await mod.scrapeArticlesListQueued("https://example.com");
+
+    expect(result).toEqual({ success: false, source_url: "https://example.com", articles: [], error: "Timeout" });
+  });
+
+  it("filters queued article results by the source config", async () => {
+    const articles = {
+      success: true,
+      source_url: "https://example.com",
+      articles: [
+        { url: "https://example.com/blog/post-1", title: "Post 1" },
+        { url: "https://example.com/about", title: "About" },
+      ],
+    };
+    vi.mocked(global.fetch)
+      .mockResolvedValueOnce(new Response(JSON.stringify({ id: "job-3", status: "queued" }), { status: 202 }))
+      .mockResolvedValueOnce(
+        new Response(JSON.stringify({ id: "job-3", status: "done", result: articles }), { status: 200 })
+      );
+
+    const result = await mod.scrapeArticlesListQueued("https://example.com", 20, {
+      includePatterns: ["/blog/"],
+    });
+
+    expect(result.articles.map((a) => a.url)).toEqual(["https://example.com/blog/post-1"]);
+  });
+
+  it("gives up when the job does not finish in time", async () => {
+    vi.mocked(global.fetch).mockImplementation(async () =>
+      new Response(JSON.stringify({ id: "job-4", status: "running" }), { status: 200 })
+    );
+
+    const pending = mod.waitForScrapeJob("job-4", { pollIntervalMs: 100, timeoutMs: 1000 });
+    await vi.runAllTimersAsync();
+
+    expect(await pending).toBeNull();
+  });
+});
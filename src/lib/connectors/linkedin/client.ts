@@ -2,10 +2,14 @@
  * LinkedIn HTTP client - wrapper for Python microservice endpoints.
  */
 
+import type { ScrapePriority } from "@/lib/scrapeService";
+
 const TIMEOUT_MS = 30000;
 const BROWSER_AUTH_TIMEOUT_MS = 60000;
 const MAX_RETRIES = 2;
 const RETRY_DELAY_MS = 3000;
+// Longest Retry-After (from a 429) worth waiting out before retrying
+const MAX_RETRY_AFTER_MS = 10000;
 
 function getBaseUrl(): string {
   return process.env.SCRAPER_URL || "http://localhost:8000";
@@ -14,6 +18,7 @@ function getBaseUrl(): string {
 async function fetchWithRetry(
   url: string,
   body: unknown,
+  priority?: ScrapePriority,
   retries = MAX_RETRIES
 ): Promise<Response> {
   for (let attempt = 0; attempt <= retries; attempt++) {
@@ -23,12 +28,24 @@ async function fetchWithRetry(
 
       const res = await fetch(url, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: priority
+          ? { "Content-Type": "application/json", "X-Priority": priority }
+          : { "Content-Type": "application/json" },
         body: JSON.stringify(body),
         signal: controller.signal,
       });
 
       clearTimeout(timeout);
+
+      // Scraper is overloaded: wait out a short Retry-After, otherwise report it
+      if (res.status === 429) {
+        const retryAfterMs = getRetryAfterMs(res);
+        if (attempt < retries && retryAfterMs <= MAX_RETRY_AFTER_MS) {
+          await new Promise((r) => setTimeout(r, retryAfterMs));
+          continue;
+        }
+        return toOverloadedResponse(res);
+      }
       return res;
     } catch (error) {
       if (attempt === retries) throw error;
@@ -38,6 +55,22 @@ async function fetchWithRetry(
   throw new Error("Max retries exceeded");
 }
 
+function getRetryAfterMs(res: Response): number {
+  const seconds = Number(res.headers.get("Retry-After"));
+  return Number.isFinite(seconds) && seconds > 0 ? seconds * 1000 : RETRY_DELAY_MS;
+}
+
+/** 429 from the scraper as a `{ success: false, error }` body callers already handle. */
+async function toOverloadedResponse(res: Response): Promise<Response> {
+  const data = await res.json().catch(() => ({}));
+  const seconds = Math.ceil(getRetryAfterMs(res) / 1000);
+  const error = `${data.detail || "Scraper is busy"} (retry after ${seconds}s)`;
+  return new Response(JSON.stringify({ success: false, error }), {
+    status: 429,
+    headers: { "Content-Type": "application/json", "Retry-After": String(seconds) },
+  });
+}
+
 // === Auth ===
 
 export interface LinkedInAuthResult {
@@ -93,14 +126,15 @@ export async function linkedInFetchPosts(
     maxPosts?: number;
     hashtags?: string[];
     includeReposts?: boolean;
-  } = {}
+  } = {},
+  priority?: ScrapePriority
 ): Promise<LinkedInFetchResult> {
   const res = await fetchWithRetry(`${getBaseUrl()}/linkedin/posts`, {
     session_id: sessionId,
     max_posts: config.maxPosts ?? 30,
     hashtags: config.hashtags,
     include_reposts: config.includeReposts ?? false,
-  });
+  }, priority);
 
   const data = await res.json();
   return {
@@ -164,13 +198,14 @@ export async function linkedInSearchProfiles(
 export async function linkedInFetchProfilePosts(
   sessionId: string,
   publicId: string,
-  maxPosts?: number
+  maxPosts?: number,
+  priority?: ScrapePriority
 ): Promise<LinkedInFetchResult> {
   const res = await fetchWithRetry(`${getBaseUrl()}/linkedin/profile-posts`, {
     session_id: sessionId,
     public_id: publicId,
     max_posts: maxPosts ?? 10,
-  });
+  }, priority);
 
   const data = await res.json();
   return {
@@ -239,12 +274,13 @@ export interface LinkedInPublicPostsResult {
 
 export async function linkedInFetchPublicPosts(
   publicId: string,
-  maxPosts?: number
+  maxPosts?: number,
+  priority?: ScrapePriority
 ): Promise<LinkedInPublicPostsResult> {
   const res = await fetchWithRetry(`${getBaseUrl()}/linkedin/public-posts`, {
     public_id: publicId,
     max_posts: maxPosts ?? 10,
-  });
+  }, priority);
 
   const data = await res.json();
   return {
@@ -280,7 +316,7 @@ export interface BrowserLoginStartResult {
   liAt?: string;
   jsessionid?: string;
   profileName?: string;
-  screenshot?: string;
+  screenshotUrl?: string;
   error?: string;
 }
 
@@ -299,15 +335,16 @@ export async function linkedInBrowserLoginStart(
       signal: controller.signal,
     });
 
-    const data = await res.json();
+    // 429: too many login sessions or the browser memory budget is exhausted
+    const data = await (res.status === 429 ? await toOverloadedResponse(res) : res).json();
     return {
       success: data.success,
       sessionId: data.session_id,
-      state: data.state,
+      state: data.state ?? "failed",
       liAt: data.li_at,
       jsessionid: data.jsessionid,
       profileName: data.profile_name,
-      screenshot: data.screenshot,
+      screenshotUrl: data.screenshot_url,
       error: data.error,
     };
   } finally {
@@ -321,7 +358,7 @@ export interface BrowserLoginVerifyResult {
   liAt?: string;
   jsessionid?: string;
   profileName?: string;
-  screenshot?: string;
+  screenshotUrl?: string;
   error?: string;
 }
 
@@ -340,14 +377,14 @@ export async function linkedInBrowserLoginVerify(
       signal: controller.signal,
     });
 
-    const data = await res.json();
+    const data = await (res.status === 429 ? await toOverloadedResponse(res) : res).json();
     return {
       success: data.success,
-      state: data.state,
+      state: data.state ?? "failed",
       liAt: data.li_at,
       jsessionid: data.jsessionid,
       profileName: data.profile_name,
-      screenshot: data.screenshot,
+      screenshotUrl: data.screenshot_url,
       error: data.error,
     };
   } finally {
@@ -355,6 +392,24 @@ export async function linkedInBrowserLoginVerify(
   }
 }
 
+export interface BrowserLoginScreenshot {
+  body: ArrayBuffer;
+  contentType: string;
+}
+
+export async function linkedInBrowserLoginScreenshot(
+  sessionId: string
+): Promise<BrowserLoginScreenshot | null> {
+  const res = await fetch(
+    `${getBaseUrl()}/linkedin/browser-login/${encodeURIComponent(sessionId)}/screenshot`
+  );
+  if (!res.ok) return null;
+  return {
+    body: await res.arrayBuffer(),
+    contentType: res.headers.get("content-type") || "image/jpeg",
+  };
+}
+
 export async function linkedInBrowserLoginClose(
   sessionId: string
 ): Promise<void> {
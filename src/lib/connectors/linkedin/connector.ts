@@ -4,6 +4,7 @@ import type {
   AuthResult,
   ConnectionStatus,
   ConnectorItem,
+  FetchOptions,
   SyncProgress,
 } from "../types";
 import { encrypt, decrypt } from "@/lib/encryption";
@@ -91,7 +92,10 @@ export class LinkedInConnector implements SourceConnector {
     }
   }
 
-  async fetchItems(source: PrivateSource): Promise<ConnectorItem[]> {
+  async fetchItems(
+    source: PrivateSource,
+    options?: FetchOptions
+  ): Promise<ConnectorItem[]> {
     const creds = parseCredentials(source);
     const config = (source.config as unknown as LinkedInConfig) || {};
 
@@ -125,7 +129,8 @@ export class LinkedInConnector implements SourceConnector {
         console.log(`[LINKEDIN-PUBLIC] Fetching posts for: ${profile.publicId}`);
         const result = await linkedInFetchPublicPosts(
           profile.publicId,
-          maxPostsPerProfile
+          maxPostsPerProfile,
+          options?.priority
         );
 
         console.log(`[LINKEDIN-PUBLIC] Result for ${profile.publicId}: success=${result.success}, posts=${result.posts.length}, error=${result.error}`);
@@ -179,7 +184,8 @@ export class LinkedInConnector implements SourceConnector {
         const result = await linkedInFetchProfilePosts(
           sessionId!,
           profile.publicId,
-          maxPostsPerProfile
+          maxPostsPerProfile,
+          options?.priority
         );
 
         console.log(`[LINKEDIN] Result for ${profile.publicId}: success=${result.success}, posts=${result.posts.length}, error=${result.error}`);
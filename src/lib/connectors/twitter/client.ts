@@ -2,9 +2,13 @@
  * X/Twitter HTTP client - wrapper for Python microservice endpoints.
  */
 
+import type { ScrapePriority } from "@/lib/scrapeService";
+
 const TIMEOUT_MS = 30000;
 const MAX_RETRIES = 2;
 const RETRY_DELAY_MS = 3000;
+// Longest Retry-After (from a 429) worth waiting out before retrying
+const MAX_RETRY_AFTER_MS = 10000;
 
 function getBaseUrl(): string {
   return process.env.SCRAPER_URL || "http://localhost:8000";
@@ -13,6 +17,7 @@ function getBaseUrl(): string {
 async function fetchWithRetry(
   url: string,
   body: unknown,
+  priority?: ScrapePriority,
   retries = MAX_RETRIES
 ): Promise<Response> {
   for (let attempt = 0; attempt <= retries; attempt++) {
@@ -22,12 +27,24 @@ async function fetchWithRetry(
 
       const res = await fetch(url, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: priority
+          ? { "Content-Type": "application/json", "X-Priority": priority }
+          : { "Content-Type": "application/json" },
         body: JSON.stringify(body),
         signal: controller.signal,
       });
 
       clearTimeout(timeout);
+
+      // Scraper is overloaded: wait out a short Retry-After, otherwise report it
+      if (res.status === 429) {
+        const retryAfterMs = getRetryAfterMs(res);
+        if (attempt < retries && retryAfterMs <= MAX_RETRY_AFTER_MS) {
+          await new Promise((r) => setTimeout(r, retryAfterMs));
+          continue;
+        }
+        return toOverloadedResponse(res);
+      }
       return res;
     } catch (error) {
       if (attempt === retries) throw error;
@@ -37,6 +54,22 @@ async function fetchWithRetry(
   throw new Error("Max retries exceeded");
 }
 
+function getRetryAfterMs(res: Response): number {
+  const seconds = Number(res.headers.get("Retry-After"));
+  return Number.isFinite(seconds) && seconds > 0 ? seconds * 1000 : RETRY_DELAY_MS;
+}
+
+/** 429 from the scraper as a `{ success: false, error }` body callers already handle. */
+async function toOverloadedResponse(res: Response): Promise<Response> {
+  const data = await res.json().catch(() => ({}));
+  const seconds = Math.ceil(getRetryAfterMs(res) / 1000);
+  const error = `${data.detail || "Scraper is busy"} (retry after ${seconds}s)`;
+  return new Response(JSON.stringify({ success: false, error }), {
+    status: 429,
+    headers: { "Content-Type": "application/json", "Retry-After": String(seconds) },
+  });
+}
+
 // === Auth ===
 
 export interface TwitterAuthResult {
@@ -94,7 +127,8 @@ export async function twitterFetchTimeline(
     includeRetweets?: boolean;
     includeReplies?: boolean;
     expandThreads?: boolean;
-  } = {}
+  } = {},
+  priority?: ScrapePriority
 ): Promise<TwitterFetchResult> {
   const res = await fetchWithRetry(`${getBaseUrl()}/twitter/timeline`, {
     session_id: sessionId,
@@ -103,7 +137,7 @@ export async function twitterFetchTimeline(
     include_retweets: config.includeRetweets ?? true,
     include_replies: config.includeReplies ?? false,
     expand_threads: config.expandThreads ?? true,
-  });
+  }, priority);
 
   const data = await res.json();
   return {
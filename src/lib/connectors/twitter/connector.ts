@@ -4,6 +4,7 @@ import type {
   AuthResult,
   ConnectionStatus,
   ConnectorItem,
+  FetchOptions,
   SyncProgress,
 } from "../types";
 import { encrypt, decrypt } from "@/lib/encryption";
@@ -76,7 +77,10 @@ export class TwitterConnector implements SourceConnector {
     }
   }
 
-  async fetchItems(source: PrivateSource): Promise<ConnectorItem[]> {
+  async fetchItems(
+    source: PrivateSource,
+    options?: FetchOptions
+  ): Promise<ConnectorItem[]> {
     const creds = parseCredentials(source);
     const config = (source.config as unknown as TwitterConfig) || {};
 
@@ -108,7 +112,7 @@ export class TwitterConnector implements SourceConnector {
       includeRetweets: config.includeRetweets ?? true,
       includeReplies: config.includeReplies ?? false,
       expandThreads: config.expandThreads ?? true,
-    });
+    }, options?.priority);
 
     if (!result.success) {
       throw new Error(result.error || "Fetch failed");
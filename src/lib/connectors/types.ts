@@ -1,4 +1,5 @@
 import type { PrivateSourceType, ConnectorStatus, PrivateSource } from "@prisma/client";
+import type { ScrapePriority } from "@/lib/scrapeService";
 
 // === Auth ===
 
@@ -37,6 +38,11 @@ export interface ConnectorItem {
   publishedAt?: Date;
 }
 
+export interface FetchOptions {
+  /** Scraper scheduler lane; "bulk" for background/scheduled syncs */
+  priority?: ScrapePriority;
+}
+
 export interface SyncResult {
   items: ConnectorItem[];
   lastSyncToken?: string;
@@ -52,7 +58,7 @@ export interface SourceConnector {
   authenticate(credentials: unknown): Promise<AuthResult>;
 
   /** Fetch new items from the source */
-  fetchItems(source: PrivateSource): Promise<ConnectorItem[]>;
+  fetchItems(source: PrivateSource, options?: FetchOptions): Promise<ConnectorItem[]>;
 
   /** Validate connector-specific config before saving */
   validateConfig(config: unknown): boolean;
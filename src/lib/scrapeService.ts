@@ -4,6 +4,27 @@
 
 const SCRAPER_URL = process.env.SCRAPER_URL || "http://localhost:8000";
 
+/**
+ * Scheduler lane on the scraper: "interactive" (default) for user-initiated
+ * requests, "bulk" for refreshes that should yield to them
+ */
+export type ScrapePriority = "interactive" | "bulk";
+
+function requestHeaders(priority?: ScrapePriority): Record<string, string> {
+  return priority
+    ? { "Content-Type": "application/json", "X-Priority": priority }
+    : { "Content-Type": "application/json" };
+}
+
+/**
+ * Seconds to wait before retrying, from the Retry-After header the scraper
+ * sends with 429 when its queue is full or it's out of browser memory
+ */
+function getRetryAfter(response: Response): number | undefined {
+  const seconds = Number(response.headers.get("Retry-After"));
+  return seconds > 0 ? seconds : undefined;
+}
+
 export interface ScrapeResult {
   success: boolean;
   url: string;
@@ -12,6 +33,7 @@ export interface ScrapeResult {
   html_length: number;
   links_count: number;
   error?: string;
+  retry_after?: number;
 }
 
 export interface ArticleInfo {
@@ -27,6 +49,7 @@ export interface ArticlesResult {
   source_url: string;
   articles: ArticleInfo[];
   error?: string;
+  retry_after?: number;
 }
 
 /**
@@ -34,12 +57,12 @@ export interface ArticlesResult {
  */
 export async function scrapeUrl(
   url: string,
-  options?: { waitFor?: string; timeout?: number }
+  options?: { waitFor?: string; timeout?: number; priority?: ScrapePriority }
 ): Promise<ScrapeResult> {
   try {
     const response = await fetch(`${SCRAPER_URL}/scrape`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: requestHeaders(options?.priority),
       body: JSON.stringify({
         url,
         wait_for: options?.waitFor,
@@ -54,6 +77,7 @@ export async function scrapeUrl(
         html_length: 0,
         links_count: 0,
         error: `HTTP ${response.status}: ${response.statusText}`,
+        retry_after: getRetryAfter(response),
       };
     }
 
@@ -77,18 +101,52 @@ export interface SourceConfig {
   excludePatterns?: string[];
 }
 
+/**
+ * If config has patterns, filter articles client-side as backup
+ */
+function filterArticles(result: ArticlesResult, config?: SourceConfig | null): ArticlesResult {
+  if (config?.includePatterns && config.includePatterns.length > 0 && result.articles) {
+    result.articles = result.articles.filter((article: ArticleInfo) => {
+      try {
+        const path = new URL(article.url).pathname;
+
+        // Check exclude patterns first
+        if (config.excludePatterns) {
+          for (const pattern of config.excludePatterns) {
+            if (path.includes(pattern)) {
+              return false;
+            }
+          }
+        }
+
+        // Check include patterns
+        for (const pattern of config.includePatterns!) {
+          if (path.startsWith(pattern.replace(/\/$/, ""))) {
+            return true;
+          }
+        }
+        return false;
+      } catch {
+        return false;
+      }
+    });
+  }
+  return result;
+}
+
 /**
  * Scrape a blog/news site and extract article list
  */
 export async function scrapeArticlesList(
   url: string,
   maxArticles: number = 20,
-  config?: SourceConfig | null
+  config?: SourceConfig | null,
+  priority?: ScrapePriority
 ): Promise<ArticlesResult> {
   try {
     const response = await fetch(`${SCRAPER_URL}/scrape/articles`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: requestHeaders(priority),
       body: JSON.stringify({
         url,
         max_articles: maxArticles,
@@ -102,40 +160,11 @@ export async function scrapeArticlesList(
         source_url: url,
         articles: [],
         error: `HTTP ${response.status}: ${response.statusText}`,
+        retry_after: getRetryAfter(response),
       };
     }
 
-    const result = await response.json();
-
-    // If config has patterns, filter articles client-side as backup
-    if (config?.includePatterns && config.includePatterns.length > 0 && result.articles) {
-      result.articles = result.articles.filter((article: ArticleInfo) => {
-        try {
-          const path = new URL(article.url).pathname;
-
-          // Check exclude patterns first
-          if (config.excludePatterns) {
-            for (const pattern of config.excludePatterns) {
-              if (path.includes(pattern)) {
-                return false;
-              }
-            }
-          }
-
-          // Check include patterns
-          for (const pattern of config.includePatterns!) {
-            if (path.startsWith(pattern.replace(/\/$/, ""))) {
-              return true;
-            }
-          }
-          return false;
-        } catch {
-          return false;
-        }
-      });
-    }
-
-    return result;
+    return filterArticles(await response.json(), config);
   } catch (error) {
     return {
       success: false,
@@ -161,6 +190,151 @@ export async function checkScraperHealth(): Promise<boolean> {
   }
 }
 
+export type ScrapeJobType = "scrape" | "articles";
+
+export type ScrapeJobStatus = "queued" | "running" | "done" | "failed";
+
+export interface ScrapeJob {
+  id: string;
+  type: ScrapeJobType;
+  status: ScrapeJobStatus;
+  priority: number;
+  attempts: number;
+  max_attempts: number;
+  created_at: number;
+  updated_at: number;
+  run_at?: number;
+  result?: ScrapeResult | ArticlesResult;
+  error?: string;
+}
+
+/**
+ * Enqueue a scrape on the scraper's job queue. Returns immediately; poll
+ * getScrapeJob() or pass callbackUrl to receive the finished job.
+ * payload is the body of the matching endpoint (/scrape or /scrape/articles).
+ */
+export async function enqueueScrapeJob(
+  type: ScrapeJobType,
+  payload: Record<string, unknown>,
+  options?: { priority?: number; maxAttempts?: number; callbackUrl?: string }
+): Promise<ScrapeJob | null> {
+  try {
+    const response = await fetch(`${SCRAPER_URL}/jobs`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        type,
+        payload,
+        priority: options?.priority ?? 0,
+        max_attempts: options?.maxAttempts,
+        callback_url: options?.callbackUrl,
+      }),
+    });
+    if (!response.ok) {
+      return null;
+    }
+    return await response.json();
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Status and result of a queued scrape (null when unknown or expired)
+ */
+export async function getScrapeJob(id: string): Promise<ScrapeJob | null> {
+  try {
+    const response = await fetch(`${SCRAPER_URL}/jobs/${encodeURIComponent(id)}`, {
+      method: "GET",
+    });
+    if (!response.ok) {
+      return null;
+    }
+    return await response.json();
+  } catch {
+    return null;
+  }
+}
+
+const JOB_POLL_INTERVAL_MS = 1000;
+// Bulk jobs can queue behind a whole refresh run before they start
+const JOB_WAIT_TIMEOUT_MS = 10 * 60 * 1000;
+
+/**
+ * Poll a queued scrape until it is done or failed. Null when the job is
+ * unknown/expired or doesn't finish within timeoutMs.
+ */
+export async function waitForScrapeJob(
+  id: string,
+  options?: { pollIntervalMs?: number; timeoutMs?: number }
+): Promise<ScrapeJob | null> {
+  const deadline = Date.now() + (options?.timeoutMs ?? JOB_WAIT_TIMEOUT_MS);
+  for (;;) {
+    const job = await getScrapeJob(id);
+    if (!job || job.status === "done" || job.status === "failed") {
+      return job;
+    }
+    if (Date.now() >= deadline) {
+      return null;
+    }
+    await new Promise((r) => setTimeout(r, options?.pollIntervalMs ?? JOB_POLL_INTERVAL_MS));
+  }
+}
+
+/**
+ * Enqueue a scrape and wait for its result. The scraper runs queued jobs in
+ * its bulk lane and retries failed attempts, and no HTTP request stays open
+ * for the whole scrape - meant for background refreshes.
+ */
+async function runScrapeJob(
+  type: ScrapeJobType,
+  payload: Record<string, unknown>
+): Promise<{ result?: ScrapeResult | ArticlesResult; error: string }> {
+  const queued = await enqueueScrapeJob(type, payload);
+  if (!queued) {
+    return { error: "Failed to enqueue scrape job" };
+  }
+  const job = await waitForScrapeJob(queued.id);
+  if (!job) {
+    return { error: "Scrape job expired or timed out" };
+  }
+  return { result: job.result, error: job.error || "Scrape job failed" };
+}
+
+/**
+ * scrapeUrl through the scraper's job queue (see runScrapeJob)
+ */
+export async function scrapeUrlQueued(
+  url: string,
+  options?: { waitFor?: string; timeout?: number }
+): Promise<ScrapeResult> {
+  const { result, error } = await runScrapeJob("scrape", {
+    url,
+    wait_for: options?.waitFor,
+    timeout: options?.timeout || 30000,
+  });
+  return (result as ScrapeResult | undefined) ?? { success: false, url, html_length: 0, links_count: 0, error };
+}
+
+/**
+ * scrapeArticlesList through the scraper's job queue (see runScrapeJob)
+ */
+export async function scrapeArticlesListQueued(
+  url: string,
+  maxArticles: number = 20,
+  config?: SourceConfig | null
+): Promise<ArticlesResult> {
+  const { result, error } = await runScrapeJob("articles", {
+    url,
+    max_articles: maxArticles,
+    config: config || undefined,
+  });
+  if (!result) {
+    return { success: false, source_url: url, articles: [], error };
+  }
+  return filterArticles(result as ArticlesResult, config);
+}
+
 /**
  * Phrases to filter out from intro (social media widgets, sharing buttons, etc.)
  */